@@ -1,15 +1,26 @@
 from __future__ import annotations
 
+import hashlib
+import io
+import math
 import os
+import sqlite3
 import sys
+import threading
+from contextlib import asynccontextmanager
+from dataclasses import asdict
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
 
-from fastapi import FastAPI, Form, HTTPException, Request
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+import anyio
+from fastapi import Depends, FastAPI, File, Form, HTTPException, Query, Request, UploadFile
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from pydantic import BaseModel
+from markupsafe import Markup
+from pydantic import BaseModel, Field
 
 
 def _ensure_src_path() -> None:
@@ -21,15 +32,45 @@ def _ensure_src_path() -> None:
 
 _ensure_src_path()
 
+from wam.cache import CacheSession, IdentityCache  # noqa: E402
 from wam.db import init_db  # noqa: E402
+from wam.events import ChangeBus, EventBuffer  # noqa: E402
+from wam.executor import AsyncRepository, Runner, ThreadpoolRunner  # noqa: E402
+from wam.fragments import FragmentCache  # noqa: E402
+from wam.exporter import EXPORT_FORMATS, EXPORT_KINDS, EXPORT_MEDIA_TYPES, export_chunks  # noqa: E402
+from wam.importer import IMPORT_FORMATS, IMPORT_SPECS, detect_format, import_records  # noqa: E402
+from wam.layout import CELL_HEIGHT, CELL_WIDTH, GRID_COLS, ORIGIN_X, ORIGIN_Y, CardSlot  # noqa: E402
+from wam.pool import AsyncConnectionPool, ConnectionPool  # noqa: E402
 from wam.repositories import (  # noqa: E402
+    AssignmentChange,
+    AssignmentConflictError,
+    AssignmentOperation,
+    AuditEntry,
     AuditRepository,
+    AuditTailCache,
+    AuditWriter,
     ConfigRepository,
     DeviceRepository,
     LicenseRepository,
+    ListQuery,
     PositionRepository,
+    SummaryRepository,
+    TableVersionRepository,
 )
 from wam.services import AssetService, ConfigService  # noqa: E402
+from wam.verifier import AuditCheckpoint, load_checkpoints, save_checkpoints, verify_audit_chain  # noqa: E402
+
+LIST_PAGE_SIZE = 100
+SUMMARY_TABLES = ("devices", "licenses", "configurations", "config_devices", "config_licenses")
+CONFIG_VIEW_TABLES = SUMMARY_TABLES + ("config_positions",)
+CONFIG_DETAIL_TABLES = SUMMARY_TABLES + ("audit_logs",)
+CANVAS_WINDOW_THRESHOLD = 200
+CANVAS_MAX_VIEWPORT = 20000
+CANVAS_MAX_COORDINATE = 1000000
+VERIFY_MAX_WORKERS = 4
+EVENT_KEEPALIVE_SECONDS = 15.0
+
+T = TypeVar("T")
 
 
 class AssignPayload(BaseModel):
@@ -38,9 +79,113 @@ class AssignPayload(BaseModel):
     source_config_id: Optional[int] = None
 
 
+class AssignmentOperationPayload(BaseModel):
+    op: str
+    asset_type: str
+    asset_id: int
+    config_id: int
+    source_config_id: Optional[int] = None
+
+
+class BatchAssignPayload(BaseModel):
+    operations: List[AssignmentOperationPayload]
+
+
 class PositionPayload(BaseModel):
-    x: float
-    y: float
+    x: float = Field(ge=0, le=CANVAS_MAX_COORDINATE, allow_inf_nan=False)
+    y: float = Field(ge=0, le=CANVAS_MAX_COORDINATE, allow_inf_nan=False)
+
+
+class PositionUpdatePayload(BaseModel):
+    config_id: int
+    x: float = Field(ge=0, le=CANVAS_MAX_COORDINATE, allow_inf_nan=False)
+    y: float = Field(ge=0, le=CANVAS_MAX_COORDINATE, allow_inf_nan=False)
+
+
+class PositionBatchPayload(BaseModel):
+    positions: List[PositionUpdatePayload]
+
+
+class RequestContext:
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        audit_tails: Optional[AuditTailCache] = None,
+        cache: Optional[CacheSession] = None,
+    ) -> None:
+        self.conn = conn
+        self.cache = cache
+        self.device_repo = DeviceRepository(conn, cache)
+        self.license_repo = LicenseRepository(conn, cache)
+        self.config_repo = ConfigRepository(conn, cache)
+        self.events = EventBuffer()
+        self.position_repo = PositionRepository(conn, self.events)
+        self.audit_repo = AuditRepository(conn)
+        self.summary_repo = SummaryRepository(conn)
+        self.version_repo = TableVersionRepository(conn)
+        self.audit_writer = AuditWriter(self.audit_repo, audit_tails)
+        self.asset_service = AssetService(self.device_repo, self.license_repo)
+        self.config_service = ConfigService(self.config_repo, self.events)
+
+
+class AsyncRequestContext:
+    def __init__(self, ctx: RequestContext, runner: Runner) -> None:
+        self.conn = ctx.conn
+        self.cache = ctx.cache
+        self.events = ctx.events
+        self.device_repo = AsyncRepository(ctx.device_repo, runner)
+        self.license_repo = AsyncRepository(ctx.license_repo, runner)
+        self.config_repo = AsyncRepository(ctx.config_repo, runner)
+        self.position_repo = AsyncRepository(ctx.position_repo, runner)
+        self.audit_repo = AsyncRepository(ctx.audit_repo, runner)
+        self.summary_repo = AsyncRepository(ctx.summary_repo, runner)
+        self.version_repo = AsyncRepository(ctx.version_repo, runner)
+        self.audit_writer = AsyncRepository(ctx.audit_writer, runner)
+        self.asset_service = AsyncRepository(ctx.asset_service, runner)
+        self.config_service = AsyncRepository(ctx.config_service, runner)
+        self._runner = runner
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await self._runner.run(fn, *args, **kwargs)
+
+
+def _assignment_audit_entry(change: AssignmentChange, created_at: str) -> AuditEntry:
+    id_key, label_key = ("device_id", "asset_no") if change.asset_type == "device" else ("license_id", "license_no")
+    details: Dict[str, object] = {id_key: change.asset_id, label_key: change.label}
+    if change.op == "move":
+        details["from_config_id"] = change.source_config_id
+        details["to_config_id"] = change.config_id
+    return AuditEntry(
+        config_id=change.config_id,
+        action=f"config.{change.asset_type}.{change.op}",
+        actor="system",
+        details=details,
+        created_at=created_at,
+    )
+
+
+def _render_token(paths: Sequence[str], version: str) -> str:
+    digest = hashlib.sha256(version.encode("utf-8"))
+    files = [path for path in paths if os.path.isfile(path)]
+    for directory in (path for path in paths if os.path.isdir(path)):
+        files.extend(os.path.join(root, name) for root, _, names in os.walk(directory) for name in names)
+    for path in sorted(files):
+        stat = os.stat(path)
+        digest.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [item.strip() for item in header.split(",")]
+    return "*" in candidates or any(item.removeprefix("W/") == etag for item in candidates)
+
+
+def _with_etag(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return response
 
 
 def _default_db_path() -> str:
@@ -50,22 +195,130 @@ def _default_db_path() -> str:
     return os.path.join(data_dir, "wam.sqlite3")
 
 
-def create_app(db_path: Optional[str] = None) -> FastAPI:
+def create_app(
+    db_path: Optional[str] = None,
+    pool_size: Optional[int] = None,
+    db_profile: Optional[str] = None,
+    seed_sample: Optional[bool] = None,
+    db_executor: Optional[str] = None,
+) -> FastAPI:
     db_path = db_path or os.environ.get("WAM_DB_PATH") or _default_db_path()
-    conn = init_db(db_path)
+    db_profile = db_profile or os.environ.get("WAM_DB_PROFILE")
+    if seed_sample is None:
+        seed_sample = os.environ.get("WAM_SEED_SAMPLE", "").lower() in ("1", "true", "yes")
+    pool_size = pool_size or int(os.environ.get("WAM_DB_POOL_SIZE", "4"))
+    db_executor = db_executor or os.environ.get("WAM_DB_EXECUTOR", "thread")
+    checkpoint_interval = float(os.environ.get("WAM_WAL_CHECKPOINT_SECONDS", "30"))
+    audit_tail_capacity = int(os.environ.get("WAM_AUDIT_TAIL_CACHE_SIZE", "1024"))
+    event_queue_size = int(os.environ.get("WAM_EVENT_QUEUE_SIZE", "256"))
+    object_cache_size = int(os.environ.get("WAM_OBJECT_CACHE_SIZE", "4096"))
+    object_cache_ttl = float(os.environ.get("WAM_OBJECT_CACHE_TTL", "60"))
+    fragment_cache_size = int(os.environ.get("WAM_FRAGMENT_CACHE_SIZE", "2048"))
+    init_db(db_path, db_profile, seed=seed_sample).close()
+    pool = ConnectionPool(
+        db_path,
+        readers=pool_size,
+        profile=db_profile,
+        checkpoint_interval=checkpoint_interval,
+    )
+    db = AsyncConnectionPool(pool, db_executor)
+
+    audit_tails = AuditTailCache(audit_tail_capacity)
+    change_bus = ChangeBus(event_queue_size)
+    identity = IdentityCache(object_cache_size, object_cache_ttl)
+    fragments = FragmentCache(fragment_cache_size)
+    verify_lock = threading.Lock()
+    verify_runner = ThreadpoolRunner()
 
-    device_repo = DeviceRepository(conn)
-    license_repo = LicenseRepository(conn)
-    config_repo = ConfigRepository(conn)
-    position_repo = PositionRepository(conn)
-    audit_repo = AuditRepository(conn)
+    async def read_context() -> AsyncIterator[AsyncRequestContext]:
+        identity.sync(await db.data_version())
+        async with db.reader() as (conn, runner):
+            yield AsyncRequestContext(RequestContext(conn, cache=identity.session()), runner)
 
-    asset_service = AssetService(device_repo, license_repo)
-    config_service = ConfigService(config_repo)
+    async def write_context() -> AsyncIterator[AsyncRequestContext]:
+        session = identity.session()
+        async with db.writer() as (conn, runner):
+            ctx = AsyncRequestContext(RequestContext(conn, audit_tails, session), runner)
+            identity.sync(await ctx.audit_repo.data_version())
+            yield ctx
+            tails = await ctx.audit_writer.flush()
+        identity.committed(session)
+        audit_tails.store(tails)
+        change_bus.publish_many(ctx.events.drain())
 
-    app = FastAPI(title="Web Asset Manager", version="1.0.0")
+    @asynccontextmanager
+    async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+        yield
+        db.close()
+        pool.close()
 
-    templates = Jinja2Templates(directory=os.path.join(os.path.dirname(__file__), "web", "templates"))
+    app = FastAPI(title="Web Asset Manager", version="1.0.0", lifespan=lifespan)
+    app.state.pool = pool
+    app.state.db = db
+    app.state.audit_tails = audit_tails
+    app.state.change_bus = change_bus
+    app.state.identity_cache = identity
+    app.state.fragment_cache = fragments
+
+    @app.exception_handler(RequestValidationError)
+    async def validation_error(_: Request, exc: RequestValidationError) -> JSONResponse:
+        errors = [
+            {**error, "input": str(error["input"])}
+            if isinstance(error.get("input"), float) and not math.isfinite(error["input"])
+            else error
+            for error in exc.errors()
+        ]
+        return JSONResponse(status_code=422, content={"detail": jsonable_encoder(errors)})
+
+    templates_dir = os.path.join(os.path.dirname(__file__), "web", "templates")
+    templates = Jinja2Templates(directory=templates_dir)
+    render_token = _render_token([templates_dir, os.path.abspath(__file__)], app.version)
+
+    card_macros = templates.get_template("_config_card.html").module
+    card_renderers = {"row": card_macros.config_row, "card": card_macros.config_card}
+
+    async def render_card_fragments(
+        ctx: AsyncRequestContext,
+        cards: List[Dict[str, object]],
+        kinds: Sequence[str],
+    ) -> None:
+        generation = (await ctx.version_repo.load(()))[0]
+        revisions = await ctx.version_repo.load_config_revisions(card["config"].config_id for card in cards)
+        stale: List[Dict[str, object]] = []
+        for card in cards:
+            revision = revisions.get(card["config"].config_id, 0)
+            card["key"] = (card["config"], card["x"], card["y"], card["region"], generation, revision)
+            for kind in kinds:
+                fragment = fragments.lookup((kind, card["key"]))
+                if fragment is None:
+                    stale.append(card)
+                    break
+                card[f"{kind}_html"] = Markup(fragment)
+        if not stale:
+            return
+        devices_by_config, licenses_by_config = await ctx.config_service.list_config_members(
+            card["config"].config_id for card in stale
+        )
+        for card in stale:
+            config_id = card["config"].config_id
+            card["devices"] = devices_by_config.get(config_id, [])
+            card["licenses"] = licenses_by_config.get(config_id, [])
+            for kind in kinds:
+                fragment = card_renderers[kind](card)
+                fragments.store((kind, card["key"]), str(fragment))
+                card[f"{kind}_html"] = fragment
+
+    async def view_etag(
+        request: Request,
+        ctx: AsyncRequestContext,
+        tables: Sequence[str],
+    ) -> Tuple[str, Optional[Response]]:
+        versions = await ctx.version_repo.load(tables)
+        key = "|".join([render_token, request.url.path, request.url.query, *(str(item) for item in versions)])
+        etag = '"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return etag, _with_etag(Response(status_code=304), etag)
+        return etag, None
     app.mount(
         "/static",
         StaticFiles(directory=os.path.join(os.path.dirname(__file__), "web", "static")),
@@ -73,70 +326,65 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
     )
 
     @app.get("/", response_class=HTMLResponse)
-    def root() -> RedirectResponse:
+    async def root() -> RedirectResponse:
         return RedirectResponse(url="/assets")
 
     @app.get("/assets", response_class=HTMLResponse)
-    def assets(request: Request) -> HTMLResponse:
-        devices = asset_service.list_devices()
-        licenses = asset_service.list_licenses()
-        return templates.TemplateResponse(
+    async def assets(request: Request, ctx: AsyncRequestContext = Depends(read_context)) -> Response:
+        etag, not_modified = await view_etag(request, ctx, ("devices", "licenses"))
+        if not_modified is not None:
+            return not_modified
+        summary = await ctx.summary_repo.load()
+        response = templates.TemplateResponse(
             request,
             "assets.html",
             {
                 "request": request,
-                "device_count": len(devices),
-                "license_count": len(licenses),
+                "device_count": summary.devices,
+                "license_count": summary.licenses,
             },
         )
+        return _with_etag(response, etag)
 
     @app.get("/assets/devices", response_class=HTMLResponse)
-    def device_list(
+    async def device_list(
         request: Request,
         device_q: str | None = None,
         device_sort: str | None = None,
         device_dir: str | None = None,
-    ) -> HTMLResponse:
-        devices = asset_service.list_devices()
-
-        if device_q:
-            query = device_q.lower()
-            devices = [
-                item
-                for item in devices
-                if query in item.asset_no.lower()
-                or query in (item.display_name or "").lower()
-                or query in item.device_type.lower()
-                or query in item.model.lower()
-                or query in item.version.lower()
-                or query in item.state.lower()
-            ]
-
-        device_sort_map = {
-            "asset_no": lambda item: item.asset_no,
-            "display_name": lambda item: item.display_name or "",
-            "device_type": lambda item: item.device_type,
-            "model": lambda item: item.model,
-            "version": lambda item: item.version,
-            "state": lambda item: item.state,
-        }
-        if device_sort in device_sort_map:
-            devices = sorted(devices, key=device_sort_map[device_sort], reverse=device_dir == "desc")
+        device_page: int = Query(1, ge=1),
+        ctx: AsyncRequestContext = Depends(read_context),
+    ) -> Response:
+        etag, not_modified = await view_etag(request, ctx, ("devices",))
+        if not_modified is not None:
+            return not_modified
+        page = await ctx.asset_service.query_devices(
+            ListQuery(
+                q=device_q or "",
+                sort=device_sort,
+                direction=device_dir or "asc",
+                limit=LIST_PAGE_SIZE,
+                offset=(device_page - 1) * LIST_PAGE_SIZE,
+            )
+        )
 
-        return templates.TemplateResponse(
+        response = templates.TemplateResponse(
             request,
             "devices.html",
             {
                 "request": request,
-                "devices": devices,
+                "devices": page.items,
+                "page": page,
                 "device_q": device_q or "",
                 "device_sort": device_sort or "",
                 "device_dir": device_dir or "",
+                "device_page": device_page,
             },
         )
+        return _with_etag(response, etag)
 
     @app.get("/assets/devices/new", response_class=HTMLResponse)
-    def new_device_form(request: Request) -> HTMLResponse:
+    async def new_device_form(request: Request) -> HTMLResponse:
         return templates.TemplateResponse(
             request,
             "device_create.html",
@@ -144,48 +392,44 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
         )
 
     @app.get("/assets/licenses", response_class=HTMLResponse)
-    def license_list(
+    async def license_list(
         request: Request,
         license_q: str | None = None,
         license_sort: str | None = None,
         license_dir: str | None = None,
-    ) -> HTMLResponse:
-        licenses = asset_service.list_licenses()
-
-        if license_q:
-            query = license_q.lower()
-            licenses = [
-                item
-                for item in licenses
-                if query in item.license_no.lower()
-                or query in item.name.lower()
-                or query in item.license_key.lower()
-                or query in item.state.lower()
-            ]
-
-        license_sort_map = {
-            "license_no": lambda item: item.license_no,
-            "name": lambda item: item.name,
-            "license_key": lambda item: item.license_key,
-            "state": lambda item: item.state,
-        }
-        if license_sort in license_sort_map:
-            licenses = sorted(licenses, key=license_sort_map[license_sort], reverse=license_dir == "desc")
+        license_page: int = Query(1, ge=1),
+        ctx: AsyncRequestContext = Depends(read_context),
+    ) -> Response:
+        etag, not_modified = await view_etag(request, ctx, ("licenses",))
+        if not_modified is not None:
+            return not_modified
+        page = await ctx.asset_service.query_licenses(
+            ListQuery(
+                q=license_q or "",
+                sort=license_sort,
+                direction=license_dir or "asc",
+                limit=LIST_PAGE_SIZE,
+                offset=(license_page - 1) * LIST_PAGE_SIZE,
+            )
+        )
 
-        return templates.TemplateResponse(
+        response = templates.TemplateResponse(
             request,
             "licenses.html",
             {
                 "request": request,
-                "licenses": licenses,
+                "licenses": page.items,
+                "page": page,
                 "license_q": license_q or "",
                 "license_sort": license_sort or "",
                 "license_dir": license_dir or "",
+                "license_page": license_page,
             },
         )
+        return _with_etag(response, etag)
 
     @app.get("/assets/licenses/new", response_class=HTMLResponse)
-    def new_license_form(request: Request) -> HTMLResponse:
+    async def new_license_form(request: Request) -> HTMLResponse:
         return templates.TemplateResponse(
             request,
             "license_create.html",
@@ -193,7 +437,7 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
         )
 
     @app.post("/assets/devices")
-    def create_device(
+    async def create_device(
         asset_no: str = Form(...),
         display_name: Optional[str] = Form(None),
         device_type: str = Form(...),
@@ -201,8 +445,9 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
         version: str = Form(...),
         state: str = Form(...),
         note: str = Form(""),
+        ctx: AsyncRequestContext = Depends(write_context),
     ) -> RedirectResponse:
-        asset_service.add_device(
+        await ctx.asset_service.add_device(
             asset_no=asset_no,
             display_name=display_name,
             device_type=device_type,
@@ -214,8 +459,12 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
         return RedirectResponse(url="/assets/devices", status_code=303)
 
     @app.get("/assets/devices/{device_id}/edit", response_class=HTMLResponse)
-    def edit_device_form(request: Request, device_id: int) -> HTMLResponse:
-        device = device_repo.get_by_id(device_id)
+    async def edit_device_form(
+        request: Request,
+        device_id: int,
+        ctx: AsyncRequestContext = Depends(read_context),
+    ) -> HTMLResponse:
+        device = await ctx.device_repo.get_by_id(device_id)
         return templates.TemplateResponse(
             request,
             "device_edit.html",
@@ -223,7 +472,7 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
         )
 
     @app.post("/assets/devices/{device_id}/edit")
-    def edit_device(
+    async def edit_device(
         device_id: int,
         asset_no: str = Form(...),
         display_name: Optional[str] = Form(None),
@@ -232,8 +481,9 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
         version: str = Form(...),
         state: str = Form(...),
         note: str = Form(""),
+        ctx: AsyncRequestContext = Depends(write_context),
     ) -> RedirectResponse:
-        asset_service.update_device(
+        await ctx.asset_service.update_device(
             device_id=device_id,
             asset_no=asset_no,
             display_name=display_name,
@@ -246,19 +496,20 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
         return RedirectResponse(url="/assets/devices", status_code=303)
 
     @app.post("/assets/devices/{device_id}/delete")
-    def delete_device(device_id: int) -> RedirectResponse:
-        asset_service.delete_device(device_id)
+    async def delete_device(device_id: int, ctx: AsyncRequestContext = Depends(write_context)) -> RedirectResponse:
+        await ctx.asset_service.delete_device(device_id)
         return RedirectResponse(url="/assets/devices", status_code=303)
 
     @app.post("/assets/licenses")
-    def create_license(
+    async def create_license(
         license_no: str = Form(...),
         name: str = Form(...),
         license_key: str = Form(...),
         state: str = Form(...),
         note: str = Form(""),
+        ctx: AsyncRequestContext = Depends(write_context),
     ) -> RedirectResponse:
-        asset_service.add_license(
+        await ctx.asset_service.add_license(
             license_no=license_no,
             name=name,
             license_key=license_key,
@@ -268,8 +519,12 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
         return RedirectResponse(url="/assets/licenses", status_code=303)
 
     @app.get("/assets/licenses/{license_id}/edit", response_class=HTMLResponse)
-    def edit_license_form(request: Request, license_id: int) -> HTMLResponse:
-        license_item = license_repo.get_by_id(license_id)
+    async def edit_license_form(
+        request: Request,
+        license_id: int,
+        ctx: AsyncRequestContext = Depends(read_context),
+    ) -> HTMLResponse:
+        license_item = await ctx.license_repo.get_by_id(license_id)
         return templates.TemplateResponse(
             request,
             "license_edit.html",
@@ -277,15 +532,16 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
         )
 
     @app.post("/assets/licenses/{license_id}/edit")
-    def edit_license(
+    async def edit_license(
         license_id: int,
         license_no: str = Form(...),
         name: str = Form(...),
         license_key: str = Form(...),
         state: str = Form(...),
         note: str = Form(""),
+        ctx: AsyncRequestContext = Depends(write_context),
     ) -> RedirectResponse:
-        asset_service.update_license(
+        await ctx.asset_service.update_license(
             license_id=license_id,
             license_no=license_no,
             name=name,
@@ -296,18 +552,23 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
         return RedirectResponse(url="/assets/licenses", status_code=303)
 
     @app.post("/assets/licenses/{license_id}/delete")
-    def delete_license(license_id: int) -> RedirectResponse:
-        asset_service.delete_license(license_id)
+    async def delete_license(license_id: int, ctx: AsyncRequestContext = Depends(write_context)) -> RedirectResponse:
+        await ctx.asset_service.delete_license(license_id)
         return RedirectResponse(url="/assets/licenses", status_code=303)
 
     @app.get("/configurations", response_class=HTMLResponse)
-    def configurations(
+    async def configurations(
         request: Request,
         config_q: str | None = None,
         config_sort: str | None = None,
         config_dir: str | None = None,
-    ) -> HTMLResponse:
-        configs = config_service.list_configs()
+        canvas: str | None = None,
+        ctx: AsyncRequestContext = Depends(read_context),
+    ) -> Response:
+        etag, not_modified = await view_etag(request, ctx, CONFIG_VIEW_TABLES)
+        if not_modified is not None:
+            return not_modified
+        configs = await ctx.config_service.list_configs()
         if config_q:
             query = config_q.lower()
             configs = [
@@ -323,59 +584,32 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
         }
         if config_sort in config_sort_map:
             configs = sorted(configs, key=config_sort_map[config_sort], reverse=config_dir == "desc")
-        assigned_device_ids = set(config_service.list_assigned_device_ids())
-        assigned_license_ids = set(config_service.list_assigned_license_ids())
-
-        devices = asset_service.list_devices()
-        licenses = asset_service.list_licenses()
-
-        available_devices = [device for device in devices if device.device_id not in assigned_device_ids]
-        available_licenses = [license_item for license_item in licenses if license_item.license_id not in assigned_license_ids]
-
-        positions = position_repo.load_positions()
-        grid_cols = 4
-        cell_width = 260
-        cell_height = 220
-        origin_x = 24
-        origin_y = 24
-        occupied: set[tuple[int, int]] = set()
+        assigned_device_ids = set(await ctx.config_service.list_assigned_device_ids())
+        assigned_license_ids = set(await ctx.config_service.list_assigned_license_ids())
+
+        available_devices = (await ctx.asset_service.list_device_rows()).where(
+            "device_id", lambda device_id: device_id not in assigned_device_ids
+        )
+        available_licenses = (await ctx.asset_service.list_license_rows()).where(
+            "license_id", lambda license_id: license_id not in assigned_license_ids
+        )
+
+        slots = await ctx.position_repo.load_slots()
+        next_slot = max((card.slot for card in slots.values()), default=-1) + 1
         config_cards: List[Dict[str, object]] = []
         for index, config in enumerate(configs):
-            config_devices = config_service.list_config_devices(config.config_id)
-            config_licenses = config_service.list_config_licenses(config.config_id)
-            pos = positions.get(config.config_id)
-            if pos:
-                x, y, hidden = pos
-                if hidden:
-                    continue
-                col = max(0, int(round((x - origin_x) / cell_width)))
-                row = max(0, int(round((y - origin_y) / cell_height)))
-            else:
-                col = index % grid_cols
-                row = index // grid_cols
-
-            while (col, row) in occupied:
-                col += 1
-                if col >= grid_cols:
-                    col = 0
-                    row += 1
-
-            occupied.add((col, row))
-            x = origin_x + col * cell_width
-            y = origin_y + row * cell_height
+            slot = slots.get(config.config_id)
+            if slot is None:
+                slot = CardSlot(config.config_id, next_slot)
+                next_slot += 1
+            if slot.hidden:
+                continue
             region = "JP" if index < 4 else "US"
-            config_cards.append(
-                {
-                    "config": config,
-                    "devices": config_devices,
-                    "licenses": config_licenses,
-                    "x": x,
-                    "y": y,
-                    "region": region,
-                }
-            )
+            config_cards.append({"config": config, "x": slot.x, "y": slot.y, "region": region})
+        canvas_windowed = canvas == "windowed" or (canvas != "full" and len(config_cards) > CANVAS_WINDOW_THRESHOLD)
+        await render_card_fragments(ctx, config_cards, ("row",) if canvas_windowed else ("row", "card"))
 
-        return templates.TemplateResponse(
+        response = templates.TemplateResponse(
             request,
             "configurations.html",
             {
@@ -386,16 +620,25 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
                 "config_q": config_q or "",
                 "config_sort": config_sort or "",
                 "config_dir": config_dir or "",
+                "canvas_windowed": canvas_windowed,
             },
         )
+        return _with_etag(response, etag)
 
     @app.get("/configurations/{config_id}", response_class=HTMLResponse)
-    def configuration_detail(request: Request, config_id: int) -> HTMLResponse:
-        config = config_repo.get_by_id(config_id)
-        config_devices = config_service.list_config_devices(config_id)
-        config_licenses = config_service.list_config_licenses(config_id)
-        audit_logs = audit_repo.list_by_config(config_id, limit=200)
-        return templates.TemplateResponse(
+    async def configuration_detail(
+        request: Request,
+        config_id: int,
+        ctx: AsyncRequestContext = Depends(read_context),
+    ) -> Response:
+        etag, not_modified = await view_etag(request, ctx, CONFIG_DETAIL_TABLES)
+        if not_modified is not None:
+            return not_modified
+        config = await ctx.config_repo.get_by_id(config_id)
+        config_devices = await ctx.config_service.list_config_devices(config_id)
+        config_licenses = await ctx.config_service.list_config_licenses(config_id)
+        audit_logs = await ctx.audit_repo.list_by_config(config_id, limit=200)
+        response = templates.TemplateResponse(
             request,
             "config_detail.html",
             {
@@ -406,14 +649,16 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
                 "audit_logs": audit_logs,
             },
         )
+        return _with_etag(response, etag)
 
     @app.post("/configurations")
-    def create_configuration(
+    async def create_configuration(
         name: str = Form(...),
         note: str = Form(""),
+        ctx: AsyncRequestContext = Depends(write_context),
     ) -> RedirectResponse:
-        config = config_service.create_config(name=name, note=note)
-        audit_repo.append(
+        config = await ctx.config_service.create_config(name=name, note=note)
+        await ctx.audit_writer.append(
             config_id=config.config_id,
             action="config.create",
             actor="system",
@@ -423,8 +668,12 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
         return RedirectResponse(url="/configurations", status_code=303)
 
     @app.get("/configurations/{config_id}/edit", response_class=HTMLResponse)
-    def edit_config_form(request: Request, config_id: int) -> HTMLResponse:
-        config = config_repo.get_by_id(config_id)
+    async def edit_config_form(
+        request: Request,
+        config_id: int,
+        ctx: AsyncRequestContext = Depends(read_context),
+    ) -> HTMLResponse:
+        config = await ctx.config_repo.get_by_id(config_id)
         return templates.TemplateResponse(
             request,
             "config_edit.html",
@@ -432,11 +681,16 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
         )
 
     @app.post("/configurations/{config_id}/edit")
-    def edit_config(config_id: int, name: str = Form(...), note: str = Form("")) -> RedirectResponse:
-        before = config_repo.get_by_id(config_id)
-        config_service.update_config(config_id, name, note)
-        after = config_repo.get_by_id(config_id)
-        audit_repo.append(
+    async def edit_config(
+        config_id: int,
+        name: str = Form(...),
+        note: str = Form(""),
+        ctx: AsyncRequestContext = Depends(write_context),
+    ) -> RedirectResponse:
+        before = await ctx.config_repo.get_by_id(config_id)
+        await ctx.config_service.update_config(config_id, name, note)
+        after = await ctx.config_repo.get_by_id(config_id)
+        await ctx.audit_writer.append(
             config_id=config_id,
             action="config.update",
             actor="system",
@@ -449,11 +703,11 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
         return RedirectResponse(url="/configurations", status_code=303)
 
     @app.post("/configurations/{config_id}/delete")
-    def delete_config(config_id: int) -> RedirectResponse:
-        before = config_repo.get_by_id(config_id)
-        config_devices = config_service.list_config_devices(config_id)
-        config_licenses = config_service.list_config_licenses(config_id)
-        audit_repo.append(
+    async def delete_config(config_id: int, ctx: AsyncRequestContext = Depends(write_context)) -> RedirectResponse:
+        before = await ctx.config_repo.get_by_id(config_id)
+        config_devices = await ctx.config_service.list_config_devices(config_id)
+        config_licenses = await ctx.config_service.list_config_licenses(config_id)
+        await ctx.audit_writer.append(
             config_id=config_id,
             action="config.delete",
             actor="system",
@@ -465,16 +719,23 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
             },
             created_at=datetime.now(timezone.utc).isoformat(),
         )
-        config_service.delete_config(config_id)
+        await ctx.config_service.delete_config(config_id)
         return RedirectResponse(url="/configurations", status_code=303)
 
     @app.post("/api/configs/{config_id}/assign", response_class=JSONResponse)
-    def assign_asset(config_id: int, payload: AssignPayload) -> JSONResponse:
+    async def assign_asset(
+        config_id: int,
+        payload: AssignPayload,
+        ctx: AsyncRequestContext = Depends(write_context),
+    ) -> JSONResponse:
         if payload.asset_type == "device":
-            device = device_repo.get_by_id(payload.asset_id)
+            device = await ctx.device_repo.get_by_id(payload.asset_id)
             if payload.source_config_id and payload.source_config_id != config_id:
-                config_service.move_device(payload.source_config_id, config_id, payload.asset_id)
-                audit_repo.append(
+                try:
+                    await ctx.config_service.move_device(payload.source_config_id, config_id, payload.asset_id)
+                except ValueError as exc:
+                    raise HTTPException(status_code=409, detail=str(exc))
+                await ctx.audit_writer.append(
                     config_id=config_id,
                     action="config.device.move",
                     actor="system",
@@ -487,11 +748,11 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
                     created_at=datetime.now(timezone.utc).isoformat(),
                 )
             else:
-                owner = config_service.get_device_owner(payload.asset_id)
+                owner = await ctx.config_service.get_device_owner(payload.asset_id)
                 if owner is not None and owner != config_id:
                     raise HTTPException(status_code=409, detail="Device already assigned")
-                config_service.assign_device(config_id, payload.asset_id)
-                audit_repo.append(
+                await ctx.config_service.assign_device(config_id, payload.asset_id)
+                await ctx.audit_writer.append(
                     config_id=config_id,
                     action="config.device.assign",
                     actor="system",
@@ -501,11 +762,13 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
             return JSONResponse({"status": "ok"})
 
         if payload.asset_type == "license":
-            license_item = license_repo.get_by_id(payload.asset_id)
+            license_item = await ctx.license_repo.get_by_id(payload.asset_id)
             if payload.source_config_id and payload.source_config_id != config_id:
-                config_service.unassign_license(payload.source_config_id, payload.asset_id)
-                config_service.assign_license(config_id, payload.asset_id)
-                audit_repo.append(
+                try:
+                    await ctx.config_service.move_license(payload.source_config_id, config_id, payload.asset_id)
+                except ValueError as exc:
+                    raise HTTPException(status_code=409, detail=str(exc))
+                await ctx.audit_writer.append(
                     config_id=config_id,
                     action="config.license.move",
                     actor="system",
@@ -518,11 +781,11 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
                     created_at=datetime.now(timezone.utc).isoformat(),
                 )
             else:
-                owner = config_service.get_license_owner(payload.asset_id)
+                owner = await ctx.config_service.get_license_owner(payload.asset_id)
                 if owner is not None and owner != config_id:
                     raise HTTPException(status_code=409, detail="License already assigned")
-                config_service.assign_license(config_id, payload.asset_id)
-                audit_repo.append(
+                await ctx.config_service.assign_license(config_id, payload.asset_id)
+                await ctx.audit_writer.append(
                     config_id=config_id,
                     action="config.license.assign",
                     actor="system",
@@ -533,10 +796,40 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
 
         raise HTTPException(status_code=400, detail="Unknown asset type")
 
+    @app.post("/api/assignments/batch", response_class=JSONResponse)
+    async def batch_assign(
+        payload: BatchAssignPayload,
+        ctx: AsyncRequestContext = Depends(write_context),
+    ) -> JSONResponse:
+        operations = [AssignmentOperation(**item.model_dump()) for item in payload.operations]
+        try:
+            changes = await ctx.config_service.apply_assignments(operations)
+        except AssignmentConflictError as exc:
+            raise HTTPException(
+                status_code=409,
+                detail={"message": str(exc), "conflicts": [asdict(conflict) for conflict in exc.conflicts]},
+            )
+        created_at = datetime.now(timezone.utc).isoformat()
+        await ctx.audit_writer.append_many([_assignment_audit_entry(change, created_at) for change in changes])
+        affected = {change.config_id for change in changes}
+        affected.update(change.source_config_id for change in changes if change.source_config_id is not None)
+        return JSONResponse(
+            {
+                "status": "ok",
+                "applied": len(changes),
+                "changes": [asdict(change) for change in changes],
+                "configs": [asdict(summary) for summary in await ctx.config_service.summarize_configs(affected)],
+            }
+        )
+
     @app.post("/api/configs/{config_id}/position", response_class=JSONResponse)
-    def save_position(config_id: int, payload: PositionPayload) -> JSONResponse:
-        position_repo.save_position(config_id, payload.x, payload.y)
-        audit_repo.append(
+    async def save_position(
+        config_id: int,
+        payload: PositionPayload,
+        ctx: AsyncRequestContext = Depends(write_context),
+    ) -> JSONResponse:
+        await ctx.position_repo.save_position(config_id, payload.x, payload.y)
+        await ctx.audit_writer.append(
             config_id=config_id,
             action="config.position",
             actor="system",
@@ -545,21 +838,215 @@ def create_app(db_path: Optional[str] = None) -> FastAPI:
         )
         return JSONResponse({"status": "ok"})
 
+    @app.post("/api/configs/positions", response_class=JSONResponse)
+    async def save_positions(
+        payload: PositionBatchPayload,
+        ctx: AsyncRequestContext = Depends(write_context),
+    ) -> JSONResponse:
+        final = {item.config_id: item for item in payload.positions}
+        saved = await ctx.position_repo.save_positions([(item.config_id, item.x, item.y) for item in final.values()])
+        created_at = datetime.now(timezone.utc).isoformat()
+        await ctx.audit_writer.append_many(
+            AuditEntry(
+                config_id=config_id,
+                action="config.position",
+                actor="system",
+                details={"x": final[config_id].x, "y": final[config_id].y},
+                created_at=created_at,
+            )
+            for config_id in saved
+        )
+        return JSONResponse({"status": "ok", "saved": saved})
+
+    @app.post("/api/import/{kind}", response_class=JSONResponse)
+    async def import_assets(
+        kind: str,
+        file: UploadFile = File(...),
+        import_format: Optional[str] = Query(None, alias="format"),
+    ) -> JSONResponse:
+        if kind not in IMPORT_SPECS:
+            raise HTTPException(status_code=404, detail="Unknown import kind")
+        fmt = import_format or detect_format(file.filename)
+        if fmt not in IMPORT_FORMATS:
+            raise HTTPException(status_code=400, detail="Unknown import format")
+        stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+        try:
+            async with db.bulk_writer() as (conn, runner):
+                report = await runner.run(import_records, conn, kind, stream, fmt)
+        finally:
+            stream.detach()
+            identity.invalidate_kind("device" if kind == "devices" else "license")
+        return JSONResponse(asdict(report))
+
+    @app.post("/api/audit/verify", response_class=JSONResponse)
+    async def verify_audit(
+        full: bool = Query(False),
+        workers: int = Query(1, ge=1, le=VERIFY_MAX_WORKERS),
+    ) -> JSONResponse:
+        if not verify_lock.acquire(blocking=False):
+            raise HTTPException(status_code=409, detail="Audit verification already running")
+        try:
+            checkpoints: Dict[int, AuditCheckpoint] = {}
+            if not full:
+                async with db.reader() as (conn, runner):
+                    checkpoints = await runner.run(load_checkpoints, conn)
+            report = await verify_runner.run(verify_audit_chain, pool.db_path, checkpoints, workers=workers)
+            async with db.writer() as (conn, runner):
+                await runner.run(save_checkpoints, conn, report.checkpoints, report.breaks)
+        finally:
+            verify_lock.release()
+        return JSONResponse(
+            {
+                "configs": report.configs,
+                "entries": report.entries,
+                "elapsed": report.elapsed,
+                "entries_per_second": report.entries_per_second,
+                "breaks": [asdict(item) for item in report.breaks],
+            }
+        )
+
+    @app.get("/api/export/{kind}")
+    async def export_assets(
+        kind: str,
+        export_format: str = Query("csv", alias="format"),
+        config_id: Optional[int] = None,
+    ) -> StreamingResponse:
+        if kind not in EXPORT_KINDS:
+            raise HTTPException(status_code=404, detail="Unknown export kind")
+        if export_format not in EXPORT_FORMATS:
+            raise HTTPException(status_code=400, detail="Unknown export format")
+
+        async def stream() -> AsyncIterator[str]:
+            async with db.export_reader() as (conn, runner):
+                chunks = export_chunks(conn, kind, export_format, config_id=config_id)
+                try:
+                    while True:
+                        chunk = await runner.run(next, chunks, None)
+                        if chunk is None:
+                            break
+                        yield chunk
+                finally:
+                    with anyio.CancelScope(shield=True):
+                        await runner.run(chunks.close)
+
+        extension = "csv" if export_format == "csv" else "ndjson"
+        return StreamingResponse(
+            stream(),
+            media_type=EXPORT_MEDIA_TYPES[export_format],
+            headers={"Content-Disposition": f'attachment; filename="{kind}.{extension}"'},
+        )
+
     @app.get("/api/summary", response_class=JSONResponse)
-    def summary() -> JSONResponse:
-        devices = asset_service.list_devices()
-        licenses = asset_service.list_licenses()
-        configs = config_service.list_configs()
+    async def summary(request: Request, ctx: AsyncRequestContext = Depends(read_context)) -> Response:
+        etag, not_modified = await view_etag(request, ctx, SUMMARY_TABLES)
+        if not_modified is not None:
+            return not_modified
+        summary = await ctx.summary_repo.load()
+        response = JSONResponse(
+            {
+                "devices": summary.devices,
+                "licenses": summary.licenses,
+                "configs": summary.configs,
+                "devices_by_state": summary.devices_by_state,
+                "devices_by_type": summary.devices_by_type,
+                "licenses_by_state": summary.licenses_by_state,
+                "assignments": {
+                    "devices": {
+                        "assigned": summary.devices_assigned,
+                        "available": summary.devices - summary.devices_assigned,
+                    },
+                    "licenses": {
+                        "assigned": summary.licenses_assigned,
+                        "available": summary.licenses - summary.licenses_assigned,
+                    },
+                },
+            }
+        )
+        return _with_etag(response, etag)
+
+    @app.get("/api/events")
+    async def change_events(request: Request) -> StreamingResponse:
+        subscription = change_bus.subscribe()
+
+        async def stream() -> AsyncIterator[str]:
+            try:
+                yield "retry: 3000\n\n"
+                while not await request.is_disconnected():
+                    event = await subscription.get(timeout=EVENT_KEEPALIVE_SECONDS)
+                    yield event.encode() if event is not None else ": keepalive\n\n"
+            finally:
+                change_bus.unsubscribe(subscription)
+
+        return StreamingResponse(
+            stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @app.get("/api/canvas/cards", response_class=JSONResponse)
+    async def canvas_cards(
+        x: float = Query(0, ge=0),
+        y: float = Query(0, ge=0),
+        width: float = Query(..., gt=0, le=CANVAS_MAX_VIEWPORT),
+        height: float = Query(..., gt=0, le=CANVAS_MAX_VIEWPORT),
+        ctx: AsyncRequestContext = Depends(read_context),
+    ) -> JSONResponse:
+        slots = await ctx.position_repo.load_window(x, y, width, height)
+        configs = await ctx.config_service.get_configs(slot.config_id for slot in slots)
+        devices_by_config, licenses_by_config = await ctx.config_service.list_config_members(configs)
+        return JSONResponse(
+            {
+                "grid": {
+                    "cols": GRID_COLS,
+                    "rows": await ctx.position_repo.grid_rows(),
+                    "cell_width": CELL_WIDTH,
+                    "cell_height": CELL_HEIGHT,
+                    "origin_x": ORIGIN_X,
+                    "origin_y": ORIGIN_Y,
+                },
+                "cards": [
+                    {
+                        "config": asdict(configs[slot.config_id]),
+                        "slot": slot.slot,
+                        "x": slot.x,
+                        "y": slot.y,
+                        "devices": [asdict(item) for item in devices_by_config.get(slot.config_id, [])],
+                        "licenses": [asdict(item) for item in licenses_by_config.get(slot.config_id, [])],
+                    }
+                    for slot in slots
+                    if slot.config_id in configs
+                ],
+            }
+        )
+
+    @app.get("/api/search", response_class=JSONResponse)
+    async def search(
+        q: str = "",
+        limit: int = Query(20, ge=1, le=200),
+        ctx: AsyncRequestContext = Depends(read_context),
+    ) -> JSONResponse:
+        return JSONResponse(
+            {
+                "devices": [asdict(item) for item in await ctx.asset_service.search_devices(q, limit)],
+                "licenses": [asdict(item) for item in await ctx.asset_service.search_licenses(q, limit)],
+                "configs": [asdict(item) for item in await ctx.config_service.search_configs(q, limit)],
+            }
+        )
+
+    @app.get("/api/cache/stats", response_class=JSONResponse)
+    async def cache_stats() -> JSONResponse:
+        stats = identity.stats()
+        fragment_stats = fragments.stats()
         return JSONResponse(
             {
-                "devices": len(devices),
-                "licenses": len(licenses),
-                "configs": len(configs),
+                **asdict(stats),
+                "hit_ratio": round(stats.hit_ratio, 4),
+                "fragments": {**asdict(fragment_stats), "hit_ratio": round(fragment_stats.hit_ratio, 4)},
             }
         )
 
     @app.get("/health", response_class=JSONResponse)
-    def health() -> JSONResponse:
+    async def health() -> JSONResponse:
         return JSONResponse({"status": "ok"})
 
     return app
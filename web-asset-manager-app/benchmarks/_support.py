@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import os
+import statistics
+import sys
+from typing import List, Sequence
+
+
+def ensure_src_path() -> None:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for path in (root, os.path.join(root, "src")):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def format_latency(label: str, samples_ms: List[float]) -> str:
+    return (
+        f"{label:<28} n={len(samples_ms):>6}  "
+        f"p50={statistics.median(samples_ms):8.3f}ms  "
+        f"p95={percentile(samples_ms, 0.95):8.3f}ms  "
+        f"max={max(samples_ms):8.3f}ms"
+    )
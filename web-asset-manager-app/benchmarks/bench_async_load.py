@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional, Tuple
+
+import _support
+
+_support.ensure_src_path()
+
+import httpx  # noqa: E402
+
+from wam.executor import DB_EXECUTORS  # noqa: E402
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = DB_EXECUTORS + ("sync",)
+
+READ_PATHS = (
+    "/api/summary",
+    "/api/search?q=DEV",
+    "/assets/devices/3/edit",
+    "/api/canvas/cards?width=2000&height=2000",
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def _serve(app_dir: str, db_path: str, port: int, executor: Optional[str], pool_size: int) -> subprocess.Popen:
+    env = dict(os.environ, WAM_DB_PATH=db_path, WAM_SEED_SAMPLE="1", WAM_DB_POOL_SIZE=str(pool_size))
+    if executor is not None:
+        env["WAM_DB_EXECUTOR"] = executor
+    command = [sys.executable, "-m", "uvicorn", "app:app", "--app-dir", app_dir, "--host", "127.0.0.1"]
+    command += ["--port", str(port), "--log-level", "warning", "--timeout-keep-alive", "300", "--backlog", "8192"]
+    return subprocess.Popen(command, env=env)
+
+
+def _wait_ready(base_url: str) -> None:
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+async def _hold_idle(port: int, count: int) -> List[asyncio.StreamWriter]:
+    writers: List[asyncio.StreamWriter] = []
+    for _ in range(count):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /health HTTP/1.1\r\nHost: bench\r\n\r\n")
+        await writer.drain()
+        await reader.readuntil(b"}")
+        writers.append(writer)
+    return writers
+
+
+async def _client(
+    client: httpx.AsyncClient,
+    index: int,
+    deadline: float,
+    write_every: int,
+    samples: List[float],
+) -> int:
+    errors = 0
+    step = index
+    while time.perf_counter() < deadline:
+        step += 1
+        started = time.perf_counter()
+        if write_every and step % write_every == 0:
+            payload = {"positions": [{"config_id": index % 8 + 1, "x": 40, "y": 24 + step % 50}]}
+            response = await client.post("/api/configs/positions", json=payload)
+        else:
+            response = await client.get(READ_PATHS[step % len(READ_PATHS)])
+        samples.append((time.perf_counter() - started) * 1000)
+        errors += response.status_code != 200
+    return errors
+
+
+async def _run(
+    base_url: str,
+    port: int,
+    clients: int,
+    idle: int,
+    duration: float,
+    write_every: int,
+) -> Tuple[List[float], int, float]:
+    idle_writers = await _hold_idle(port, idle)
+    samples: List[float] = []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        started = time.perf_counter()
+        errors = await asyncio.gather(
+            *(_client(client, index, started + duration, write_every, samples) for index in range(clients))
+        )
+        elapsed = time.perf_counter() - started
+    for writer in idle_writers:
+        writer.close()
+    return samples, sum(errors), elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Keep-alive load test of the async routes and the sync handlers")
+    parser.add_argument("--executor", choices=MODES, nargs="+", default=list(DB_EXECUTORS))
+    parser.add_argument(
+        "--sync-app-dir",
+        help="checkout of the app from before the async routes (needed for --executor sync)",
+    )
+    parser.add_argument("--clients", type=int, nargs="+", default=[100, 1000, 3000])
+    parser.add_argument("--idle", type=int, default=0, help="extra idle keep-alive connections held open")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--write-every", type=int, default=20, help="every Nth request saves a position (0: no writes)")
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+    if "sync" in args.executor and not args.sync_app_dir:
+        parser.error("--executor sync needs --sync-app-dir")
+    for executor in args.executor:
+        with tempfile.TemporaryDirectory() as tmp:
+            port = _free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            db_path = os.path.join(tmp, "bench.sqlite3")
+            if executor == "sync":
+                server = _serve(os.path.abspath(args.sync_app_dir), db_path, port, None, args.pool_size)
+            else:
+                server = _serve(APP_DIR, db_path, port, executor, args.pool_size)
+            try:
+                _wait_ready(base_url)
+                for clients in args.clients:
+                    samples, errors, elapsed = asyncio.run(
+                        _run(base_url, port, clients, args.idle, args.duration, args.write_every)
+                    )
+                    print(_support.format_latency(f"[{executor}] clients={clients}", samples))
+                    print(
+                        f"{'':<28} rps={len(samples) / elapsed:8.0f}  "
+                        f"p99={_support.percentile(samples, 0.99):8.3f}ms  errors={errors}"
+                    )
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
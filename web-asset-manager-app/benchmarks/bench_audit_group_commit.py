@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Callable
+
+import _support
+
+_support.ensure_src_path()
+
+from wam.db import PRAGMA_PROFILES, init_db  # noqa: E402
+from wam.repositories import (  # noqa: E402
+    AuditRepository,
+    AuditTailCache,
+    AuditWriter,
+    ConfigRepository,
+    unit_of_work,
+)
+
+DEVICE_ID = 9
+
+
+def _toggle(configs: ConfigRepository, index: int) -> str:
+    if index % 2 == 0:
+        configs.assign_device(1, DEVICE_ID)
+        return "config.device.assign"
+    configs.unassign_device(1, DEVICE_ID)
+    return "config.device.unassign"
+
+
+def _separate_commits(db_path: str, profile: str) -> Callable[[int], None]:
+    conn = init_db(db_path, profile, seed=True)
+    configs = ConfigRepository(conn)
+    audit = AuditRepository(conn)
+
+    def mutate(index: int) -> None:
+        with unit_of_work(conn):
+            action = _toggle(configs, index)
+        with unit_of_work(conn):
+            audit.append(config_id=1, action=action, actor="bench", details={"device_id": DEVICE_ID}, created_at="")
+
+    return mutate
+
+
+def _group_commit(db_path: str, profile: str) -> Callable[[int], None]:
+    conn = init_db(db_path, profile, seed=True)
+    configs = ConfigRepository(conn)
+    cache = AuditTailCache()
+    writer = AuditWriter(AuditRepository(conn), cache)
+
+    def mutate(index: int) -> None:
+        with unit_of_work(conn):
+            action = _toggle(configs, index)
+            writer.append(config_id=1, action=action, actor="bench", details={"device_id": DEVICE_ID}, created_at="")
+            tails = writer.flush()
+        cache.store(tails)
+
+    return mutate
+
+
+def run(profile: str, seconds: float) -> None:
+    for label, factory in (("separate audit commit", _separate_commits), ("group commit", _group_commit)):
+        with tempfile.TemporaryDirectory() as tmp:
+            mutate = factory(os.path.join(tmp, "bench.sqlite3"), profile)
+            count = 0
+            started = time.perf_counter()
+            while time.perf_counter() - started < seconds:
+                mutate(count)
+                count += 1
+            elapsed = time.perf_counter() - started
+            print(f"[{profile}] {label:<24} mutations={count:>7}  {count / elapsed:10.0f} mutations/sec")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sustained mutation throughput with and without grouped audit writes")
+    parser.add_argument("--profile", choices=sorted(PRAGMA_PROFILES), nargs="+", default=sorted(PRAGMA_PROFILES))
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+    for profile in args.profile:
+        run(profile, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
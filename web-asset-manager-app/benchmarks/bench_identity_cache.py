@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from typing import List, Optional
+
+import _support
+
+_support.ensure_src_path()
+
+from app import RequestContext  # noqa: E402
+from wam.cache import IdentityCache  # noqa: E402
+from wam.db import PRAGMA_PROFILES, init_db  # noqa: E402
+from wam.pool import ConnectionPool  # noqa: E402
+from wam.repositories import AuditTailCache  # noqa: E402
+
+DEVICE_ID = 9
+LOOKUP_IDS = range(1, 21)
+
+
+def _assign_request(pool: ConnectionPool, tails: AuditTailCache, cache: Optional[IdentityCache], index: int) -> None:
+    session = cache.session() if cache is not None else None
+    with pool.writer() as conn:
+        ctx = RequestContext(conn, tails, session)
+        if cache is not None:
+            cache.sync(ctx.audit_repo.data_version())
+        device = ctx.device_repo.get_by_id(DEVICE_ID)
+        config = ctx.config_repo.get_by_id(1)
+        if index % 2 == 0:
+            owner = ctx.config_service.get_device_owner(DEVICE_ID)
+            if owner is not None and owner != config.config_id:
+                raise RuntimeError("benchmark device is owned elsewhere")
+            ctx.config_service.assign_device(config.config_id, DEVICE_ID)
+            action = "config.device.assign"
+        else:
+            ctx.config_service.unassign_device(config.config_id, DEVICE_ID)
+            action = "config.device.unassign"
+        ctx.audit_writer.append(
+            config_id=config.config_id,
+            action=action,
+            actor="bench",
+            details={"device_id": device.device_id, "asset_no": device.asset_no},
+            created_at="",
+        )
+        result = ctx.audit_writer.flush()
+    if session is not None and cache is not None:
+        cache.committed(session)
+    tails.store(result)
+
+
+def _lookup_request(pool: ConnectionPool, cache: Optional[IdentityCache]) -> None:
+    if cache is not None:
+        cache.sync(pool.data_version(blocking=False))
+    with pool.reader() as conn:
+        ctx = RequestContext(conn, cache=cache.session() if cache is not None else None)
+        for item_id in LOOKUP_IDS:
+            ctx.device_repo.get_by_id(item_id)
+            ctx.license_repo.get_by_id(item_id)
+
+
+def run(profile: str, requests: int) -> None:
+    for label, capacity in (("cache off", None), ("cache on", 4096)):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "bench.sqlite3")
+            init_db(db_path, profile, seed=True).close()
+            pool = ConnectionPool(db_path, readers=1, profile=profile)
+            tails = AuditTailCache()
+            cache = IdentityCache(capacity) if capacity is not None else None
+            samples: List[float] = []
+            lookups: List[float] = []
+            for index in range(requests):
+                started = time.perf_counter()
+                _assign_request(pool, tails, cache, index)
+                samples.append((time.perf_counter() - started) * 1000)
+                started = time.perf_counter()
+                _lookup_request(pool, cache)
+                lookups.append((time.perf_counter() - started) * 1000)
+            pool.close()
+            print(_support.format_latency(f"[{profile}] assign {label}", samples))
+            print(_support.format_latency(f"[{profile}] 40 lookups {label}", lookups))
+            if cache is not None:
+                stats = cache.stats()
+                print(f"{'':<28} hits={stats.hits} misses={stats.misses} hit_ratio={stats.hit_ratio:.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Assign and lookup request latency with and without the identity cache")
+    parser.add_argument("--profile", choices=sorted(PRAGMA_PROFILES), nargs="+", default=sorted(PRAGMA_PROFILES))
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    for profile in args.profile:
+        run(profile, args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import tempfile
+import time
+import tracemalloc
+
+import _support
+
+_support.ensure_src_path()
+
+from wam.db import init_db  # noqa: E402
+from wam.importer import import_records  # noqa: E402
+
+
+def _write_devices_csv(path: str, rows: int) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as stream:
+        writer = csv.writer(stream)
+        writer.writerow(["asset_no", "display_name", "device_type", "model", "version", "state", "note"])
+        for index in range(rows):
+            writer.writerow([f"BENCH-{index:07d}", f"計測端末{index}", "PC", f"Model-{index % 97}", "2026", "active", ""])
+
+
+def run(rows: int, chunk_size: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "devices.csv")
+        _write_devices_csv(csv_path, rows)
+        conn = init_db(os.path.join(tmp, "bench.sqlite3"))
+        tracemalloc.start()
+        started = time.perf_counter()
+        with open(csv_path, encoding="utf-8", newline="") as stream:
+            report = import_records(conn, "devices", stream, "csv", chunk_size=chunk_size)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        conn.close()
+        print(
+            f"rows={rows:>8}  chunk={chunk_size:>5}  imported={report.imported:>8}  "
+            f"{report.imported / elapsed:10.0f} rows/sec  peak={peak / 1024 / 1024:6.2f} MiB"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk device import throughput and peak memory")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+    for rows in args.rows:
+        run(rows, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Dict, Set, Tuple
+
+import _support
+
+_support.ensure_src_path()
+
+from wam.db import init_db  # noqa: E402
+from wam.layout import CELL_HEIGHT, CELL_WIDTH, GRID_COLS, ORIGIN_X, ORIGIN_Y, CanvasLayout  # noqa: E402
+from wam.repositories import unit_of_work  # noqa: E402
+
+
+def _legacy_layout(config_ids: range, positions: Dict[int, Tuple[float, float]]) -> int:
+    occupied: Set[Tuple[int, int]] = set()
+    for index, config_id in enumerate(config_ids):
+        pos = positions.get(config_id)
+        if pos:
+            col = max(0, int(round((pos[0] - ORIGIN_X) / CELL_WIDTH)))
+            row = max(0, int(round((pos[1] - ORIGIN_Y) / CELL_HEIGHT)))
+        else:
+            col = index % GRID_COLS
+            row = index // GRID_COLS
+        while (col, row) in occupied:
+            col += 1
+            if col >= GRID_COLS:
+                col = 0
+                row += 1
+        occupied.add((col, row))
+    return len(occupied)
+
+
+def run(cards: int, moves: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = init_db(os.path.join(tmp, "bench.sqlite3"))
+        started = time.perf_counter()
+        with unit_of_work(conn):
+            conn.executemany(
+                "INSERT INTO configurations (config_no, name, note) VALUES (?, ?, '')",
+                [(f"CNFG-{index:06d}", f"構成{index}") for index in range(cards)],
+            )
+            CanvasLayout(conn).fill_missing()
+        placed = time.perf_counter() - started
+
+        stacked = {config_id: (ORIGIN_X, ORIGIN_Y) for config_id in range(1, cards + 1)}
+        started = time.perf_counter()
+        _legacy_layout(range(1, cards + 1), stacked)
+        legacy = time.perf_counter() - started
+
+        started = time.perf_counter()
+        CanvasLayout(conn).load()
+        indexed = time.perf_counter() - started
+
+        rng = random.Random(7)
+        layout = CanvasLayout(conn)
+        started = time.perf_counter()
+        with unit_of_work(conn):
+            for _ in range(moves):
+                layout.place(rng.randint(1, cards), rng.uniform(0, 4 * CELL_WIDTH), rng.uniform(0, 50 * CELL_HEIGHT))
+        moved = time.perf_counter() - started
+        conn.close()
+        print(
+            f"cards={cards:>6}  initial placement={placed * 1000:8.1f}ms  "
+            f"legacy page layout (stacked)={legacy * 1000:9.1f}ms  indexed page read={indexed * 1000:7.1f}ms  "
+            f"moves={moves} in {moved * 1000:7.1f}ms ({moved / moves * 1e6:6.1f}us/move)"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Canvas layout cost: legacy collision loop vs persisted slot index")
+    parser.add_argument("--cards", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--moves", type=int, default=1000)
+    args = parser.parse_args()
+    for cards in args.cards:
+        run(cards, args.moves)
+
+
+if __name__ == "__main__":
+    main()
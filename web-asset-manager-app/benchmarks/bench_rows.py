@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import sqlite3
+import time
+import tracemalloc
+from dataclasses import dataclass, fields
+from typing import Callable, Optional
+
+import _support
+
+_support.ensure_src_path()
+
+from wam.models import Device, RowSet  # noqa: E402
+
+SELECT_DEVICES = """
+    SELECT device_id, asset_no, display_name, device_type, model, version, state, note
+    FROM devices
+    ORDER BY device_id DESC
+"""
+
+
+@dataclass(frozen=True)
+class DictDevice:
+    device_id: int
+    asset_no: str
+    display_name: Optional[str]
+    device_type: str
+    model: str
+    version: str
+    state: str
+    note: str
+
+
+SHARED_COLUMNS = ("device_type", "model", "version", "state")
+ALL_COLUMNS = tuple(item.name for item in fields(Device))
+
+
+def _build_db(rows: int, unique: bool) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        """
+        CREATE TABLE devices (
+            device_id INTEGER PRIMARY KEY,
+            asset_no TEXT NOT NULL,
+            display_name TEXT,
+            device_type TEXT NOT NULL,
+            model TEXT NOT NULL,
+            version TEXT NOT NULL,
+            state TEXT NOT NULL,
+            note TEXT NOT NULL
+        )
+        """
+    )
+    conn.executemany(
+        "INSERT INTO devices VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            (
+                index,
+                f"DEV-{index:06d}",
+                f"Device {index}" if unique else None,
+                "PC",
+                f"Model-{index % 50}",
+                "2026",
+                "active",
+                f"serial {index:08d}" if unique else "",
+            )
+            for index in range(1, rows + 1)
+        ),
+    )
+    return conn
+
+
+def _measure(label: str, build: Callable[[], object]) -> None:
+    gc.collect()
+    started = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(result) if isinstance(result, (list, RowSet)) else 0
+    print(
+        f"{label:<28} rows={count:>7}  build={elapsed * 1000:9.1f}ms  "
+        f"retained={retained / 1024 / 1024:7.1f}MiB  peak={peak / 1024 / 1024:7.1f}MiB"
+    )
+    del result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Memory and build time of list materialization strategies")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--unique", action="store_true", help="fill display_name and note with per-row values")
+    args = parser.parse_args()
+    conn = _build_db(args.rows, args.unique)
+    _measure("dataclass (no slots)", lambda: [DictDevice(*row) for row in conn.execute(SELECT_DEVICES).fetchall()])
+    _measure("dataclass (slots)", lambda: [Device(*row) for row in conn.execute(SELECT_DEVICES).fetchall()])
+    _measure("RowSet (no sharing)", lambda: RowSet.from_cursor(Device, conn.execute(SELECT_DEVICES)))
+    _measure(
+        "RowSet (shared columns)",
+        lambda: RowSet.from_cursor(Device, conn.execute(SELECT_DEVICES), shared=SHARED_COLUMNS),
+    )
+    _measure(
+        "RowSet (all columns shared)",
+        lambda: RowSet.from_cursor(Device, conn.execute(SELECT_DEVICES), shared=ALL_COLUMNS),
+    )
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
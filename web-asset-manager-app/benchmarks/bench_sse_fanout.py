@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import _support
+
+_support.ensure_src_path()
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+from app import create_app  # noqa: E402
+from wam.layout import CELL_HEIGHT, ORIGIN_X, ORIGIN_Y  # noqa: E402
+
+
+def _target(index: int) -> Tuple[int, int]:
+    return ORIGIN_X, ORIGIN_Y + (1000 + index) * CELL_HEIGHT
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def _start_server(db_path: str, port: int) -> uvicorn.Server:
+    config = uvicorn.Config(create_app(db_path, seed_sample=True), host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def _listen(
+    client: httpx.AsyncClient,
+    ready: asyncio.Event,
+    sent: Dict[int, float],
+    samples: List[float],
+    expected: int,
+) -> None:
+    received = 0
+    async with client.stream("GET", "/api/events") as response:
+        ready.set()
+        kind = ""
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                kind = line[len("event: "):]
+            elif line.startswith("data: ") and kind == "positions":
+                arrived = time.perf_counter()
+                for position in json.loads(line[len("data: "):])["positions"]:
+                    marker = int(position["y"])
+                    if marker in sent:
+                        samples.append((arrived - sent[marker]) * 1000)
+                received += 1
+                if received >= expected:
+                    return
+
+
+async def _run(base_url: str, clients: int, moves: int, interval: float) -> List[float]:
+    sent: Dict[int, float] = {}
+    samples: List[float] = []
+    limits = httpx.Limits(max_connections=clients + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=None, limits=limits) as client:
+        ready = [asyncio.Event() for _ in range(clients)]
+        listeners = [
+            asyncio.create_task(_listen(client, ready[index], sent, samples, moves)) for index in range(clients)
+        ]
+        await asyncio.gather(*(event.wait() for event in ready))
+        await asyncio.sleep(0.2)
+        for index in range(moves):
+            x, y = _target(index)
+            sent[y] = time.perf_counter()
+            response = await client.post("/api/configs/positions", json={"positions": [{"config_id": 1, "x": x, "y": y}]})
+            response.raise_for_status()
+            await asyncio.sleep(interval)
+        await asyncio.wait_for(asyncio.gather(*listeners), timeout=30)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Change feed fan-out latency with many concurrent SSE subscribers")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 50, 200])
+    parser.add_argument("--moves", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.02)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        port = _free_port()
+        server = _start_server(os.path.join(tmp, "bench.sqlite3"), port)
+        try:
+            for clients in args.clients:
+                samples = asyncio.run(_run(f"http://127.0.0.1:{port}", clients, args.moves, args.interval))
+                print(_support.format_latency(f"fan-out clients={clients}", samples))
+        finally:
+            server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
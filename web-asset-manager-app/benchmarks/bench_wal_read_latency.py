@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from typing import List
+
+import _support
+
+_support.ensure_src_path()
+
+from wam.db import PRAGMA_PROFILES, connect, init_db  # noqa: E402
+from wam.repositories import AuditRepository, ConfigRepository, DeviceRepository, unit_of_work  # noqa: E402
+
+
+def _writer_loop(db_path: str, profile: str, stop: threading.Event, counter: List[int]) -> None:
+    conn = connect(db_path, profile)
+    configs = ConfigRepository(conn)
+    audit = AuditRepository(conn)
+    device_id = 20
+    while not stop.is_set():
+        try:
+            with unit_of_work(conn):
+                configs.assign_device(1, device_id)
+                audit.append(
+                    config_id=1,
+                    action="bench.assign",
+                    actor="bench",
+                    details={"device_id": device_id},
+                    created_at="",
+                )
+            with unit_of_work(conn):
+                configs.unassign_device(1, device_id)
+            counter[0] += 1
+        except Exception:
+            pass
+    conn.close()
+
+
+def run(profile: str, seconds: float, readers: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.sqlite3")
+        init_db(db_path, profile).close()
+        stop = threading.Event()
+        writes = [0]
+        writer = threading.Thread(target=_writer_loop, args=(db_path, profile, stop, writes))
+
+        samples: List[float] = []
+        errors = [0]
+
+        def reader_loop() -> None:
+            conn = connect(db_path, profile)
+            devices = DeviceRepository(conn)
+            configs = ConfigRepository(conn)
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    devices.list_all()
+                    configs.list_members([config.config_id for config in configs.list_all()])
+                except Exception:
+                    errors[0] += 1
+                    continue
+                samples.append((time.perf_counter() - started) * 1000)
+            conn.close()
+
+        reader_threads = [threading.Thread(target=reader_loop) for _ in range(readers)]
+        writer.start()
+        for thread in reader_threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        writer.join()
+        for thread in reader_threads:
+            thread.join()
+
+        print(_support.format_latency(f"{profile} read latency", samples))
+        print(f"{'':<28} writes={writes[0]}  read_errors={errors[0]}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Read latency while a writer is committing, per PRAGMA profile")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--readers", type=int, default=2)
+    args = parser.parse_args()
+    for profile in PRAGMA_PROFILES:
+        run(profile, args.seconds, args.readers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional, Set, Tuple, TypeVar, cast
+
+T = TypeVar("T")
+CacheKey = Tuple[str, int]
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    capacity: int
+    size: int
+    hits: int
+    misses: int
+    invalidations: int
+    clears: int
+    stale_stores: int
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class IdentityCache:
+    def __init__(
+        self,
+        capacity: int = 4096,
+        ttl: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if capacity < 0:
+            raise ValueError("Identity cache capacity must not be negative")
+        self._capacity = capacity
+        self._ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[CacheKey, Tuple[object, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self._data_version: Optional[int] = None
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._clears = 0
+        self._stale_stores = 0
+
+    @property
+    def epoch(self) -> int:
+        return self._epoch
+
+    def session(self) -> CacheSession:
+        return CacheSession(self)
+
+    def sync(self, data_version: Optional[int]) -> None:
+        if data_version is None:
+            return
+        with self._lock:
+            if self._data_version is not None and self._data_version != data_version:
+                self._clear_locked()
+            self._data_version = data_version
+
+    def lookup(self, key: CacheKey) -> Tuple[bool, object]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] >= self._clock():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return True, entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self._misses += 1
+            return False, None
+
+    def store(self, key: CacheKey, value: object, epoch: int) -> None:
+        if self._capacity == 0:
+            return
+        with self._lock:
+            if epoch != self._epoch:
+                self._stale_stores += 1
+                return
+            self._entries[key] = (value, self._clock() + self._ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._capacity:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, keys: Iterable[CacheKey]) -> None:
+        with self._lock:
+            self._epoch += 1
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self._invalidations += 1
+
+    def invalidate_kind(self, kind: str) -> None:
+        with self._lock:
+            self._epoch += 1
+            for key in [key for key in self._entries if key[0] == kind]:
+                del self._entries[key]
+                self._invalidations += 1
+
+    def committed(self, session: CacheSession) -> None:
+        if session.dirty:
+            self.invalidate(session.dirty)
+        for kind in session.dirty_kinds:
+            self.invalidate_kind(kind)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear_locked()
+
+    def _clear_locked(self) -> None:
+        self._epoch += 1
+        self._entries.clear()
+        self._clears += 1
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                capacity=self._capacity,
+                size=len(self._entries),
+                hits=self._hits,
+                misses=self._misses,
+                invalidations=self._invalidations,
+                clears=self._clears,
+                stale_stores=self._stale_stores,
+            )
+
+
+class CacheSession:
+    def __init__(self, cache: IdentityCache) -> None:
+        self._cache = cache
+        self.dirty: Set[CacheKey] = set()
+        self.dirty_kinds: Set[str] = set()
+
+    def get(self, kind: str, key: int, loader: Callable[[], T]) -> T:
+        cache_key = (kind, key)
+        if kind in self.dirty_kinds or cache_key in self.dirty:
+            return loader()
+        found, value = self._cache.lookup(cache_key)
+        if found:
+            return cast(T, value)
+        epoch = self._cache.epoch
+        loaded = loader()
+        self._cache.store(cache_key, loaded, epoch)
+        return loaded
+
+    def invalidate(self, kind: str, keys: Iterable[int]) -> None:
+        self.dirty.update((kind, key) for key in keys)
+
+    def invalidate_kind(self, kind: str) -> None:
+        self.dirty_kinds.add(kind)
+
+
+def cached(session: Optional[CacheSession], kind: str, key: int, loader: Callable[[], T]) -> T:
+    if session is None:
+        return loader()
+    return session.get(kind, key, loader)
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+from wam.db import connect, init_db, rebuild_search_index, seed_sample_data
+from wam.importer import IMPORT_FORMATS, IMPORT_SPECS, detect_format, import_records
+from wam.migrations import migrate, schema_version
+from wam.repositories import unit_of_work
+from wam.verifier import load_checkpoints, save_checkpoints, verify_audit_chain
+
+
+def _migrate(args: argparse.Namespace) -> int:
+    conn = connect(args.db)
+    try:
+        applied = migrate(conn)
+        version = schema_version(conn)
+    finally:
+        conn.close()
+    if applied:
+        print(f"Applied migrations {', '.join(str(item) for item in applied)}; schema version {version}")
+    else:
+        print(f"Schema is up to date (version {version})")
+    return 0
+
+
+def _seed(args: argparse.Namespace) -> int:
+    conn = init_db(args.db)
+    try:
+        seed_sample_data(conn)
+    finally:
+        conn.close()
+    print(f"Seeded sample data: {args.db}")
+    return 0
+
+
+def _import(args: argparse.Namespace) -> int:
+    fmt = args.format or detect_format(args.path)
+    conn = init_db(args.db)
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as stream:
+            report = import_records(conn, args.kind, stream, fmt, chunk_size=args.chunk_size)
+    finally:
+        conn.close()
+    print(f"{report.kind}: processed={report.processed} imported={report.imported} failed={report.failed}")
+    for error in report.errors:
+        print(f"  line {error.line}: {error.message}")
+    return 0 if report.failed == 0 else 1
+
+
+def _rebuild_search(args: argparse.Namespace) -> int:
+    conn = init_db(args.db)
+    try:
+        rebuild_search_index(conn)
+    finally:
+        conn.close()
+    print(f"Rebuilt search index: {args.db}")
+    return 0
+
+
+def _verify_audit(args: argparse.Namespace) -> int:
+    conn = init_db(args.db)
+    try:
+        checkpoints = {} if args.full else load_checkpoints(conn)
+        report = verify_audit_chain(args.db, checkpoints, workers=args.workers, batch_size=args.batch_size)
+        with unit_of_work(conn):
+            save_checkpoints(conn, report.checkpoints, report.breaks)
+    finally:
+        conn.close()
+    for item in report.breaks:
+        print(f"  config {item.config_id}: first broken link at audit_id {item.audit_id} ({item.reason})")
+    print(
+        f"configs={report.configs} entries={report.entries} breaks={len(report.breaks)} "
+        f"elapsed={report.elapsed:.2f}s rate={report.entries_per_second:.0f} entries/sec"
+    )
+    return 0 if not report.breaks else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="wam", description="Web Asset Manager maintenance commands")
+    parser.add_argument("--db", default=os.environ.get("WAM_DB_PATH"), help="SQLite database path (default: $WAM_DB_PATH)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Apply pending schema migrations")
+    migrate_parser.set_defaults(handler=_migrate)
+
+    seed = subparsers.add_parser("seed", help="Insert sample data into empty tables")
+    seed.set_defaults(handler=_seed)
+
+    import_parser = subparsers.add_parser("import", help="Bulk import devices or licenses from CSV/JSONL")
+    import_parser.add_argument("kind", choices=sorted(IMPORT_SPECS))
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=IMPORT_FORMATS, default=None)
+    import_parser.add_argument("--chunk-size", type=int, default=1000)
+    import_parser.set_defaults(handler=_import)
+
+    rebuild = subparsers.add_parser("rebuild-search", help="Repopulate the full-text search index")
+    rebuild.set_defaults(handler=_rebuild_search)
+
+    verify = subparsers.add_parser("verify-audit", help="Verify the audit log hash chain per configuration")
+    verify.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    verify.add_argument("--batch-size", type=int, default=1000)
+    verify.add_argument("--full", action="store_true", help="Ignore checkpoints and re-verify every entry")
+    verify.set_defaults(handler=_verify_audit)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.db:
+        parser.error("--db or WAM_DB_PATH is required")
+    return int(args.handler(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
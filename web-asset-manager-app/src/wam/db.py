@@ -1,137 +1,69 @@
 from __future__ import annotations
 
 import sqlite3
-from typing import Optional
+from typing import Dict, Optional
 
+from wam.layout import CanvasLayout
+from wam.migrations import SEARCH_INDEXES, migrate
 
-def init_db(db_path: str) -> sqlite3.Connection:
+PRAGMA_PROFILES: Dict[str, Dict[str, object]] = {
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -65536,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "journal_size_limit": 67108864,
+    },
+    "rollback": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+    },
+}
+DEFAULT_PRAGMA_PROFILE = "wal"
+
+
+def resolve_pragma_profile(profile: Optional[str]) -> Dict[str, object]:
+    name = profile or DEFAULT_PRAGMA_PROFILE
+    if name not in PRAGMA_PROFILES:
+        raise ValueError(f"Unknown PRAGMA profile: {name}")
+    return PRAGMA_PROFILES[name]
+
+
+def connect(db_path: str, profile: Optional[str] = None) -> sqlite3.Connection:
+    pragmas = resolve_pragma_profile(profile)
     conn = sqlite3.connect(db_path, check_same_thread=False)
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
     conn.execute("PRAGMA foreign_keys = ON")
+    conn.create_function("unicode_lower", 1, _unicode_lower, deterministic=True)
+    return conn
 
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS devices (
-            device_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            asset_no TEXT UNIQUE NOT NULL,
-            display_name TEXT,
-            device_type TEXT NOT NULL,
-            model TEXT NOT NULL,
-            version TEXT NOT NULL,
-            state TEXT NOT NULL,
-            note TEXT NOT NULL DEFAULT ''
-        )
-        """
-    )
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS licenses (
-            license_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            license_no TEXT NOT NULL,
-            name TEXT NOT NULL,
-            license_key TEXT NOT NULL,
-            state TEXT NOT NULL,
-            note TEXT NOT NULL DEFAULT ''
-        )
-        """
-    )
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS configurations (
-            config_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            config_no TEXT,
-            name TEXT NOT NULL,
-            note TEXT NOT NULL DEFAULT '',
-            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-        )
-        """
-    )
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS config_devices (
-            config_id INTEGER NOT NULL,
-            device_id INTEGER NOT NULL,
-            PRIMARY KEY (config_id, device_id),
-            FOREIGN KEY (config_id) REFERENCES configurations(config_id)
-                ON DELETE CASCADE,
-            FOREIGN KEY (device_id) REFERENCES devices(device_id)
-                ON DELETE CASCADE
-        )
-        """
-    )
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS config_licenses (
-            config_id INTEGER NOT NULL,
-            license_id INTEGER NOT NULL UNIQUE,
-            note TEXT NOT NULL DEFAULT '',
-            PRIMARY KEY (config_id, license_id),
-            FOREIGN KEY (config_id) REFERENCES configurations(config_id)
-                ON DELETE CASCADE,
-            FOREIGN KEY (license_id) REFERENCES licenses(license_id)
-                ON DELETE CASCADE
-        )
-        """
-    )
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS config_positions (
-            config_id INTEGER PRIMARY KEY,
-            x REAL NOT NULL,
-            y REAL NOT NULL,
-            hidden INTEGER NOT NULL DEFAULT 0
-        )
-        """
-    )
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS audit_logs (
-            audit_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            config_id INTEGER NOT NULL,
-            action TEXT NOT NULL,
-            actor TEXT NOT NULL,
-            details_json TEXT NOT NULL,
-            created_at TEXT NOT NULL,
-            prev_hash TEXT,
-            entry_hash TEXT NOT NULL
-        )
-        """
-    )
 
-    _ensure_config_no(conn)
-    _ensure_license_no(conn)
-    _seed_sample_data(conn)
-    conn.commit()
+def _unicode_lower(value: Optional[str]) -> Optional[str]:
+    return value.lower() if value is not None else None
+
+
+def init_db(db_path: str, profile: Optional[str] = None, seed: bool = False) -> sqlite3.Connection:
+    conn = connect(db_path, profile)
+    migrate(conn)
+    if seed:
+        seed_sample_data(conn)
     return conn
 
 
-def _ensure_config_no(conn: sqlite3.Connection) -> None:
-    columns = [row[1] for row in conn.execute("PRAGMA table_info(configurations)")]
-    if "config_no" not in columns:
-        conn.execute("ALTER TABLE configurations ADD COLUMN config_no TEXT")
-    conn.execute(
-        """
-        UPDATE configurations
-        SET config_no = printf('CNFG-%03d', config_id)
-        WHERE config_no IS NULL OR config_no = ''
-        """
-    )
-
-
-def _ensure_license_no(conn: sqlite3.Connection) -> None:
-    columns = [row[1] for row in conn.execute("PRAGMA table_info(licenses)")]
-    if "license_no" not in columns:
-        conn.execute("ALTER TABLE licenses ADD COLUMN license_no TEXT")
-    conn.execute(
-        """
-        UPDATE licenses
-        SET license_no = printf('LIC-%03d', license_id)
-        WHERE license_no IS NULL OR license_no = ''
-        """
-    )
-
-
-def _seed_sample_data(conn: sqlite3.Connection) -> None:
+def rebuild_search_index(conn: sqlite3.Connection) -> None:
+    for fts_table in SEARCH_INDEXES:
+        conn.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+    conn.commit()
+
+
+def seed_sample_data(conn: sqlite3.Connection) -> None:
     device_count = conn.execute("SELECT COUNT(*) FROM devices").fetchone()[0]
     if device_count == 0:
         conn.executemany(
@@ -238,3 +170,5 @@ def _seed_sample_data(conn: sqlite3.Connection) -> None:
                     """,
                     (config_id, license_ids[index % len(license_ids)], "sample"),
                 )
+    CanvasLayout(conn).fill_missing()
+    conn.commit()
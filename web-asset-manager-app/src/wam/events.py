@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    seq: int
+    kind: str
+    payload: Dict[str, object]
+
+    def encode(self) -> str:
+        return f"id: {self.seq}\nevent: {self.kind}\ndata: {json.dumps(self.payload, ensure_ascii=False)}\n\n"
+
+
+PendingEvent = Tuple[str, Dict[str, object]]
+
+
+class EventBuffer:
+    def __init__(self) -> None:
+        self._events: List[PendingEvent] = []
+
+    def publish(self, kind: str, payload: Dict[str, object]) -> None:
+        self._events.append((kind, payload))
+
+    def drain(self) -> List[PendingEvent]:
+        events, self._events = self._events, []
+        return events
+
+
+class Subscription:
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int) -> None:
+        self._loop = loop
+        self._queue: asyncio.Queue[ChangeEvent] = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def offer(self, events: Sequence[ChangeEvent]) -> bool:
+        try:
+            self._loop.call_soon_threadsafe(self._put, events)
+        except RuntimeError:
+            return False
+        return True
+
+    def _put(self, events: Sequence[ChangeEvent]) -> None:
+        for event in events:
+            if self._queue.full():
+                self.dropped += self._queue.qsize()
+                while not self._queue.empty():
+                    self._queue.get_nowait()
+                self._queue.put_nowait(ChangeEvent(event.seq, "resync", {"reason": "client fell behind"}))
+                return
+            self._queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[ChangeEvent]:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class ChangeBus:
+    def __init__(self, queue_size: int = 256) -> None:
+        if queue_size < 1:
+            raise ValueError("Change bus queues need a positive size")
+        self._queue_size = queue_size
+        self._subscribers: Set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(asyncio.get_running_loop(), self._queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, kind: str, payload: Dict[str, object]) -> None:
+        self.publish_many([(kind, payload)])
+
+    def publish_many(self, events: Iterable[PendingEvent]) -> None:
+        with self._lock:
+            batch = [ChangeEvent(next(self._seq), kind, payload) for kind, payload in events]
+            subscribers = list(self._subscribers)
+        if not batch:
+            return
+        for subscription in subscribers:
+            if not subscription.offer(batch):
+                self.unsubscribe(subscription)
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Generic, Protocol, Sequence, TypeVar
+
+import anyio.to_thread
+
+T = TypeVar("T")
+W = TypeVar("W")
+
+DB_EXECUTORS = ("thread", "threadpool")
+
+
+class Runner(Protocol):
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T: ...
+
+    def close(self) -> None: ...
+
+
+class DatabaseThread:
+    def __init__(self, name: str) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+class ThreadpoolRunner:
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await anyio.to_thread.run_sync(functools.partial(fn, *args, **kwargs))
+
+    def close(self) -> None:
+        return None
+
+
+def create_runner(executor: str, name: str) -> Runner:
+    if executor == "thread":
+        return DatabaseThread(name)
+    if executor == "threadpool":
+        return ThreadpoolRunner()
+    raise ValueError(f"Unknown DB executor: {executor}")
+
+
+class WorkerQueue(Generic[W]):
+    def __init__(self, workers: Sequence[W]) -> None:
+        if not workers:
+            raise ValueError("Worker queue needs at least one worker")
+        self._idle: Deque[W] = deque(workers)
+        self._waiters: Deque[Future[W]] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def waiting(self) -> int:
+        with self._lock:
+            return len(self._waiters)
+
+    async def acquire(self) -> W:
+        with self._lock:
+            if self._idle:
+                return self._idle.popleft()
+            future: Future[W] = Future()
+            self._waiters.append(future)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(future.result())
+            raise
+
+    def release(self, worker: W) -> None:
+        with self._lock:
+            while self._waiters:
+                future = self._waiters.popleft()
+                if future.set_running_or_notify_cancel():
+                    future.set_result(worker)
+                    return
+            self._idle.append(worker)
+
+
+class AsyncRepository(Generic[T]):
+    def __init__(self, target: T, runner: Runner) -> None:
+        self._target = target
+        self._runner = runner
+
+    @property
+    def target(self) -> T:
+        return self._target
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await self._runner.run(attr, *args, **kwargs)
+
+        return call
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import sqlite3
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from wam.repositories import ConfigRepository
+
+EXPORT_FORMATS = ("csv", "ndjson")
+EXPORT_KINDS = ("devices", "licenses", "configurations", "audit")
+EXPORT_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+_FLAT_EXPORTS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "devices": (
+        """
+        SELECT device_id, asset_no, display_name, device_type, model, version, state, note
+        FROM devices
+        ORDER BY device_id
+        """,
+        ("device_id", "asset_no", "display_name", "device_type", "model", "version", "state", "note"),
+    ),
+    "licenses": (
+        """
+        SELECT license_id, license_no, name, license_key, state, note
+        FROM licenses
+        ORDER BY license_id
+        """,
+        ("license_id", "license_no", "name", "license_key", "state", "note"),
+    ),
+    "audit": (
+        """
+        SELECT audit_id, config_id, action, actor, details_json, created_at, prev_hash, entry_hash
+        FROM audit_logs
+        {where}
+        ORDER BY audit_id
+        """,
+        ("audit_id", "config_id", "action", "actor", "details_json", "created_at", "prev_hash", "entry_hash"),
+    ),
+}
+_CONFIG_COLUMNS = ("config_id", "config_no", "name", "note", "created_at", "updated_at", "devices", "licenses")
+
+
+def _iter_cursor(cur: sqlite3.Cursor, batch_size: int) -> Iterator[tuple]:
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def _csv_line(values: Sequence[object]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(["" if value is None else value for value in values])
+    return buffer.getvalue()
+
+
+def _iter_config_records(conn: sqlite3.Connection, batch_size: int) -> Iterator[Dict[str, object]]:
+    repo = ConfigRepository(conn)
+    cur = conn.execute(
+        """
+        SELECT config_id, config_no, name, note, created_at, updated_at
+        FROM configurations
+        ORDER BY config_id
+        """
+    )
+    while True:
+        rows = cur.fetchmany(batch_size)
+        if not rows:
+            return
+        devices, licenses = repo.list_members(row[0] for row in rows)
+        for row in rows:
+            yield {
+                "config_id": row[0],
+                "config_no": row[1],
+                "name": row[2],
+                "note": row[3],
+                "created_at": row[4],
+                "updated_at": row[5],
+                "devices": [
+                    {"device_id": item.device_id, "asset_no": item.asset_no}
+                    for item in devices.get(row[0], [])
+                ],
+                "licenses": [
+                    {"license_id": item.license_id, "license_no": item.license_no}
+                    for item in licenses.get(row[0], [])
+                ],
+            }
+
+
+def _flat_rows(
+    conn: sqlite3.Connection,
+    kind: str,
+    config_id: Optional[int],
+    batch_size: int,
+) -> Tuple[Tuple[str, ...], Iterator[tuple]]:
+    sql, columns = _FLAT_EXPORTS[kind]
+    params: List[object] = []
+    where = ""
+    if kind == "audit" and config_id is not None:
+        where = "WHERE config_id = ?"
+        params.append(config_id)
+    cur = conn.execute(sql.format(where=where), params)
+    return columns, _iter_cursor(cur, batch_size)
+
+
+def _config_csv_row(record: Dict[str, object]) -> tuple:
+    return (
+        record["config_id"],
+        record["config_no"],
+        record["name"],
+        record["note"],
+        record["created_at"],
+        record["updated_at"],
+        ";".join(item["asset_no"] for item in record["devices"]),
+        ";".join(item["license_no"] for item in record["licenses"]),
+    )
+
+
+def _iter_lines(
+    conn: sqlite3.Connection,
+    kind: str,
+    fmt: str,
+    config_id: Optional[int],
+    batch_size: int,
+) -> Iterator[str]:
+    if kind == "configurations":
+        records = _iter_config_records(conn, batch_size)
+        if fmt == "ndjson":
+            for record in records:
+                yield json.dumps(record, ensure_ascii=False) + "\n"
+            return
+        yield _csv_line(_CONFIG_COLUMNS)
+        for record in records:
+            yield _csv_line(_config_csv_row(record))
+        return
+
+    columns, rows = _flat_rows(conn, kind, config_id, batch_size)
+    if fmt == "ndjson":
+        for row in rows:
+            yield json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n"
+        return
+    yield _csv_line(columns)
+    for row in rows:
+        yield _csv_line(row)
+
+
+def export_chunks(
+    conn: sqlite3.Connection,
+    kind: str,
+    fmt: str = "csv",
+    config_id: Optional[int] = None,
+    batch_size: int = 500,
+) -> Iterator[str]:
+    if kind not in EXPORT_KINDS:
+        raise ValueError(f"Unknown export kind: {kind}")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    conn.execute("BEGIN")
+    try:
+        buffer: List[str] = []
+        for line in _iter_lines(conn, kind, fmt, config_id, batch_size):
+            buffer.append(line)
+            if len(buffer) >= batch_size:
+                yield "".join(buffer)
+                buffer.clear()
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        conn.rollback()
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, Optional
+
+
+@dataclass(frozen=True)
+class FragmentStats:
+    capacity: int
+    size: int
+    hits: int
+    misses: int
+    evictions: int
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class FragmentCache:
+    def __init__(self, capacity: int = 2048) -> None:
+        if capacity < 0:
+            raise ValueError("Fragment cache capacity must not be negative")
+        self._capacity = capacity
+        self._fragments: OrderedDict[Hashable, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def lookup(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            fragment = self._fragments.get(key)
+            if fragment is None:
+                self._misses += 1
+                return None
+            self._fragments.move_to_end(key)
+            self._hits += 1
+            return fragment
+
+    def store(self, key: Hashable, fragment: str) -> None:
+        if self._capacity == 0:
+            return
+        with self._lock:
+            self._fragments[key] = fragment
+            self._fragments.move_to_end(key)
+            while len(self._fragments) > self._capacity:
+                self._fragments.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._fragments.clear()
+
+    def stats(self) -> FragmentStats:
+        with self._lock:
+            return FragmentStats(
+                capacity=self._capacity,
+                size=len(self._fragments),
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+            )
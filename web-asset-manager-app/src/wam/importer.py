@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import csv
+import json
+import sqlite3
+from dataclasses import dataclass, field, fields
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+from wam.models import Device, License
+from wam.repositories import unit_of_work
+
+IMPORT_FORMATS = ("csv", "jsonl")
+MAX_REPORTED_ERRORS = 1000
+
+
+@dataclass(frozen=True)
+class RowError:
+    line: int
+    message: str
+
+
+@dataclass
+class ImportReport:
+    kind: str
+    processed: int = 0
+    imported: int = 0
+    failed: int = 0
+    errors: List[RowError] = field(default_factory=list)
+
+    def add_error(self, line: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(RowError(line, message))
+
+
+@dataclass(frozen=True)
+class _ImportSpec:
+    model: type
+    key_field: str
+    columns: Tuple[str, ...]
+    optional: Tuple[str, ...]
+
+
+def _spec_for(model: type, id_field: str, key_field: str, optional: Tuple[str, ...]) -> _ImportSpec:
+    columns = tuple(item.name for item in fields(model) if item.name != id_field)
+    return _ImportSpec(model, key_field, columns, optional)
+
+
+IMPORT_SPECS: Dict[str, _ImportSpec] = {
+    "devices": _spec_for(Device, "device_id", "asset_no", ("display_name", "note")),
+    "licenses": _spec_for(License, "license_id", "license_no", ("note",)),
+}
+
+
+def detect_format(filename: Optional[str], default: str = "csv") -> str:
+    if filename and filename.lower().endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if filename and filename.lower().endswith(".csv"):
+        return "csv"
+    return default
+
+
+def iter_records(stream: TextIO, fmt: str) -> Iterator[Tuple[int, object]]:
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    if fmt == "jsonl":
+        for line_no, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield line_no, exc
+        return
+    raise ValueError(f"Unknown import format: {fmt}")
+
+
+def validate_record(spec: _ImportSpec, record: object) -> Tuple[object, ...]:
+    if isinstance(record, Exception):
+        raise ValueError(f"Invalid JSON: {record}")
+    if not isinstance(record, dict):
+        raise ValueError("Row must be an object")
+    values: List[object] = []
+    for column in spec.columns:
+        raw = record.get(column)
+        value = "" if raw is None else str(raw).strip()
+        if not value and column not in spec.optional:
+            raise ValueError(f"{column} is required")
+        if column == "display_name" and not value:
+            values.append(None)
+        else:
+            values.append(value)
+    return tuple(values)
+
+
+def import_records(
+    conn: sqlite3.Connection,
+    kind: str,
+    stream: TextIO,
+    fmt: str = "csv",
+    chunk_size: int = 1000,
+) -> ImportReport:
+    if kind not in IMPORT_SPECS:
+        raise ValueError(f"Unknown import kind: {kind}")
+    spec = IMPORT_SPECS[kind]
+    report = ImportReport(kind=kind)
+    records = iter_records(stream, fmt)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+        rows: List[Tuple[int, Tuple[object, ...]]] = []
+        for line, record in chunk:
+            report.processed += 1
+            try:
+                rows.append((line, validate_record(spec, record)))
+            except ValueError as exc:
+                report.add_error(line, str(exc))
+        _write_chunk(conn, kind, spec, rows, report)
+    return report
+
+
+def _write_chunk(
+    conn: sqlite3.Connection,
+    kind: str,
+    spec: _ImportSpec,
+    rows: List[Tuple[int, Tuple[object, ...]]],
+    report: ImportReport,
+) -> None:
+    if not rows:
+        return
+    writer = _upsert_devices if kind == "devices" else _upsert_licenses
+    with unit_of_work(conn):
+        conn.execute("SAVEPOINT import_chunk")
+        try:
+            writer(conn, spec, [values for _, values in rows])
+        except sqlite3.Error:
+            conn.execute("ROLLBACK TO import_chunk")
+        else:
+            conn.execute("RELEASE import_chunk")
+            report.imported += len(rows)
+            return
+        conn.execute("RELEASE import_chunk")
+        for line, values in rows:
+            try:
+                writer(conn, spec, [values])
+                report.imported += 1
+            except sqlite3.Error as exc:
+                report.add_error(line, str(exc))
+
+
+def _upsert_devices(conn: sqlite3.Connection, spec: _ImportSpec, rows: List[Tuple[object, ...]]) -> None:
+    columns = ", ".join(spec.columns)
+    placeholders = ", ".join("?" for _ in spec.columns)
+    updates = ", ".join(f"{column} = excluded.{column}" for column in spec.columns if column != spec.key_field)
+    conn.executemany(
+        f"""
+        INSERT INTO devices ({columns})
+        VALUES ({placeholders})
+        ON CONFLICT({spec.key_field}) DO UPDATE SET {updates}
+        """,
+        rows,
+    )
+
+
+def _upsert_licenses(conn: sqlite3.Connection, spec: _ImportSpec, rows: List[Tuple[object, ...]]) -> None:
+    key_index = spec.columns.index(spec.key_field)
+    latest: Dict[object, Tuple[object, ...]] = {}
+    for values in rows:
+        latest[values[key_index]] = values
+    existing = {
+        row[0]: row[1]
+        for row in conn.execute(
+            """
+            SELECT license_no, MAX(license_id)
+            FROM licenses
+            WHERE license_no IN (SELECT value FROM json_each(?))
+            GROUP BY license_no
+            """,
+            (json.dumps(list(latest)),),
+        )
+    }
+    columns = ", ".join(spec.columns)
+    placeholders = ", ".join("?" for _ in spec.columns)
+    assignments = ", ".join(f"{column} = ?" for column in spec.columns)
+    conn.executemany(
+        f"INSERT INTO licenses ({columns}) VALUES ({placeholders})",
+        [values for key, values in latest.items() if key not in existing],
+    )
+    conn.executemany(
+        f"UPDATE licenses SET {assignments} WHERE license_id = ?",
+        [values + (existing[key],) for key, values in latest.items() if key in existing],
+    )
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+GRID_COLS = 4
+CELL_WIDTH = 260
+CELL_HEIGHT = 220
+ORIGIN_X = 24
+ORIGIN_Y = 24
+
+
+@dataclass(frozen=True)
+class CardSlot:
+    config_id: int
+    slot: int
+    hidden: bool = False
+
+    @property
+    def col(self) -> int:
+        return self.slot % GRID_COLS
+
+    @property
+    def row(self) -> int:
+        return self.slot // GRID_COLS
+
+    @property
+    def x(self) -> int:
+        return ORIGIN_X + self.col * CELL_WIDTH
+
+    @property
+    def y(self) -> int:
+        return ORIGIN_Y + self.row * CELL_HEIGHT
+
+
+def slot_for(x: float, y: float) -> int:
+    col = min(GRID_COLS - 1, max(0, int(round((x - ORIGIN_X) / CELL_WIDTH))))
+    row = max(0, int(round((y - ORIGIN_Y) / CELL_HEIGHT)))
+    return row * GRID_COLS + col
+
+
+def slot_coordinates(slot: int) -> Tuple[int, int]:
+    card = CardSlot(0, slot)
+    return card.x, card.y
+
+
+class CanvasLayout:
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+
+    def load(self) -> Dict[int, CardSlot]:
+        cur = self._conn.execute("SELECT config_id, slot, hidden FROM config_positions WHERE slot IS NOT NULL")
+        return {int(row[0]): CardSlot(int(row[0]), int(row[1]), bool(row[2])) for row in cur.fetchall()}
+
+    def window(self, x: float, y: float, width: float, height: float) -> List[CardSlot]:
+        first_col = max(0, int((x - ORIGIN_X) // CELL_WIDTH))
+        last_col = min(GRID_COLS - 1, int((x + width - ORIGIN_X) // CELL_WIDTH))
+        first_row = max(0, int((y - ORIGIN_Y) // CELL_HEIGHT))
+        last_row = int((y + height - ORIGIN_Y) // CELL_HEIGHT)
+        if first_col > last_col or first_row > last_row:
+            return []
+        cur = self._conn.execute(
+            """
+            SELECT config_id, slot, hidden
+            FROM config_positions
+            WHERE slot BETWEEN ? AND ? AND hidden = 0
+            ORDER BY slot
+            """,
+            (first_row * GRID_COLS + first_col, last_row * GRID_COLS + last_col),
+        )
+        cards = [CardSlot(int(row[0]), int(row[1]), bool(row[2])) for row in cur.fetchall()]
+        return [card for card in cards if first_col <= card.col <= last_col]
+
+    def rows(self) -> int:
+        return (self.next_slot() + GRID_COLS - 1) // GRID_COLS
+
+    def next_slot(self) -> int:
+        return int(self._conn.execute("SELECT COALESCE(MAX(slot), -1) + 1 FROM config_positions").fetchone()[0])
+
+    def place(self, config_id: int, x: Optional[float] = None, y: Optional[float] = None) -> CardSlot:
+        self._release([config_id])
+        if x is None or y is None:
+            slot = self._first_free(0)
+            x, y = slot_coordinates(slot)
+        else:
+            target = slot_for(x, y)
+            limit = self.next_slot() + GRID_COLS
+            if target > limit:
+                target = limit
+                x, y = slot_coordinates(limit)
+            slot = self._first_free(target)
+        self._take(slot)
+        self._conn.execute(
+            """
+            INSERT INTO config_positions (config_id, x, y, slot)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(config_id) DO UPDATE SET x = excluded.x, y = excluded.y, slot = excluded.slot
+            """,
+            (config_id, x, y, slot),
+        )
+        return CardSlot(config_id, slot)
+
+    def place_many(self, positions: Sequence[Tuple[int, float, float]]) -> List[CardSlot]:
+        self._release([config_id for config_id, _, _ in positions])
+        return [self.place(config_id, x, y) for config_id, x, y in positions]
+
+    def remove(self, config_id: int) -> None:
+        self._release([config_id])
+        self._conn.execute("DELETE FROM config_positions WHERE config_id = ?", (config_id,))
+
+    def fill_missing(self) -> int:
+        missing = [
+            int(row[0])
+            for row in self._conn.execute(
+                """
+                SELECT c.config_id
+                FROM configurations c
+                LEFT JOIN config_positions p ON p.config_id = c.config_id
+                WHERE p.slot IS NULL
+                ORDER BY c.config_id
+                """
+            )
+        ]
+        for config_id in missing:
+            self.place(config_id)
+        return len(missing)
+
+    def _occupied(self, slot: int) -> bool:
+        return self._conn.execute("SELECT 1 FROM config_positions WHERE slot = ?", (slot,)).fetchone() is not None
+
+    def _first_free(self, start: int) -> int:
+        if not self._occupied(start):
+            return start
+        row = self._conn.execute("SELECT MIN(slot) FROM layout_free_slots WHERE slot > ?", (start,)).fetchone()
+        return int(row[0]) if row[0] is not None else self.next_slot()
+
+    def _take(self, slot: int) -> None:
+        end = self.next_slot()
+        if slot < end:
+            self._conn.execute("DELETE FROM layout_free_slots WHERE slot = ?", (slot,))
+        else:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO layout_free_slots (slot) VALUES (?)",
+                [(gap,) for gap in range(end, slot)],
+            )
+
+    def _release(self, config_ids: Sequence[int]) -> None:
+        released = [
+            int(row[0])
+            for row in self._conn.execute(
+                "SELECT slot FROM config_positions WHERE slot IS NOT NULL AND config_id IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(config_ids)),),
+            )
+        ]
+        if not released:
+            return
+        self._conn.execute(
+            "UPDATE config_positions SET slot = NULL WHERE config_id IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(config_ids)),),
+        )
+        self._conn.executemany("INSERT OR IGNORE INTO layout_free_slots (slot) VALUES (?)", [(slot,) for slot in released])
+        self._conn.execute("DELETE FROM layout_free_slots WHERE slot >= ?", (self.next_slot(),))
+
+
+def assign_initial_slots(conn: sqlite3.Connection) -> None:
+    positions = {
+        int(row[0]): (float(row[1]), float(row[2]))
+        for row in conn.execute("SELECT config_id, x, y FROM config_positions")
+    }
+    occupied: Set[int] = set()
+    rows: List[Tuple[int, float, float, int]] = []
+    config_ids = [int(row[0]) for row in conn.execute("SELECT config_id FROM configurations ORDER BY config_id")]
+    for index, config_id in enumerate(config_ids):
+        if config_id in positions:
+            x, y = positions[config_id]
+            slot = slot_for(x, y)
+        else:
+            slot = index
+        while slot in occupied:
+            slot += 1
+        occupied.add(slot)
+        if config_id not in positions:
+            x, y = slot_coordinates(slot)
+        rows.append((config_id, x, y, slot))
+    conn.executemany(
+        """
+        INSERT INTO config_positions (config_id, x, y, slot)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(config_id) DO UPDATE SET slot = excluded.slot
+        """,
+        rows,
+    )
+    end = max(occupied, default=-1)
+    conn.execute("DELETE FROM layout_free_slots")
+    conn.executemany(
+        "INSERT INTO layout_free_slots (slot) VALUES (?)",
+        [(slot,) for slot in range(end) if slot not in occupied],
+    )
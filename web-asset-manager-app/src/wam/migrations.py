@@ -0,0 +1,444 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable, List, Sequence
+
+from wam.layout import assign_initial_slots
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return int(conn.execute("PRAGMA user_version").fetchone()[0])
+
+
+def pending_migrations(conn: sqlite3.Connection) -> List[Migration]:
+    current = schema_version(conn)
+    return [migration for migration in MIGRATIONS if migration.version > current]
+
+
+def migrate(conn: sqlite3.Connection) -> List[int]:
+    applied: List[int] = []
+    for migration in pending_migrations(conn):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            migration.apply(conn)
+            conn.execute(f"PRAGMA user_version = {migration.version}")
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        applied.append(migration.version)
+    return applied
+
+
+def _create_baseline_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS devices (
+            device_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            asset_no TEXT UNIQUE NOT NULL,
+            display_name TEXT,
+            device_type TEXT NOT NULL,
+            model TEXT NOT NULL,
+            version TEXT NOT NULL,
+            state TEXT NOT NULL,
+            note TEXT NOT NULL DEFAULT ''
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS licenses (
+            license_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            license_no TEXT NOT NULL,
+            name TEXT NOT NULL,
+            license_key TEXT NOT NULL,
+            state TEXT NOT NULL,
+            note TEXT NOT NULL DEFAULT ''
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS configurations (
+            config_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            config_no TEXT,
+            name TEXT NOT NULL,
+            note TEXT NOT NULL DEFAULT '',
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS config_devices (
+            config_id INTEGER NOT NULL,
+            device_id INTEGER NOT NULL,
+            PRIMARY KEY (config_id, device_id),
+            FOREIGN KEY (config_id) REFERENCES configurations(config_id)
+                ON DELETE CASCADE,
+            FOREIGN KEY (device_id) REFERENCES devices(device_id)
+                ON DELETE CASCADE
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS config_licenses (
+            config_id INTEGER NOT NULL,
+            license_id INTEGER NOT NULL UNIQUE,
+            note TEXT NOT NULL DEFAULT '',
+            PRIMARY KEY (config_id, license_id),
+            FOREIGN KEY (config_id) REFERENCES configurations(config_id)
+                ON DELETE CASCADE,
+            FOREIGN KEY (license_id) REFERENCES licenses(license_id)
+                ON DELETE CASCADE
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS config_positions (
+            config_id INTEGER PRIMARY KEY,
+            x REAL NOT NULL,
+            y REAL NOT NULL,
+            hidden INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS audit_logs (
+            audit_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            config_id INTEGER NOT NULL,
+            action TEXT NOT NULL,
+            actor TEXT NOT NULL,
+            details_json TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            prev_hash TEXT,
+            entry_hash TEXT NOT NULL
+        )
+        """
+    )
+
+    _ensure_config_no(conn)
+    _ensure_license_no(conn)
+    _ensure_search_index(conn)
+
+
+def _create_lookup_indexes(conn: sqlite3.Connection) -> None:
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_config_devices_device_id ON config_devices (device_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_logs_config_id ON audit_logs (config_id, audit_id)")
+
+
+def _create_audit_checkpoints(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS audit_checkpoints (
+            config_id INTEGER PRIMARY KEY,
+            last_audit_id INTEGER NOT NULL,
+            last_hash TEXT NOT NULL,
+            verified_at TEXT NOT NULL
+        )
+        """
+    )
+
+
+def _add_layout_slots(conn: sqlite3.Connection) -> None:
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(config_positions)")]
+    if "slot" not in columns:
+        conn.execute("ALTER TABLE config_positions ADD COLUMN slot INTEGER")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_config_positions_slot ON config_positions (slot)")
+    conn.execute("CREATE TABLE IF NOT EXISTS layout_free_slots (slot INTEGER PRIMARY KEY)")
+    assign_initial_slots(conn)
+
+
+SUMMARY_COUNTER_TRIGGERS = {
+    "devices": {
+        "INSERT": (
+            "",
+            (("devices", "''", "1"), ("device_state", "new.state", "1"), ("device_type", "new.device_type", "1")),
+        ),
+        "DELETE": (
+            "",
+            (("devices", "''", "-1"), ("device_state", "old.state", "-1"), ("device_type", "old.device_type", "-1")),
+        ),
+        "UPDATE OF state, device_type": (
+            "",
+            (
+                ("device_state", "old.state", "-1"),
+                ("device_state", "new.state", "1"),
+                ("device_type", "old.device_type", "-1"),
+                ("device_type", "new.device_type", "1"),
+            ),
+        ),
+    },
+    "licenses": {
+        "INSERT": ("", (("licenses", "''", "1"), ("license_state", "new.state", "1"))),
+        "DELETE": ("", (("licenses", "''", "-1"), ("license_state", "old.state", "-1"))),
+        "UPDATE OF state": ("", (("license_state", "old.state", "-1"), ("license_state", "new.state", "1"))),
+    },
+    "configurations": {
+        "INSERT": ("", (("configs", "''", "1"),)),
+        "DELETE": ("", (("configs", "''", "-1"),)),
+    },
+    "config_devices": {
+        "INSERT": (
+            "NOT EXISTS (SELECT 1 FROM config_devices WHERE device_id = new.device_id AND config_id != new.config_id)",
+            (("devices_assigned", "''", "1"),),
+        ),
+        "DELETE": (
+            "NOT EXISTS (SELECT 1 FROM config_devices WHERE device_id = old.device_id)",
+            (("devices_assigned", "''", "-1"),),
+        ),
+    },
+    "config_licenses": {
+        "INSERT": ("", (("licenses_assigned", "''", "1"),)),
+        "DELETE": ("", (("licenses_assigned", "''", "-1"),)),
+    },
+}
+
+
+def populate_summary_counters(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM summary_counters")
+    conn.execute(
+        """
+        INSERT INTO summary_counters (metric, key, value)
+        SELECT 'devices', '', COUNT(*) FROM devices
+        UNION ALL SELECT 'licenses', '', COUNT(*) FROM licenses
+        UNION ALL SELECT 'configs', '', COUNT(*) FROM configurations
+        UNION ALL SELECT 'devices_assigned', '', COUNT(DISTINCT device_id) FROM config_devices
+        UNION ALL SELECT 'licenses_assigned', '', COUNT(*) FROM config_licenses
+        UNION ALL SELECT 'device_state', state, COUNT(*) FROM devices GROUP BY state
+        UNION ALL SELECT 'device_type', device_type, COUNT(*) FROM devices GROUP BY device_type
+        UNION ALL SELECT 'license_state', state, COUNT(*) FROM licenses GROUP BY state
+        """
+    )
+
+
+def _create_summary_counters(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS summary_counters (
+            metric TEXT NOT NULL,
+            key TEXT NOT NULL DEFAULT '',
+            value INTEGER NOT NULL,
+            PRIMARY KEY (metric, key)
+        ) WITHOUT ROWID
+        """
+    )
+    for table, events in SUMMARY_COUNTER_TRIGGERS.items():
+        for event, (condition, updates) in events.items():
+            name = f"{table}_counters_{event.split()[0].lower()}"
+            when = f"WHEN {condition}" if condition else ""
+            statements = "\n".join(
+                f"""
+                INSERT INTO summary_counters (metric, key, value) VALUES ('{metric}', {key}, {delta})
+                ON CONFLICT (metric, key) DO UPDATE SET value = value + excluded.value;
+                """
+                for metric, key, delta in updates
+            )
+            conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} {when} BEGIN {statements} END")
+    populate_summary_counters(conn)
+
+
+VERSIONED_TABLES = (
+    "devices",
+    "licenses",
+    "configurations",
+    "config_devices",
+    "config_licenses",
+    "config_positions",
+    "audit_logs",
+)
+GENERATION_KEY = "$generation"
+
+
+def _create_table_versions(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, abs(random()))",
+        (GENERATION_KEY,),
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO table_versions (table_name) VALUES (?)",
+        [(table,) for table in VERSIONED_TABLES],
+    )
+    for table in VERSIONED_TABLES:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+                    UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+                END
+                """
+            )
+
+
+CONFIG_REVISION_TRIGGERS = {
+    "config_devices": {
+        "INSERT": (("new.config_id", "WHERE true"),),
+        "DELETE": (("old.config_id", "WHERE true"),),
+        "UPDATE": (("old.config_id", "WHERE true"), ("new.config_id", "WHERE new.config_id != old.config_id")),
+    },
+    "config_licenses": {
+        "INSERT": (("new.config_id", "WHERE true"),),
+        "DELETE": (("old.config_id", "WHERE true"),),
+        "UPDATE": (("old.config_id", "WHERE true"), ("new.config_id", "WHERE new.config_id != old.config_id")),
+    },
+    "devices": {
+        "UPDATE": (("config_id", "FROM config_devices WHERE device_id = new.device_id"),),
+    },
+    "licenses": {
+        "UPDATE": (("config_id", "FROM config_licenses WHERE license_id = new.license_id"),),
+    },
+}
+
+
+def _create_config_revisions(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS config_revisions (
+            config_id INTEGER PRIMARY KEY,
+            revision INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+    for table, events in CONFIG_REVISION_TRIGGERS.items():
+        for event, targets in events.items():
+            statements = "\n".join(
+                f"""
+                INSERT INTO config_revisions (config_id, revision) SELECT {config_id}, 1 {source}
+                ON CONFLICT (config_id) DO UPDATE SET revision = revision + 1;
+                """
+                for config_id, source in targets
+            )
+            conn.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_revision_{event.lower()} AFTER {event} ON {table} "
+                f"BEGIN {statements} END"
+            )
+
+
+def _ensure_config_no(conn: sqlite3.Connection) -> None:
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(configurations)")]
+    if "config_no" not in columns:
+        conn.execute("ALTER TABLE configurations ADD COLUMN config_no TEXT")
+    conn.execute(
+        """
+        UPDATE configurations
+        SET config_no = printf('CNFG-%03d', config_id)
+        WHERE config_no IS NULL OR config_no = ''
+        """
+    )
+
+
+def _ensure_license_no(conn: sqlite3.Connection) -> None:
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(licenses)")]
+    if "license_no" not in columns:
+        conn.execute("ALTER TABLE licenses ADD COLUMN license_no TEXT")
+    conn.execute(
+        """
+        UPDATE licenses
+        SET license_no = printf('LIC-%03d', license_id)
+        WHERE license_no IS NULL OR license_no = ''
+        """
+    )
+
+
+SEARCH_INDEXES = {
+    "devices_fts": (
+        "devices",
+        "device_id",
+        ("asset_no", "display_name", "device_type", "model", "version", "state"),
+    ),
+    "licenses_fts": (
+        "licenses",
+        "license_id",
+        ("license_no", "name", "license_key", "state"),
+    ),
+    "configurations_fts": (
+        "configurations",
+        "config_id",
+        ("config_no", "name", "note"),
+    ),
+}
+
+
+def _search_update_trigger(fts_table: str, table: str, key: str, columns: Sequence[str]) -> str:
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {column_list} ON {table} BEGIN
+            INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) VALUES ('delete', old.{key}, {old_values});
+            INSERT INTO {fts_table} (rowid, {column_list}) VALUES (new.{key}, {new_values});
+        END
+        """
+
+
+def _restrict_search_update_triggers(conn: sqlite3.Connection) -> None:
+    for fts_table, (table, key, columns) in SEARCH_INDEXES.items():
+        conn.execute(f"DROP TRIGGER IF EXISTS {fts_table}_au")
+        conn.execute(_search_update_trigger(fts_table, table, key, columns))
+
+
+def _ensure_search_index(conn: sqlite3.Connection) -> None:
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for fts_table, (table, key, columns) in SEARCH_INDEXES.items():
+        column_list = ", ".join(columns)
+        new_values = ", ".join(f"new.{column}" for column in columns)
+        old_values = ", ".join(f"old.{column}" for column in columns)
+        conn.execute(
+            f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                {column_list},
+                content='{table}',
+                content_rowid='{key}',
+                tokenize='trigram'
+            )
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts_table} (rowid, {column_list}) VALUES (new.{key}, {new_values});
+            END
+            """
+        )
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) VALUES ('delete', old.{key}, {old_values});
+            END
+            """
+        )
+        conn.execute(_search_update_trigger(fts_table, table, key, columns))
+        if fts_table not in existing:
+            conn.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline schema and search index", _create_baseline_schema),
+    Migration(2, "ownership and audit lookup indexes", _create_lookup_indexes),
+    Migration(3, "audit chain verification checkpoints", _create_audit_checkpoints),
+    Migration(4, "persisted canvas layout slots", _add_layout_slots),
+    Migration(5, "trigger-maintained summary counters", _create_summary_counters),
+    Migration(6, "per-table change versions for conditional requests", _create_table_versions),
+    Migration(7, "per-configuration card revisions", _create_config_revisions),
+    Migration(8, "search index update triggers limited to indexed columns", _restrict_search_update_triggers),
+]
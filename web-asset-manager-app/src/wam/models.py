@@ -1,10 +1,13 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional
+import sqlite3
+from dataclasses import dataclass, fields
+from typing import Callable, Dict, Generic, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 
+M = TypeVar("M")
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class Device:
     device_id: int
     asset_no: str
@@ -16,7 +19,7 @@ class Device:
     note: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class License:
     license_id: int
     license_no: str
@@ -26,7 +29,7 @@ class License:
     note: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Configuration:
     config_id: int
     config_no: str
@@ -34,3 +37,57 @@ class Configuration:
     note: str
     created_at: str
     updated_at: str
+
+
+class RowSet(Generic[M]):
+    __slots__ = ("model", "columns", "_values")
+
+    def __init__(self, model: Type[M], values: Sequence[List[object]]) -> None:
+        columns = tuple(item.name for item in fields(model))
+        if len(values) != len(columns):
+            raise ValueError(f"{model.__name__} rows need {len(columns)} columns")
+        self.model = model
+        self.columns: Tuple[str, ...] = columns
+        self._values: Tuple[List[object], ...] = tuple(values)
+
+    @classmethod
+    def from_cursor(
+        cls,
+        model: Type[M],
+        cur: sqlite3.Cursor,
+        shared: Sequence[str] = (),
+        batch_size: int = 1000,
+    ) -> RowSet[M]:
+        names = [item.name for item in fields(model)]
+        unknown = set(shared) - set(names)
+        if unknown:
+            raise ValueError(f"{model.__name__} has no columns {sorted(unknown)}")
+        values: List[List[object]] = [[] for _ in names]
+        seen: List[Optional[Dict[object, object]]] = [{} if name in shared else None for name in names]
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            for column, known, batch in zip(values, seen, zip(*rows)):
+                column.extend(batch if known is None else map(known.setdefault, batch, batch))
+        return cls(model, values)
+
+    def __len__(self) -> int:
+        return len(self._values[0]) if self._values else 0
+
+    def __iter__(self) -> Iterator[M]:
+        model = self.model
+        for row in zip(*self._values):
+            yield model(*row)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[M, RowSet[M]]:
+        if isinstance(index, slice):
+            return RowSet(self.model, [column[index] for column in self._values])
+        return self.model(*(column[index] for column in self._values))
+
+    def column(self, name: str) -> List[object]:
+        return self._values[self.columns.index(name)]
+
+    def where(self, name: str, predicate: Callable[[object], bool]) -> RowSet[M]:
+        keep = [index for index, value in enumerate(self.column(name)) if predicate(value)]
+        return RowSet(self.model, [[column[index] for index in keep] for column in self._values])
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import AbstractAsyncContextManager, AbstractContextManager, asynccontextmanager, contextmanager
+from typing import AsyncIterator, Callable, Iterator, List, Optional, Tuple
+
+import anyio
+
+from wam.db import connect, resolve_pragma_profile
+from wam.executor import DB_EXECUTORS, Runner, WorkerQueue, create_runner
+from wam.repositories import unit_of_work
+
+Checkout = Tuple[sqlite3.Connection, Runner]
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        db_path: str,
+        readers: int = 4,
+        profile: Optional[str] = None,
+        checkpoint_interval: float = 30.0,
+        exporters: int = 2,
+    ) -> None:
+        if readers < 1:
+            raise ValueError("Connection pool needs at least one reader")
+        if exporters < 1:
+            raise ValueError("Connection pool needs at least one export connection")
+        self._db_path = db_path
+        self._wal = str(resolve_pragma_profile(profile)["journal_mode"]).upper() == "WAL"
+        self._checkpoint_interval = checkpoint_interval
+        self._last_checkpoint = time.monotonic()
+        self._writer = connect(db_path, profile)
+        self._writer_lock = threading.Lock()
+        self._all_readers: List[sqlite3.Connection] = [connect(db_path, profile) for _ in range(readers)]
+        self._readers: queue.Queue[sqlite3.Connection] = queue.Queue()
+        for conn in self._all_readers:
+            self._readers.put(conn)
+        self._all_exporters: List[sqlite3.Connection] = [connect(db_path, profile) for _ in range(exporters)]
+        self._exporters: queue.Queue[sqlite3.Connection] = queue.Queue()
+        for conn in self._all_exporters:
+            self._exporters.put(conn)
+
+    @property
+    def db_path(self) -> str:
+        return self._db_path
+
+    @property
+    def size(self) -> int:
+        return len(self._all_readers) + 1
+
+    @property
+    def readers(self) -> int:
+        return len(self._all_readers)
+
+    @property
+    def exporters(self) -> int:
+        return len(self._all_exporters)
+
+    def reader(self) -> AbstractContextManager[sqlite3.Connection]:
+        return self._borrow(self._readers)
+
+    def export_reader(self) -> AbstractContextManager[sqlite3.Connection]:
+        return self._borrow(self._exporters)
+
+    @contextmanager
+    def _borrow(self, connections: queue.Queue[sqlite3.Connection]) -> Iterator[sqlite3.Connection]:
+        conn = connections.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            connections.put(conn)
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        with self.bulk_writer() as conn:
+            with unit_of_work(conn):
+                yield conn
+
+    @contextmanager
+    def bulk_writer(self) -> Iterator[sqlite3.Connection]:
+        with self._writer_lock:
+            try:
+                yield self._writer
+            finally:
+                if self._writer.in_transaction:
+                    self._writer.rollback()
+            self._maybe_checkpoint()
+
+    def data_version(self, blocking: bool = True) -> Optional[int]:
+        if not self._writer_lock.acquire(blocking=blocking):
+            return None
+        try:
+            return int(self._writer.execute("PRAGMA data_version").fetchone()[0])
+        finally:
+            self._writer_lock.release()
+
+    def _maybe_checkpoint(self) -> None:
+        if not self._wal or time.monotonic() - self._last_checkpoint < self._checkpoint_interval:
+            return
+        self._writer.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        self._last_checkpoint = time.monotonic()
+
+    def close(self) -> None:
+        with self._writer_lock:
+            self._writer.close()
+        for conn in self._all_readers + self._all_exporters:
+            conn.close()
+
+
+class AsyncConnectionPool:
+    def __init__(self, pool: ConnectionPool, executor: str = "thread") -> None:
+        if executor not in DB_EXECUTORS:
+            raise ValueError(f"Unknown DB executor: {executor}")
+        self._pool = pool
+        self._executor = executor
+        readers = [create_runner(executor, f"wam-db-reader-{index}") for index in range(pool.readers)]
+        exporters = [create_runner(executor, f"wam-db-export-{index}") for index in range(pool.exporters)]
+        writer = create_runner(executor, "wam-db-writer")
+        self._runners = readers + exporters + [writer]
+        self._readers: WorkerQueue[Runner] = WorkerQueue(readers)
+        self._exporters: WorkerQueue[Runner] = WorkerQueue(exporters)
+        self._writer: WorkerQueue[Runner] = WorkerQueue([writer])
+        self._writer_runner = writer
+
+    @property
+    def pool(self) -> ConnectionPool:
+        return self._pool
+
+    @property
+    def executor(self) -> str:
+        return self._executor
+
+    @property
+    def waiting(self) -> int:
+        return self._readers.waiting + self._exporters.waiting + self._writer.waiting
+
+    async def data_version(self) -> Optional[int]:
+        return await self._writer_runner.run(self._pool.data_version, False)
+
+    def reader(self) -> AbstractAsyncContextManager[Checkout]:
+        return self._checkout(self._readers, self._pool.reader)
+
+    def export_reader(self) -> AbstractAsyncContextManager[Checkout]:
+        return self._checkout(self._exporters, self._pool.export_reader)
+
+    def writer(self) -> AbstractAsyncContextManager[Checkout]:
+        return self._checkout(self._writer, self._pool.writer)
+
+    def bulk_writer(self) -> AbstractAsyncContextManager[Checkout]:
+        return self._checkout(self._writer, self._pool.bulk_writer)
+
+    @asynccontextmanager
+    async def _checkout(
+        self,
+        workers: WorkerQueue[Runner],
+        factory: Callable[[], AbstractContextManager[sqlite3.Connection]],
+    ) -> AsyncIterator[Checkout]:
+        runner = await workers.acquire()
+        try:
+            manager = factory()
+            with anyio.CancelScope(shield=True):
+                conn = await runner.run(manager.__enter__)
+            try:
+                yield conn, runner
+            except BaseException as exc:
+                with anyio.CancelScope(shield=True):
+                    suppressed = await runner.run(manager.__exit__, type(exc), exc, exc.__traceback__)
+                if not suppressed:
+                    raise
+            else:
+                with anyio.CancelScope(shield=True):
+                    await runner.run(manager.__exit__, None, None, None)
+        finally:
+            workers.release(runner)
+
+    def close(self) -> None:
+        for runner in self._runners:
+            runner.close()
@@ -3,15 +3,193 @@ from __future__ import annotations
 import hashlib
 import json
 import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Generic, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
 
-from wam.models import Configuration, Device, License
+from wam.cache import CacheSession, cached
+from wam.events import EventBuffer
+from wam.layout import CanvasLayout, CardSlot
+from wam.migrations import GENERATION_KEY
+from wam.models import Configuration, Device, License, RowSet
+
+T = TypeVar("T")
+
+
+@contextmanager
+def unit_of_work(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+@dataclass(frozen=True)
+class ListQuery:
+    q: str = ""
+    sort: Optional[str] = None
+    direction: str = "asc"
+    limit: Optional[int] = None
+    offset: int = 0
+
+
+@dataclass(frozen=True)
+class Page(Generic[T]):
+    items: List[T]
+    total: int
+    offset: int
+    limit: Optional[int]
+
+    @property
+    def has_prev(self) -> bool:
+        return self.offset > 0
+
+    @property
+    def has_next(self) -> bool:
+        return self.limit is not None and self.offset + len(self.items) < self.total
+
+
+def _query_page(
+    conn: sqlite3.Connection,
+    *,
+    select_sql: str,
+    search_index: Tuple[str, str],
+    search_columns: Sequence[str],
+    sort_columns: Dict[str, str],
+    default_order: str,
+    query: ListQuery,
+) -> Tuple[List[tuple], int]:
+    where_sql = ""
+    params: List[object] = []
+    if query.q:
+        phrase = _fts_phrase(query.q)
+        if phrase is not None:
+            fts_table, key = search_index
+            where_sql = f"WHERE {key} IN (SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ?)"
+            params.append(phrase)
+        else:
+            needle = query.q.lower()
+            where_sql = "WHERE " + " OR ".join(f"instr(unicode_lower({column}), ?) > 0" for column in search_columns)
+            params.extend([needle] * len(search_columns))
+
+    order_sql = default_order
+    if query.sort in sort_columns:
+        direction = "DESC" if query.direction == "desc" else "ASC"
+        order_sql = f"{sort_columns[query.sort]} {direction}, {default_order}"
+    limit_sql = ""
+    limit_params: List[object] = []
+    if query.limit is not None:
+        limit_sql = " LIMIT ? OFFSET ?"
+        limit_params = [query.limit, query.offset]
+
+    if not where_sql:
+        total = conn.execute(f"SELECT COUNT(*) FROM ({select_sql})").fetchone()[0]
+        rows = conn.execute(f"{select_sql} ORDER BY {order_sql}{limit_sql}", limit_params).fetchall()
+        return rows, int(total)
+
+    counted = conn.execute(
+        f"SELECT *, COUNT(*) OVER () FROM ({select_sql} {where_sql}) ORDER BY {order_sql}{limit_sql}",
+        params + limit_params,
+    ).fetchall()
+    if counted:
+        return [row[:-1] for row in counted], int(counted[0][-1])
+    if query.offset <= 0:
+        return [], 0
+    total = conn.execute(f"SELECT COUNT(*) FROM ({select_sql} {where_sql})", params).fetchone()[0]
+    return [], int(total)
+
+
+@dataclass(frozen=True)
+class AssignmentOperation:
+    op: str
+    asset_type: str
+    asset_id: int
+    config_id: int
+    source_config_id: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class AssignmentChange:
+    op: str
+    asset_type: str
+    asset_id: int
+    label: str
+    config_id: int
+    source_config_id: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class AssignmentConflict:
+    index: int
+    reason: str
+
+
+@dataclass(frozen=True)
+class ConfigSummary:
+    config_id: int
+    device_count: int
+    license_count: int
+    updated_at: str
+
+
+@dataclass(frozen=True)
+class InventorySummary:
+    devices: int
+    licenses: int
+    configs: int
+    devices_assigned: int
+    licenses_assigned: int
+    devices_by_state: Dict[str, int]
+    devices_by_type: Dict[str, int]
+    licenses_by_state: Dict[str, int]
+
+
+class AssignmentConflictError(ValueError):
+    def __init__(self, conflicts: List[AssignmentConflict]) -> None:
+        super().__init__("Assignment conflicts")
+        self.conflicts = conflicts
+
+
+_MEMBERSHIP_TABLES = {
+    "device": ("config_devices", "device_id", "devices", "asset_no"),
+    "license": ("config_licenses", "license_id", "licenses", "license_no"),
+}
+
+
+def _fts_phrase(text: str) -> Optional[str]:
+    if len(text) < 3:
+        return None
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _fts_match_expression(text: str) -> Optional[str]:
+    terms = text.split()
+    if not terms or any(len(term) < 3 for term in terms):
+        return None
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
 
 
 class DeviceRepository:
-    def __init__(self, conn: sqlite3.Connection) -> None:
+    SORT_COLUMNS = {
+        "asset_no": "asset_no",
+        "display_name": "COALESCE(display_name, '')",
+        "device_type": "device_type",
+        "model": "model",
+        "version": "version",
+        "state": "state",
+    }
+
+    def __init__(self, conn: sqlite3.Connection, cache: Optional[CacheSession] = None) -> None:
         self._conn = conn
+        self._cache = cache
 
     def create(
         self,
@@ -30,8 +208,7 @@ class DeviceRepository:
             """,
             (asset_no, display_name, device_type, model, version, state, note),
         )
-        self._conn.commit()
-        return self.get_by_id(int(cur.lastrowid))
+        return Device(int(cur.lastrowid), asset_no, display_name, device_type, model, version, state, note)
 
     def list_all(self) -> List[Device]:
         cur = self._conn.execute(
@@ -43,7 +220,52 @@ class DeviceRepository:
         )
         return [Device(*row) for row in cur.fetchall()]
 
+    def list_rows(self) -> RowSet[Device]:
+        cur = self._conn.execute(
+            """
+            SELECT device_id, asset_no, display_name, device_type, model, version, state, note
+            FROM devices
+            ORDER BY device_id DESC
+            """
+        )
+        return RowSet.from_cursor(Device, cur, shared=("device_type", "model", "version", "state"))
+
+    def query(self, query: ListQuery) -> Page[Device]:
+        rows, total = _query_page(
+            self._conn,
+            select_sql="""
+                SELECT device_id, asset_no, display_name, device_type, model, version, state, note
+                FROM devices
+            """,
+            search_index=("devices_fts", "device_id"),
+            search_columns=("asset_no", "COALESCE(display_name, '')", "device_type", "model", "version", "state"),
+            sort_columns=self.SORT_COLUMNS,
+            default_order="device_id DESC",
+            query=query,
+        )
+        return Page([Device(*row) for row in rows], total, query.offset, query.limit)
+
+    def search(self, text: str, limit: int = 50) -> List[Device]:
+        match = _fts_match_expression(text)
+        if match is None:
+            return self.query(ListQuery(q=text.strip(), limit=limit)).items if text.strip() else []
+        cur = self._conn.execute(
+            """
+            SELECT d.device_id, d.asset_no, d.display_name, d.device_type, d.model, d.version, d.state, d.note
+            FROM devices_fts
+            INNER JOIN devices d ON d.device_id = devices_fts.rowid
+            WHERE devices_fts MATCH ?
+            ORDER BY devices_fts.rank
+            LIMIT ?
+            """,
+            (match, limit),
+        )
+        return [Device(*row) for row in cur.fetchall()]
+
     def get_by_id(self, device_id: int) -> Device:
+        return cached(self._cache, "device", device_id, lambda: self._load(device_id))
+
+    def _load(self, device_id: int) -> Device:
         cur = self._conn.execute(
             """
             SELECT device_id, asset_no, display_name, device_type, model, version, state, note
@@ -68,25 +290,40 @@ class DeviceRepository:
         state: str,
         note: str,
     ) -> Device:
-        self._conn.execute(
+        rows = self._conn.execute(
             """
             UPDATE devices
             SET asset_no = ?, display_name = ?, device_type = ?, model = ?, version = ?, state = ?, note = ?
             WHERE device_id = ?
+            RETURNING device_id, asset_no, display_name, device_type, model, version, state, note
             """,
             (asset_no, display_name, device_type, model, version, state, note, device_id),
-        )
-        self._conn.commit()
-        return self.get_by_id(device_id)
+        ).fetchall()
+        self._invalidate(device_id)
+        if not rows:
+            raise ValueError("Device not found")
+        return Device(*rows[0])
 
     def delete(self, device_id: int) -> None:
         self._conn.execute("DELETE FROM devices WHERE device_id = ?", (device_id,))
-        self._conn.commit()
+        self._invalidate(device_id)
+
+    def _invalidate(self, device_id: int) -> None:
+        if self._cache is not None:
+            self._cache.invalidate("device", [device_id])
 
 
 class LicenseRepository:
-    def __init__(self, conn: sqlite3.Connection) -> None:
+    SORT_COLUMNS = {
+        "license_no": "license_no",
+        "name": "name",
+        "license_key": "license_key",
+        "state": "state",
+    }
+
+    def __init__(self, conn: sqlite3.Connection, cache: Optional[CacheSession] = None) -> None:
         self._conn = conn
+        self._cache = cache
 
     def create(self, license_no: str, name: str, license_key: str, state: str, note: str) -> License:
         cur = self._conn.execute(
@@ -96,8 +333,7 @@ class LicenseRepository:
             """,
             (license_no, name, license_key, state, note),
         )
-        self._conn.commit()
-        return self.get_by_id(int(cur.lastrowid))
+        return License(int(cur.lastrowid), license_no, name, license_key, state, note)
 
     def list_all(self) -> List[License]:
         cur = self._conn.execute(
@@ -109,7 +345,52 @@ class LicenseRepository:
         )
         return [License(*row) for row in cur.fetchall()]
 
+    def list_rows(self) -> RowSet[License]:
+        cur = self._conn.execute(
+            """
+            SELECT license_id, license_no, name, license_key, state, note
+            FROM licenses
+            ORDER BY license_id DESC
+            """
+        )
+        return RowSet.from_cursor(License, cur, shared=("state",))
+
+    def query(self, query: ListQuery) -> Page[License]:
+        rows, total = _query_page(
+            self._conn,
+            select_sql="""
+                SELECT license_id, license_no, name, license_key, state, note
+                FROM licenses
+            """,
+            search_index=("licenses_fts", "license_id"),
+            search_columns=("license_no", "name", "license_key", "state"),
+            sort_columns=self.SORT_COLUMNS,
+            default_order="license_id DESC",
+            query=query,
+        )
+        return Page([License(*row) for row in rows], total, query.offset, query.limit)
+
+    def search(self, text: str, limit: int = 50) -> List[License]:
+        match = _fts_match_expression(text)
+        if match is None:
+            return self.query(ListQuery(q=text.strip(), limit=limit)).items if text.strip() else []
+        cur = self._conn.execute(
+            """
+            SELECT l.license_id, l.license_no, l.name, l.license_key, l.state, l.note
+            FROM licenses_fts
+            INNER JOIN licenses l ON l.license_id = licenses_fts.rowid
+            WHERE licenses_fts MATCH ?
+            ORDER BY licenses_fts.rank
+            LIMIT ?
+            """,
+            (match, limit),
+        )
+        return [License(*row) for row in cur.fetchall()]
+
     def get_by_id(self, license_id: int) -> License:
+        return cached(self._cache, "license", license_id, lambda: self._load(license_id))
+
+    def _load(self, license_id: int) -> License:
         cur = self._conn.execute(
             """
             SELECT license_id, license_no, name, license_key, state, note
@@ -132,39 +413,48 @@ class LicenseRepository:
         state: str,
         note: str,
     ) -> License:
-        self._conn.execute(
+        rows = self._conn.execute(
             """
             UPDATE licenses
             SET license_no = ?, name = ?, license_key = ?, state = ?, note = ?
             WHERE license_id = ?
+            RETURNING license_id, license_no, name, license_key, state, note
             """,
             (license_no, name, license_key, state, note, license_id),
-        )
-        self._conn.commit()
-        return self.get_by_id(license_id)
+        ).fetchall()
+        self._invalidate(license_id)
+        if not rows:
+            raise ValueError("License not found")
+        return License(*rows[0])
 
     def delete(self, license_id: int) -> None:
         self._conn.execute("DELETE FROM licenses WHERE license_id = ?", (license_id,))
-        self._conn.commit()
+        self._invalidate(license_id)
+
+    def _invalidate(self, license_id: int) -> None:
+        if self._cache is not None:
+            self._cache.invalidate("license", [license_id])
 
 
 class ConfigRepository:
-    def __init__(self, conn: sqlite3.Connection) -> None:
+    def __init__(self, conn: sqlite3.Connection, cache: Optional[CacheSession] = None) -> None:
         self._conn = conn
+        self._cache = cache
 
     def create(self, name: str, note: str, config_no: Optional[str] = None) -> Configuration:
         if config_no is None:
             next_id = self._conn.execute("SELECT COALESCE(MAX(config_id), 0) + 1 FROM configurations").fetchone()[0]
             config_no = f"CNFG-{int(next_id):03d}"
-        cur = self._conn.execute(
+        row = self._conn.execute(
             """
             INSERT INTO configurations (config_no, name, note)
             VALUES (?, ?, ?)
+            RETURNING config_id, config_no, name, note, created_at, updated_at
             """,
             (config_no, name, note),
-        )
-        self._conn.commit()
-        return self.get_by_id(int(cur.lastrowid))
+        ).fetchall()[0]
+        CanvasLayout(self._conn).place(int(row[0]))
+        return Configuration(*row)
 
     def list_all(self) -> List[Configuration]:
         cur = self._conn.execute(
@@ -176,7 +466,52 @@ class ConfigRepository:
         )
         return [Configuration(*row) for row in cur.fetchall()]
 
+    def list_rows(self) -> RowSet[Configuration]:
+        cur = self._conn.execute(
+            """
+            SELECT config_id, config_no, name, note, created_at, updated_at
+            FROM configurations
+            ORDER BY config_id ASC
+            """
+        )
+        return RowSet.from_cursor(Configuration, cur)
+
+    def search(self, text: str, limit: int = 50) -> List[Configuration]:
+        match = _fts_match_expression(text)
+        if match is None:
+            needle = text.strip().lower()
+            if not needle:
+                return []
+            cur = self._conn.execute(
+                """
+                SELECT config_id, config_no, name, note, created_at, updated_at
+                FROM configurations
+                WHERE instr(unicode_lower(config_no), ?) > 0
+                    OR instr(unicode_lower(name), ?) > 0
+                    OR instr(unicode_lower(note), ?) > 0
+                ORDER BY config_id ASC
+                LIMIT ?
+                """,
+                (needle, needle, needle, limit),
+            )
+            return [Configuration(*row) for row in cur.fetchall()]
+        cur = self._conn.execute(
+            """
+            SELECT c.config_id, c.config_no, c.name, c.note, c.created_at, c.updated_at
+            FROM configurations_fts
+            INNER JOIN configurations c ON c.config_id = configurations_fts.rowid
+            WHERE configurations_fts MATCH ?
+            ORDER BY configurations_fts.rank
+            LIMIT ?
+            """,
+            (match, limit),
+        )
+        return [Configuration(*row) for row in cur.fetchall()]
+
     def get_by_id(self, config_id: int) -> Configuration:
+        return cached(self._cache, "config", config_id, lambda: self._load(config_id))
+
+    def _load(self, config_id: int) -> Configuration:
         cur = self._conn.execute(
             """
             SELECT config_id, config_no, name, note, created_at, updated_at
@@ -190,21 +525,36 @@ class ConfigRepository:
             raise ValueError("Configuration not found")
         return Configuration(*row)
 
+    def get_many(self, config_ids: Iterable[int]) -> Dict[int, Configuration]:
+        cur = self._conn.execute(
+            """
+            SELECT config_id, config_no, name, note, created_at, updated_at
+            FROM configurations
+            WHERE config_id IN (SELECT value FROM json_each(?))
+            """,
+            (json.dumps(list(config_ids)),),
+        )
+        return {int(row[0]): Configuration(*row) for row in cur.fetchall()}
+
     def update(self, config_id: int, name: str, note: str) -> Configuration:
-        self._conn.execute(
+        rows = self._conn.execute(
             """
             UPDATE configurations
             SET name = ?, note = ?, updated_at = CURRENT_TIMESTAMP
             WHERE config_id = ?
+            RETURNING config_id, config_no, name, note, created_at, updated_at
             """,
             (name, note, config_id),
-        )
-        self._conn.commit()
-        return self.get_by_id(config_id)
+        ).fetchall()
+        self._invalidate([config_id])
+        if not rows:
+            raise ValueError("Configuration not found")
+        return Configuration(*rows[0])
 
     def delete(self, config_id: int) -> None:
+        CanvasLayout(self._conn).remove(config_id)
         self._conn.execute("DELETE FROM configurations WHERE config_id = ?", (config_id,))
-        self._conn.commit()
+        self._invalidate([config_id])
 
     def list_devices(self, config_id: int) -> List[Device]:
         cur = self._conn.execute(
@@ -232,6 +582,36 @@ class ConfigRepository:
         )
         return [License(*row) for row in cur.fetchall()]
 
+    def list_members(self, config_ids: Iterable[int]) -> Tuple[Dict[int, List[Device]], Dict[int, List[License]]]:
+        ids_json = json.dumps([int(config_id) for config_id in config_ids])
+        devices: Dict[int, List[Device]] = {}
+        licenses: Dict[int, List[License]] = {}
+        cur = self._conn.execute(
+            """
+            SELECT cd.config_id, d.device_id, d.asset_no, d.display_name, d.device_type, d.model, d.version, d.state, d.note
+            FROM config_devices cd
+            INNER JOIN devices d ON d.device_id = cd.device_id
+            WHERE cd.config_id IN (SELECT value FROM json_each(?))
+            ORDER BY cd.config_id, d.device_id DESC
+            """,
+            (ids_json,),
+        )
+        for row in cur.fetchall():
+            devices.setdefault(int(row[0]), []).append(Device(*row[1:]))
+        cur = self._conn.execute(
+            """
+            SELECT cl.config_id, l.license_id, l.license_no, l.name, l.license_key, l.state, l.note
+            FROM config_licenses cl
+            INNER JOIN licenses l ON l.license_id = cl.license_id
+            WHERE cl.config_id IN (SELECT value FROM json_each(?))
+            ORDER BY cl.config_id, l.license_id DESC
+            """,
+            (ids_json,),
+        )
+        for row in cur.fetchall():
+            licenses.setdefault(int(row[0]), []).append(License(*row[1:]))
+        return devices, licenses
+
     def list_assigned_device_ids(self) -> List[int]:
         cur = self._conn.execute("SELECT DISTINCT device_id FROM config_devices")
         return [row[0] for row in cur.fetchall()]
@@ -276,7 +656,6 @@ class ConfigRepository:
             (config_id, device_id),
         )
         self._touch_config(config_id)
-        self._conn.commit()
 
     def move_device(self, from_config_id: int, to_config_id: int, device_id: int) -> None:
         if from_config_id == to_config_id:
@@ -293,7 +672,6 @@ class ConfigRepository:
             (config_id, device_id),
         )
         self._touch_config(config_id)
-        self._conn.commit()
 
     def assign_license(self, config_id: int, license_id: int, note: str = "") -> None:
         owner = self.get_license_owner(license_id)
@@ -317,7 +695,12 @@ class ConfigRepository:
                 (config_id, license_id, note),
             )
         self._touch_config(config_id)
-        self._conn.commit()
+
+    def move_license(self, from_config_id: int, to_config_id: int, license_id: int) -> None:
+        if from_config_id == to_config_id:
+            return
+        self.unassign_license(from_config_id, license_id)
+        self.assign_license(to_config_id, license_id)
 
     def unassign_license(self, config_id: int, license_id: int) -> None:
         self._conn.execute(
@@ -328,7 +711,130 @@ class ConfigRepository:
             (config_id, license_id),
         )
         self._touch_config(config_id)
-        self._conn.commit()
+
+    def summaries(self, config_ids: Iterable[int]) -> List[ConfigSummary]:
+        cur = self._conn.execute(
+            """
+            SELECT
+                c.config_id,
+                (SELECT COUNT(*) FROM config_devices cd WHERE cd.config_id = c.config_id),
+                (SELECT COUNT(*) FROM config_licenses cl WHERE cl.config_id = c.config_id),
+                c.updated_at
+            FROM configurations c
+            WHERE c.config_id IN (SELECT value FROM json_each(?))
+            ORDER BY c.config_id
+            """,
+            (json.dumps(list(config_ids)),),
+        )
+        return [ConfigSummary(int(row[0]), int(row[1]), int(row[2]), str(row[3])) for row in cur.fetchall()]
+
+    def apply_assignments(self, operations: Sequence[AssignmentOperation]) -> List[AssignmentChange]:
+        config_ids = {operation.config_id for operation in operations}
+        config_ids.update(operation.source_config_id for operation in operations if operation.source_config_id)
+        existing_configs = {
+            row[0]
+            for row in self._conn.execute(
+                "SELECT config_id FROM configurations WHERE config_id IN (SELECT value FROM json_each(?))",
+                (json.dumps(sorted(config_ids)),),
+            )
+        }
+
+        labels: Dict[Tuple[str, int], str] = {}
+        initial: Dict[Tuple[str, int], Optional[int]] = {}
+        for asset_type, (member_table, key, asset_table, label_column) in _MEMBERSHIP_TABLES.items():
+            asset_ids = sorted({op.asset_id for op in operations if op.asset_type == asset_type})
+            if not asset_ids:
+                continue
+            cur = self._conn.execute(
+                f"""
+                SELECT a.{key}, a.{label_column}, m.config_id
+                FROM {asset_table} a
+                LEFT JOIN {member_table} m ON m.{key} = a.{key}
+                WHERE a.{key} IN (SELECT value FROM json_each(?))
+                """,
+                (json.dumps(asset_ids),),
+            )
+            for asset_id, label, owner in cur.fetchall():
+                labels[(asset_type, asset_id)] = label
+                initial.setdefault((asset_type, asset_id), owner)
+
+        owners = dict(initial)
+        changes: List[AssignmentChange] = []
+        conflicts: List[AssignmentConflict] = []
+        for index, operation in enumerate(operations):
+            asset = (operation.asset_type, operation.asset_id)
+            if operation.asset_type not in _MEMBERSHIP_TABLES:
+                conflicts.append(AssignmentConflict(index, "Unknown asset type"))
+                continue
+            if asset not in labels:
+                conflicts.append(AssignmentConflict(index, f"{operation.asset_type.capitalize()} not found"))
+                continue
+            if operation.config_id not in existing_configs:
+                conflicts.append(AssignmentConflict(index, "Configuration not found"))
+                continue
+            owner = owners[asset]
+            if operation.op == "assign":
+                if owner == operation.config_id:
+                    continue
+                if owner is not None:
+                    conflicts.append(AssignmentConflict(index, f"Already assigned to configuration {owner}"))
+                    continue
+            elif operation.op == "move":
+                if operation.source_config_id is None or owner != operation.source_config_id:
+                    conflicts.append(
+                        AssignmentConflict(index, f"Not assigned to configuration {operation.source_config_id}")
+                    )
+                    continue
+                if operation.source_config_id == operation.config_id:
+                    continue
+            elif operation.op == "unassign":
+                if owner != operation.config_id:
+                    conflicts.append(AssignmentConflict(index, f"Not assigned to configuration {operation.config_id}"))
+                    continue
+            else:
+                conflicts.append(AssignmentConflict(index, "Unknown operation"))
+                continue
+            owners[asset] = None if operation.op == "unassign" else operation.config_id
+            changes.append(
+                AssignmentChange(
+                    op=operation.op,
+                    asset_type=operation.asset_type,
+                    asset_id=operation.asset_id,
+                    label=labels[asset],
+                    config_id=operation.config_id,
+                    source_config_id=operation.source_config_id if operation.op == "move" else None,
+                )
+            )
+        if conflicts:
+            raise AssignmentConflictError(conflicts)
+
+        touched: set[int] = set()
+        for asset_type, (member_table, key, _, _) in _MEMBERSHIP_TABLES.items():
+            moved = [
+                (asset_id, initial[(kind, asset_id)], owner)
+                for (kind, asset_id), owner in owners.items()
+                if kind == asset_type and owner != initial[(kind, asset_id)]
+            ]
+            self._conn.executemany(
+                f"DELETE FROM {member_table} WHERE config_id = ? AND {key} = ?",
+                [(before, asset_id) for asset_id, before, _ in moved if before is not None],
+            )
+            self._conn.executemany(
+                f"INSERT INTO {member_table} (config_id, {key}) VALUES (?, ?)",
+                [(after, asset_id) for asset_id, _, after in moved if after is not None],
+            )
+            for _, before, after in moved:
+                touched.update(config_id for config_id in (before, after) if config_id is not None)
+        self._conn.executemany(
+            """
+            UPDATE configurations
+            SET updated_at = CURRENT_TIMESTAMP
+            WHERE config_id = ?
+            """,
+            [(config_id,) for config_id in sorted(touched)],
+        )
+        self._invalidate(touched)
+        return changes
 
     def _touch_config(self, config_id: int) -> None:
         self._conn.execute(
@@ -339,26 +845,101 @@ class ConfigRepository:
             """,
             (config_id,),
         )
+        self._invalidate([config_id])
 
+    def _invalidate(self, config_ids: Iterable[int]) -> None:
+        if self._cache is not None:
+            self._cache.invalidate("config", config_ids)
 
-class PositionRepository:
+
+class SummaryRepository:
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+
+    def load(self) -> InventorySummary:
+        totals: Dict[str, int] = {}
+        groups: Dict[str, Dict[str, int]] = {"device_state": {}, "device_type": {}, "license_state": {}}
+        for metric, key, value in self._conn.execute(
+            "SELECT metric, key, value FROM summary_counters WHERE value != 0 ORDER BY metric, key"
+        ):
+            if metric in groups:
+                groups[metric][key] = int(value)
+            else:
+                totals[metric] = int(value)
+        return InventorySummary(
+            devices=totals.get("devices", 0),
+            licenses=totals.get("licenses", 0),
+            configs=totals.get("configs", 0),
+            devices_assigned=totals.get("devices_assigned", 0),
+            licenses_assigned=totals.get("licenses_assigned", 0),
+            devices_by_state=groups["device_state"],
+            devices_by_type=groups["device_type"],
+            licenses_by_state=groups["license_state"],
+        )
+
+
+class TableVersionRepository:
     def __init__(self, conn: sqlite3.Connection) -> None:
         self._conn = conn
 
+    def load(self, tables: Sequence[str]) -> Tuple[int, ...]:
+        keys = [GENERATION_KEY, *tables]
+        versions = dict(
+            self._conn.execute(
+                "SELECT table_name, version FROM table_versions WHERE table_name IN (SELECT value FROM json_each(?))",
+                (json.dumps(keys),),
+            )
+        )
+        return tuple(int(versions.get(key, 0)) for key in keys)
+
+    def load_config_revisions(self, config_ids: Iterable[int]) -> Dict[int, int]:
+        cur = self._conn.execute(
+            "SELECT config_id, revision FROM config_revisions WHERE config_id IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(config_ids)),),
+        )
+        return {int(row[0]): int(row[1]) for row in cur.fetchall()}
+
+
+class PositionRepository:
+    def __init__(self, conn: sqlite3.Connection, events: Optional[EventBuffer] = None) -> None:
+        self._conn = conn
+        self._events = events
+
     def load_positions(self) -> Dict[int, Tuple[float, float, bool]]:
         cur = self._conn.execute("SELECT config_id, x, y, hidden FROM config_positions")
         return {int(row[0]): (float(row[1]), float(row[2]), bool(row[3])) for row in cur.fetchall()}
 
+    def load_slots(self) -> Dict[int, CardSlot]:
+        return CanvasLayout(self._conn).load()
+
+    def load_window(self, x: float, y: float, width: float, height: float) -> List[CardSlot]:
+        return CanvasLayout(self._conn).window(x, y, width, height)
+
+    def grid_rows(self) -> int:
+        return CanvasLayout(self._conn).rows()
+
     def save_position(self, config_id: int, x: float, y: float) -> None:
-        self._conn.execute(
-            """
-            INSERT INTO config_positions (config_id, x, y, hidden)
-            VALUES (?, ?, ?, COALESCE((SELECT hidden FROM config_positions WHERE config_id = ?), 0))
-            ON CONFLICT(config_id) DO UPDATE SET x = excluded.x, y = excluded.y
-            """,
-            (config_id, x, y, config_id),
-        )
-        self._conn.commit()
+        self.save_positions([(config_id, x, y)])
+
+    def save_positions(self, positions: Sequence[Tuple[int, float, float]]) -> List[int]:
+        latest: Dict[int, Tuple[float, float]] = {}
+        for config_id, x, y in positions:
+            latest[config_id] = (x, y)
+        if not latest:
+            return []
+        existing = {
+            int(row[0])
+            for row in self._conn.execute(
+                "SELECT config_id FROM configurations WHERE config_id IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(latest)),),
+            )
+        }
+        saved = [config_id for config_id in latest if config_id in existing]
+        slots = CanvasLayout(self._conn).place_many([(config_id, *latest[config_id]) for config_id in saved])
+        if self._events is not None and slots:
+            payload = [{"config_id": card.config_id, "slot": card.slot, "x": card.x, "y": card.y} for card in slots]
+            self._events.publish("positions", {"positions": payload})
+        return saved
 
 
 @dataclass(frozen=True)
@@ -373,23 +954,43 @@ class AuditLog:
     entry_hash: str
 
 
+@dataclass(frozen=True)
+class AuditEntry:
+    config_id: int
+    action: str
+    actor: str
+    details: Dict[str, object]
+    created_at: str
+
+
 class AuditRepository:
     def __init__(self, conn: sqlite3.Connection) -> None:
         self._conn = conn
 
-    def _get_last_hash(self, config_id: int) -> Optional[str]:
+    def data_version(self) -> int:
+        return int(self._conn.execute("PRAGMA data_version").fetchone()[0])
+
+    def _get_last_hashes(self, config_ids: Iterable[int]) -> Dict[int, Optional[str]]:
+        ids = list(dict.fromkeys(config_ids))
+        if not ids:
+            return {}
+        last_hashes: Dict[int, Optional[str]] = {config_id: None for config_id in ids}
         cur = self._conn.execute(
             """
-            SELECT entry_hash
+            SELECT config_id, entry_hash
             FROM audit_logs
-            WHERE config_id = ?
-            ORDER BY audit_id DESC
-            LIMIT 1
+            WHERE audit_id IN (
+                SELECT MAX(audit_id)
+                FROM audit_logs
+                WHERE config_id IN (SELECT value FROM json_each(?))
+                GROUP BY config_id
+            )
             """,
-            (config_id,),
+            (json.dumps(ids),),
         )
-        row = cur.fetchone()
-        return str(row[0]) if row else None
+        for config_id, entry_hash in cur.fetchall():
+            last_hashes[int(config_id)] = str(entry_hash)
+        return last_hashes
 
     @staticmethod
     def _compute_hash(
@@ -421,17 +1022,37 @@ class AuditRepository:
         details: Dict[str, object],
         created_at: str,
     ) -> None:
-        details_json = json.dumps(details, ensure_ascii=False, sort_keys=True)
-        prev_hash = self._get_last_hash(config_id)
-        entry_hash = self._compute_hash(created_at, config_id, action, actor, details_json, prev_hash)
-        self._conn.execute(
+        self.append_many([AuditEntry(config_id, action, actor, details, created_at)])
+
+    def append_many(
+        self,
+        entries: Sequence[AuditEntry],
+        tail_hashes: Optional[Dict[int, Optional[str]]] = None,
+    ) -> Dict[int, Optional[str]]:
+        last_hashes = dict(tail_hashes or {})
+        last_hashes.update(
+            self._get_last_hashes(entry.config_id for entry in entries if entry.config_id not in last_hashes)
+        )
+        touched: Dict[int, Optional[str]] = {}
+        rows: List[Tuple[object, ...]] = []
+        for entry in entries:
+            details_json = json.dumps(entry.details, ensure_ascii=False, sort_keys=True)
+            prev_hash = last_hashes[entry.config_id]
+            entry_hash = self._compute_hash(
+                entry.created_at, entry.config_id, entry.action, entry.actor, details_json, prev_hash
+            )
+            last_hashes[entry.config_id] = touched[entry.config_id] = entry_hash
+            rows.append(
+                (entry.config_id, entry.action, entry.actor, details_json, entry.created_at, prev_hash, entry_hash)
+            )
+        self._conn.executemany(
             """
             INSERT INTO audit_logs (config_id, action, actor, details_json, created_at, prev_hash, entry_hash)
             VALUES (?, ?, ?, ?, ?, ?, ?)
             """,
-            (config_id, action, actor, details_json, created_at, prev_hash, entry_hash),
+            rows,
         )
-        self._conn.commit()
+        return touched
 
     def list_by_config(self, config_id: int, limit: int = 100) -> List[AuditLog]:
         cur = self._conn.execute(
@@ -445,3 +1066,80 @@ class AuditRepository:
             (config_id, limit),
         )
         return [AuditLog(*row) for row in cur.fetchall()]
+
+
+class AuditTailCache:
+    def __init__(self, capacity: int = 1024) -> None:
+        if capacity < 1:
+            raise ValueError("Audit tail cache needs a positive capacity")
+        self._capacity = capacity
+        self._tails: "OrderedDict[int, Optional[str]]" = OrderedDict()
+        self._data_version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def sync(self, data_version: int) -> None:
+        with self._lock:
+            if self._data_version != data_version:
+                self._tails.clear()
+                self._data_version = data_version
+
+    def lookup(self, config_ids: Iterable[int]) -> Dict[int, Optional[str]]:
+        with self._lock:
+            found: Dict[int, Optional[str]] = {}
+            for config_id in config_ids:
+                if config_id in self._tails:
+                    self._tails.move_to_end(config_id)
+                    found[config_id] = self._tails[config_id]
+            return found
+
+    def store(self, tails: Dict[int, Optional[str]]) -> None:
+        with self._lock:
+            for config_id, entry_hash in tails.items():
+                self._tails[config_id] = entry_hash
+                self._tails.move_to_end(config_id)
+            while len(self._tails) > self._capacity:
+                self._tails.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tails.clear()
+            self._data_version = None
+
+    def __len__(self) -> int:
+        return len(self._tails)
+
+
+class AuditWriter:
+    def __init__(self, repo: AuditRepository, cache: Optional[AuditTailCache] = None) -> None:
+        self._repo = repo
+        self._cache = cache
+        self._pending: List[AuditEntry] = []
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def append(
+        self,
+        *,
+        config_id: int,
+        action: str,
+        actor: str,
+        details: Dict[str, object],
+        created_at: str,
+    ) -> None:
+        self._pending.append(AuditEntry(config_id, action, actor, details, created_at))
+
+    def append_many(self, entries: Iterable[AuditEntry]) -> None:
+        self._pending.extend(entries)
+
+    def flush(self) -> Dict[int, Optional[str]]:
+        if not self._pending:
+            return {}
+        known: Dict[int, Optional[str]] = {}
+        if self._cache is not None:
+            self._cache.sync(self._repo.data_version())
+            known = self._cache.lookup({entry.config_id for entry in self._pending})
+        tails = self._repo.append_many(self._pending, known)
+        self._pending.clear()
+        return tails
@@ -1,9 +1,20 @@
 from __future__ import annotations
 
-from typing import List, Optional
-
-from wam.models import Configuration, Device, License
-from wam.repositories import ConfigRepository, DeviceRepository, LicenseRepository
+from dataclasses import asdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from wam.events import EventBuffer
+from wam.models import Configuration, Device, License, RowSet
+from wam.repositories import (
+    AssignmentChange,
+    AssignmentOperation,
+    ConfigRepository,
+    ConfigSummary,
+    DeviceRepository,
+    LicenseRepository,
+    ListQuery,
+    Page,
+)
 
 
 class AssetService:
@@ -34,6 +45,15 @@ class AssetService:
     def list_devices(self) -> List[Device]:
         return self._device_repo.list_all()
 
+    def list_device_rows(self) -> RowSet[Device]:
+        return self._device_repo.list_rows()
+
+    def query_devices(self, query: ListQuery) -> Page[Device]:
+        return self._device_repo.query(query)
+
+    def search_devices(self, text: str, limit: int = 50) -> List[Device]:
+        return self._device_repo.search(text, limit)
+
     def update_device(
         self,
         device_id: int,
@@ -71,6 +91,15 @@ class AssetService:
     def list_licenses(self) -> List[License]:
         return self._license_repo.list_all()
 
+    def list_license_rows(self) -> RowSet[License]:
+        return self._license_repo.list_rows()
+
+    def query_licenses(self, query: ListQuery) -> Page[License]:
+        return self._license_repo.query(query)
+
+    def search_licenses(self, text: str, limit: int = 50) -> List[License]:
+        return self._license_repo.search(text, limit)
+
     def update_license(
         self,
         license_id: int,
@@ -94,20 +123,53 @@ class AssetService:
 
 
 class ConfigService:
-    def __init__(self, config_repo: ConfigRepository) -> None:
+    def __init__(self, config_repo: ConfigRepository, events: Optional[EventBuffer] = None) -> None:
         self._config_repo = config_repo
+        self._events = events
+
+    def _publish(self, kind: str, payload: Dict[str, object]) -> None:
+        if self._events is not None:
+            self._events.publish(kind, payload)
+
+    def _publish_assignment(
+        self,
+        op: str,
+        asset_type: str,
+        asset_id: int,
+        config_id: int,
+        source_config_id: Optional[int] = None,
+    ) -> None:
+        change = {
+            "op": op,
+            "asset_type": asset_type,
+            "asset_id": asset_id,
+            "config_id": config_id,
+            "source_config_id": source_config_id,
+        }
+        self._publish("assignments", {"changes": [change]})
 
     def create_config(self, name: str, note: str = "", config_no: str | None = None) -> Configuration:
-        return self._config_repo.create(name=name, note=note, config_no=config_no)
+        config = self._config_repo.create(name=name, note=note, config_no=config_no)
+        self._publish("config", {"action": "create", **asdict(config)})
+        return config
 
     def list_configs(self) -> List[Configuration]:
         return self._config_repo.list_all()
 
+    def get_configs(self, config_ids: Iterable[int]) -> Dict[int, Configuration]:
+        return self._config_repo.get_many(config_ids)
+
+    def search_configs(self, text: str, limit: int = 50) -> List[Configuration]:
+        return self._config_repo.search(text, limit)
+
     def update_config(self, config_id: int, name: str, note: str) -> Configuration:
-        return self._config_repo.update(config_id, name, note)
+        config = self._config_repo.update(config_id, name, note)
+        self._publish("config", {"action": "update", **asdict(config)})
+        return config
 
     def delete_config(self, config_id: int) -> None:
         self._config_repo.delete(config_id)
+        self._publish("config", {"action": "delete", "config_id": config_id})
 
     def list_config_devices(self, config_id: int) -> List[Device]:
         return self._config_repo.list_devices(config_id)
@@ -115,6 +177,9 @@ class ConfigService:
     def list_config_licenses(self, config_id: int) -> List[License]:
         return self._config_repo.list_licenses(config_id)
 
+    def list_config_members(self, config_ids: Iterable[int]) -> Tuple[Dict[int, List[Device]], Dict[int, List[License]]]:
+        return self._config_repo.list_members(config_ids)
+
     def list_assigned_device_ids(self) -> List[int]:
         return self._config_repo.list_assigned_device_ids()
 
@@ -129,15 +194,33 @@ class ConfigService:
 
     def assign_device(self, config_id: int, device_id: int) -> None:
         self._config_repo.assign_device(config_id, device_id)
+        self._publish_assignment("assign", "device", device_id, config_id)
 
     def move_device(self, from_config_id: int, to_config_id: int, device_id: int) -> None:
         self._config_repo.move_device(from_config_id, to_config_id, device_id)
+        self._publish_assignment("move", "device", device_id, to_config_id, from_config_id)
 
     def unassign_device(self, config_id: int, device_id: int) -> None:
         self._config_repo.unassign_device(config_id, device_id)
+        self._publish_assignment("unassign", "device", device_id, config_id)
 
     def assign_license(self, config_id: int, license_id: int) -> None:
         self._config_repo.assign_license(config_id, license_id)
+        self._publish_assignment("assign", "license", license_id, config_id)
+
+    def move_license(self, from_config_id: int, to_config_id: int, license_id: int) -> None:
+        self._config_repo.move_license(from_config_id, to_config_id, license_id)
+        self._publish_assignment("move", "license", license_id, to_config_id, from_config_id)
 
     def unassign_license(self, config_id: int, license_id: int) -> None:
         self._config_repo.unassign_license(config_id, license_id)
+        self._publish_assignment("unassign", "license", license_id, config_id)
+
+    def apply_assignments(self, operations: Sequence[AssignmentOperation]) -> List[AssignmentChange]:
+        changes = self._config_repo.apply_assignments(operations)
+        if changes:
+            self._publish("assignments", {"changes": [asdict(change) for change in changes]})
+        return changes
+
+    def summarize_configs(self, config_ids: Iterable[int]) -> List[ConfigSummary]:
+        return self._config_repo.summaries(config_ids)
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from wam.db import connect
+from wam.repositories import AuditRepository
+
+
+@dataclass(frozen=True)
+class AuditCheckpoint:
+    config_id: int
+    last_audit_id: int
+    last_hash: str
+
+
+@dataclass(frozen=True)
+class ChainBreak:
+    config_id: int
+    audit_id: int
+    reason: str
+
+
+@dataclass(frozen=True)
+class _ConfigResult:
+    config_id: int
+    checked: int
+    checkpoint: Optional[AuditCheckpoint]
+    broken: Optional[ChainBreak]
+
+
+@dataclass
+class VerificationReport:
+    configs: int = 0
+    entries: int = 0
+    elapsed: float = 0.0
+    breaks: List[ChainBreak] = field(default_factory=list)
+    checkpoints: List[AuditCheckpoint] = field(default_factory=list)
+
+    @property
+    def entries_per_second(self) -> float:
+        return self.entries / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass(frozen=True)
+class _ConfigTask:
+    config_id: int
+    checkpoint: Optional[AuditCheckpoint]
+    batch_size: int
+
+
+def load_checkpoints(conn: sqlite3.Connection) -> Dict[int, AuditCheckpoint]:
+    cur = conn.execute("SELECT config_id, last_audit_id, last_hash FROM audit_checkpoints")
+    return {int(row[0]): AuditCheckpoint(int(row[0]), int(row[1]), str(row[2])) for row in cur.fetchall()}
+
+
+def save_checkpoints(
+    conn: sqlite3.Connection,
+    checkpoints: Iterable[AuditCheckpoint],
+    breaks: Iterable[ChainBreak] = (),
+) -> None:
+    broken = sorted({item.config_id for item in breaks})
+    if broken:
+        conn.execute(
+            "DELETE FROM audit_checkpoints WHERE config_id IN (SELECT value FROM json_each(?))",
+            (json.dumps(broken),),
+        )
+    verified_at = datetime.now(timezone.utc).isoformat()
+    conn.executemany(
+        """
+        INSERT INTO audit_checkpoints (config_id, last_audit_id, last_hash, verified_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(config_id) DO UPDATE SET
+            last_audit_id = excluded.last_audit_id,
+            last_hash = excluded.last_hash,
+            verified_at = excluded.verified_at
+        """,
+        [(item.config_id, item.last_audit_id, item.last_hash, verified_at) for item in checkpoints],
+    )
+
+
+_worker_conn: Optional[sqlite3.Connection] = None
+
+
+def _open_worker_connection(db_path: str) -> None:
+    global _worker_conn
+    _worker_conn = connect(db_path)
+
+
+def _verify_in_worker(task: _ConfigTask) -> _ConfigResult:
+    if _worker_conn is None:
+        raise RuntimeError("Verification worker has no connection")
+    return _verify_config(_worker_conn, task)
+
+
+def _verify_config(conn: sqlite3.Connection, task: _ConfigTask) -> _ConfigResult:
+    after = task.checkpoint.last_audit_id if task.checkpoint else 0
+    prev_hash = task.checkpoint.last_hash if task.checkpoint else None
+    last_audit_id: Optional[int] = None
+    checked = 0
+    cur = conn.execute(
+        """
+        SELECT audit_id, action, actor, details_json, created_at, prev_hash, entry_hash
+        FROM audit_logs
+        WHERE config_id = ? AND audit_id > ?
+        ORDER BY audit_id
+        """,
+        (task.config_id, after),
+    )
+    while True:
+        rows = cur.fetchmany(task.batch_size)
+        if not rows:
+            break
+        for audit_id, action, actor, details_json, created_at, stored_prev, stored_hash in rows:
+            checked += 1
+            reason = None
+            if stored_prev != prev_hash:
+                reason = "prev_hash does not match the previous entry"
+            elif stored_hash != AuditRepository._compute_hash(
+                created_at, task.config_id, action, actor, details_json, stored_prev
+            ):
+                reason = "entry_hash does not match the entry contents"
+            if reason is not None:
+                return _ConfigResult(task.config_id, checked, None, ChainBreak(task.config_id, int(audit_id), reason))
+            prev_hash = stored_hash
+            last_audit_id = int(audit_id)
+    return _ConfigResult(task.config_id, checked, _checkpoint(task.config_id, last_audit_id, prev_hash), None)
+
+
+def _checkpoint(config_id: int, last_audit_id: Optional[int], last_hash: Optional[str]) -> Optional[AuditCheckpoint]:
+    if last_audit_id is None or last_hash is None:
+        return None
+    return AuditCheckpoint(config_id, last_audit_id, last_hash)
+
+
+def _audited_config_ids(db_path: str) -> List[int]:
+    conn = connect(db_path)
+    try:
+        return [int(row[0]) for row in conn.execute("SELECT DISTINCT config_id FROM audit_logs ORDER BY config_id")]
+    finally:
+        conn.close()
+
+
+def verify_audit_chain(
+    db_path: str,
+    checkpoints: Optional[Dict[int, AuditCheckpoint]] = None,
+    workers: int = 1,
+    batch_size: int = 1000,
+    config_ids: Optional[Sequence[int]] = None,
+) -> VerificationReport:
+    if workers < 1:
+        raise ValueError("Verification needs at least one worker")
+    checkpoints = checkpoints or {}
+    started = time.perf_counter()
+    targets = list(config_ids) if config_ids is not None else _audited_config_ids(db_path)
+    tasks = [_ConfigTask(config_id, checkpoints.get(config_id), batch_size) for config_id in targets]
+    if workers == 1 or len(tasks) <= 1:
+        conn = connect(db_path)
+        try:
+            results = [_verify_config(conn, task) for task in tasks]
+        finally:
+            conn.close()
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_open_worker_connection,
+            initargs=(db_path,),
+        ) as executor:
+            results = list(executor.map(_verify_in_worker, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+    report = VerificationReport(configs=len(results))
+    for result in results:
+        report.entries += result.checked
+        if result.broken is not None:
+            report.breaks.append(result.broken)
+        if result.checkpoint is not None and result.checkpoint != checkpoints.get(result.config_id):
+            report.checkpoints.append(result.checkpoint)
+    report.elapsed = time.perf_counter() - started
+    return report
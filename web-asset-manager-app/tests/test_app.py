@@ -1,16 +1,25 @@
 from __future__ import annotations
 
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import random
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import httpx
 from fastapi.testclient import TestClient
 
 from app import create_app
+from wam.events import ChangeBus
 
 
 def _build_client_with_db(tmp_path: Path) -> tuple[TestClient, Path]:
     db_path = tmp_path / "test.sqlite3"
-    app = create_app(str(db_path))
+    app = create_app(str(db_path), seed_sample=True)
     return TestClient(app), db_path
 
 
@@ -252,6 +261,24 @@ def test_save_position(tmp_path: Path) -> None:
     assert float(row["y"]) == 240
 
 
+def test_save_position_bounds_coordinates_and_far_drops(tmp_path: Path) -> None:
+    client, db_path = _build_client_with_db(tmp_path)
+    for body in ('{"x": 100, "y": Infinity}', '{"x": NaN, "y": 0}', '{"x": -1, "y": 0}', '{"x": 0, "y": 1e9}'):
+        response = client.post(
+            "/api/configs/1/position",
+            content=body,
+            headers={"Content-Type": "application/json"},
+        )
+        assert response.status_code == 422
+
+    response = client.post("/api/configs/1/position", json={"x": 100, "y": 500000})
+    assert response.status_code == 200
+    row = _fetch_one(db_path, "SELECT slot, x, y FROM config_positions WHERE config_id = ?", (1,))
+    assert (row["slot"], row["x"], row["y"]) == (12, 24, 684)
+    free = _fetch_one(db_path, "SELECT COUNT(*) AS count FROM layout_free_slots")
+    assert free["count"] == 5
+
+
 def test_health(tmp_path: Path) -> None:
     client = _build_client(tmp_path)
     response = client.get("/health")
@@ -264,9 +291,14 @@ def test_summary(tmp_path: Path) -> None:
     response = client.get("/api/summary")
     assert response.status_code == 200
     payload = response.json()
-    assert "devices" in payload
-    assert "licenses" in payload
-    assert "configs" in payload
+    assert (payload["devices"], payload["licenses"], payload["configs"]) == (20, 20, 8)
+    assert payload["devices_by_state"] == {"active": 20}
+    assert payload["devices_by_type"]["Interface"] == 5
+    assert payload["assignments"]["devices"] == {"assigned": 8, "available": 12}
+
+    client.post("/api/configs/1/assign", json={"asset_type": "device", "asset_id": 9, "source_config_id": None})
+    payload = client.get("/api/summary").json()
+    assert payload["assignments"]["devices"] == {"assigned": 9, "available": 11}
 
 
 def test_device_search_and_sort(tmp_path: Path) -> None:
@@ -498,6 +530,334 @@ def test_assign_license(tmp_path: Path) -> None:
     assert int(row["config_id"]) == 1
 
 
+def test_batch_assignments_apply_in_one_request(tmp_path: Path) -> None:
+    client, db_path = _build_client_with_db(tmp_path)
+    response = client.post(
+        "/api/assignments/batch",
+        json={
+            "operations": [
+                {"op": "assign", "asset_type": "device", "asset_id": 9, "config_id": 1},
+                {"op": "assign", "asset_type": "device", "asset_id": 10, "config_id": 1},
+                {"op": "move", "asset_type": "device", "asset_id": 2, "config_id": 1, "source_config_id": 2},
+                {"op": "assign", "asset_type": "license", "asset_id": 9, "config_id": 3},
+                {"op": "unassign", "asset_type": "license", "asset_id": 4, "config_id": 4},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["status"], data["applied"]) == ("ok", 5)
+    assert [(item["op"], item["asset_id"], item["config_id"]) for item in data["changes"]] == [
+        ("assign", 9, 1),
+        ("assign", 10, 1),
+        ("move", 2, 1),
+        ("assign", 9, 3),
+        ("unassign", 4, 4),
+    ]
+    summaries = {item["config_id"]: (item["device_count"], item["license_count"]) for item in data["configs"]}
+    assert summaries == {1: (4, 1), 2: (0, 1), 3: (1, 2), 4: (1, 0)}
+    conn = sqlite3.connect(db_path)
+    owners = dict(conn.execute("SELECT device_id, config_id FROM config_devices WHERE device_id IN (2, 9, 10)"))
+    assert owners == {2: 1, 9: 1, 10: 1}
+    assert conn.execute("SELECT config_id FROM config_licenses WHERE license_id = 9").fetchone() == (3,)
+    assert conn.execute("SELECT COUNT(*) FROM config_licenses WHERE license_id = 4").fetchone() == (0,)
+    actions = [
+        row[0]
+        for row in conn.execute(
+            "SELECT action FROM audit_logs WHERE action LIKE 'config.%.%' ORDER BY audit_id"
+        )
+    ]
+    assert actions == [
+        "config.device.assign",
+        "config.device.assign",
+        "config.device.move",
+        "config.license.assign",
+        "config.license.unassign",
+    ]
+    previous: dict[int, str] = {}
+    for config_id, action, actor, details_json, created_at, prev_hash, entry_hash in conn.execute(
+        "SELECT config_id, action, actor, details_json, created_at, prev_hash, entry_hash FROM audit_logs ORDER BY audit_id"
+    ):
+        assert prev_hash == previous.get(config_id)
+        payload = "|".join([created_at, str(config_id), action, actor, details_json, prev_hash or ""])
+        assert entry_hash == hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        previous[config_id] = entry_hash
+    conn.close()
+
+
+def test_batch_assignments_reject_whole_batch_on_conflict(tmp_path: Path) -> None:
+    client, db_path = _build_client_with_db(tmp_path)
+    response = client.post(
+        "/api/assignments/batch",
+        json={
+            "operations": [
+                {"op": "assign", "asset_type": "device", "asset_id": 9, "config_id": 1},
+                {"op": "assign", "asset_type": "device", "asset_id": 3, "config_id": 1},
+                {"op": "move", "asset_type": "license", "asset_id": 5, "config_id": 1, "source_config_id": 2},
+            ]
+        },
+    )
+    assert response.status_code == 409
+    conflicts = response.json()["detail"]["conflicts"]
+    assert [item["index"] for item in conflicts] == [1, 2]
+    assert _fetch_one(db_path, "SELECT config_id FROM config_devices WHERE device_id = 9") is None
+    row = _fetch_one(db_path, "SELECT COUNT(*) AS count FROM audit_logs WHERE action LIKE 'config.device.%'")
+    assert row is not None
+    assert int(row["count"]) == 0
+
+
+def test_audit_tail_cache_follows_committed_requests(tmp_path: Path) -> None:
+    db_path = tmp_path / "test.sqlite3"
+    app = create_app(str(db_path), seed_sample=True)
+    client = TestClient(app)
+    for device_id in (9, 10):
+        response = client.post(
+            "/api/configs/1/assign",
+            json={"asset_type": "device", "asset_id": device_id, "source_config_id": None},
+        )
+        assert response.status_code == 200
+    tail = _fetch_one(db_path, "SELECT entry_hash FROM audit_logs WHERE config_id = 1 ORDER BY audit_id DESC")
+    assert tail is not None
+    assert app.state.audit_tails.lookup([1]) == {1: tail["entry_hash"]}
+
+    response = client.post(
+        "/api/assignments/batch",
+        json={"operations": [{"op": "assign", "asset_type": "device", "asset_id": 3, "config_id": 1}]},
+    )
+    assert response.status_code == 409
+    assert app.state.audit_tails.lookup([1]) == {1: tail["entry_hash"]}
+
+    response = client.post(
+        "/api/configs/1/assign",
+        json={"asset_type": "device", "asset_id": 11, "source_config_id": None},
+    )
+    assert response.status_code == 200
+    row = _fetch_one(db_path, "SELECT prev_hash FROM audit_logs WHERE config_id = 1 ORDER BY audit_id DESC")
+    assert row is not None
+    assert row["prev_hash"] == tail["entry_hash"]
+
+
+def test_verify_audit_api(tmp_path: Path) -> None:
+    client, db_path = _build_client_with_db(tmp_path)
+    for config_id, device_id in ((1, 9), (2, 10)):
+        client.post(
+            f"/api/configs/{config_id}/assign",
+            json={"asset_type": "device", "asset_id": device_id, "source_config_id": None},
+        )
+    response = client.post("/api/audit/verify")
+    assert response.status_code == 200
+    assert response.json()["entries"] == 2
+    assert response.json()["breaks"] == []
+    assert client.post("/api/audit/verify").json()["entries"] == 0
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE audit_logs SET actor = 'intruder' WHERE config_id = 1")
+    conn.commit()
+    conn.close()
+    response = client.post("/api/audit/verify", params={"full": "true", "workers": 2})
+    assert [item["config_id"] for item in response.json()["breaks"]] == [1]
+    response = client.post("/api/audit/verify")
+    assert [item["config_id"] for item in response.json()["breaks"]] == [1]
+    assert client.post("/api/audit/verify", params={"workers": 32}).status_code == 422
+
+
+def test_save_positions_batch_collapses_repeated_moves(tmp_path: Path) -> None:
+    client, db_path = _build_client_with_db(tmp_path)
+    response = client.post(
+        "/api/configs/positions",
+        json={
+            "positions": [
+                {"config_id": 1, "x": 10, "y": 10},
+                {"config_id": 2, "x": 300, "y": 40},
+                {"config_id": 1, "x": 55, "y": 65},
+                {"config_id": 999, "x": 1, "y": 1},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    assert response.json()["saved"] == [1, 2]
+    conn = sqlite3.connect(db_path)
+    positions = {row[0]: (row[1], row[2]) for row in conn.execute("SELECT config_id, x, y FROM config_positions")}
+    assert positions[1] == (55, 65)
+    assert positions[2] == (300, 40)
+    assert 999 not in positions
+    audits = conn.execute(
+        "SELECT config_id, details_json FROM audit_logs WHERE action = 'config.position' ORDER BY audit_id"
+    ).fetchall()
+    conn.close()
+    assert [(config_id, json.loads(details)) for config_id, details in audits] == [
+        (1, {"x": 55.0, "y": 65.0}),
+        (2, {"x": 300.0, "y": 40.0}),
+    ]
+
+
+def test_canvas_cards_returns_only_viewport(tmp_path: Path) -> None:
+    client = _build_client(tmp_path)
+    response = client.get("/api/canvas/cards", params={"x": 0, "y": 0, "width": 2000, "height": 100})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["grid"]["rows"] == 2
+    assert [card["config"]["config_id"] for card in data["cards"]] == [1, 2, 3, 4]
+    assert [item["device_id"] for item in data["cards"][0]["devices"]] == [1]
+    assert (data["cards"][1]["x"], data["cards"][1]["y"]) == (284, 24)
+
+    response = client.get("/api/canvas/cards", params={"x": 0, "y": 0, "width": 200, "height": 1000})
+    assert [card["config"]["config_id"] for card in response.json()["cards"]] == [1, 5]
+    response = client.get("/api/canvas/cards", params={"x": 0, "y": 5000, "width": 2000, "height": 500})
+    assert response.json()["cards"] == []
+
+
+def test_configurations_windowed_canvas_skips_card_markup(tmp_path: Path) -> None:
+    client = _build_client(tmp_path)
+    response = client.get("/configurations", params={"canvas": "windowed"})
+    assert response.status_code == 200
+    assert "data-windowed" in response.text
+    assert 'class="config-card"' not in response.text
+    assert 'class="config-card"' in client.get("/configurations").text
+
+
+def test_change_bus_fans_out_and_resyncs_slow_clients() -> None:
+    async def scenario() -> None:
+        bus = ChangeBus(queue_size=2)
+        subscription = bus.subscribe()
+        await asyncio.to_thread(bus.publish, "positions", {"positions": []})
+        event = await subscription.get(timeout=1)
+        assert event is not None
+        assert (event.seq, event.kind) == (1, "positions")
+        assert event.encode().startswith("id: 1\nevent: positions\ndata: ")
+
+        await asyncio.to_thread(bus.publish_many, [("config", {"config_id": item}) for item in range(3)])
+        event = await subscription.get(timeout=1)
+        assert event is not None
+        assert event.kind == "resync"
+        assert subscription.dropped == 2
+        assert await subscription.get(timeout=0.01) is None
+        bus.unsubscribe(subscription)
+        assert bus.subscribers == 0
+
+    asyncio.run(scenario())
+
+
+def test_committed_requests_publish_change_events(tmp_path: Path) -> None:
+    app = create_app(str(tmp_path / "test.sqlite3"), seed_sample=True)
+    client = TestClient(app)
+
+    async def scenario() -> list:
+        subscription = app.state.change_bus.subscribe()
+        rejected = await asyncio.to_thread(
+            client.post,
+            "/api/assignments/batch",
+            json={"operations": [{"op": "assign", "asset_type": "device", "asset_id": 3, "config_id": 1}]},
+        )
+        assert rejected.status_code == 409
+        saved = await asyncio.to_thread(
+            client.post,
+            "/api/configs/positions",
+            json={"positions": [{"config_id": 2, "x": 300, "y": 40}]},
+        )
+        assert saved.status_code == 200
+        assigned = await asyncio.to_thread(
+            client.post,
+            "/api/configs/1/assign",
+            json={"asset_type": "device", "asset_id": 9, "source_config_id": None},
+        )
+        assert assigned.status_code == 200
+        events = [await subscription.get(timeout=1) for _ in range(2)]
+        assert await subscription.get(timeout=0.05) is None
+        app.state.change_bus.unsubscribe(subscription)
+        return events
+
+    positions, assignments = asyncio.run(scenario())
+    assert positions.kind == "positions"
+    assert positions.payload["positions"] == [{"config_id": 2, "slot": 1, "x": 284, "y": 24}]
+    assert assignments.kind == "assignments"
+    assert assignments.payload["changes"][0]["asset_id"] == 9
+    assert assignments.seq == positions.seq + 1
+
+
+def test_identity_cache_serves_fresh_rows_after_local_and_external_writes(tmp_path: Path) -> None:
+    db_path = tmp_path / "test.sqlite3"
+    app = create_app(str(db_path), seed_sample=True)
+    client = TestClient(app)
+    for _ in range(3):
+        assert "DEV-003" in client.get("/assets/devices/3/edit").text
+    stats = client.get("/api/cache/stats").json()
+    assert stats["hits"] >= 2
+    assert stats["size"] >= 1
+
+    response = client.post(
+        "/assets/devices/3/edit",
+        data={"asset_no": "DEV-003X", "device_type": "PC", "model": "M", "version": "1", "state": "active"},
+        follow_redirects=False,
+    )
+    assert response.status_code == 303
+    assert "DEV-003X" in client.get("/assets/devices/3/edit").text
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE devices SET asset_no = 'DEV-003-EXTERNAL' WHERE device_id = 3")
+    conn.commit()
+    conn.close()
+    assert "DEV-003-EXTERNAL" in client.get("/assets/devices/3/edit").text
+
+
+def test_configuration_cards_are_served_from_fragment_cache(tmp_path: Path) -> None:
+    client = _build_client(tmp_path)
+    first = client.get("/configurations").text
+    misses = client.get("/api/cache/stats").json()["fragments"]["misses"]
+    assert client.get("/configurations").text == first
+    fragments = client.get("/api/cache/stats").json()["fragments"]
+    assert fragments["misses"] == misses
+    assert fragments["hits"] >= fragments["size"] > 0
+
+    def render() -> tuple[str, int]:
+        page = client.get("/configurations").text
+        return page, client.get("/api/cache/stats").json()["fragments"]["misses"]
+
+    def device_count(page: str, config_id: int) -> int:
+        row = page.split(f'data-config-row="{config_id}"')[1].split("</tr>")[0]
+        return int(row.split('data-count="devices">')[1].split("<")[0])
+
+    response = client.post(
+        "/assets/devices/1/edit",
+        data={"asset_no": "DEV-001R", "device_type": "PC", "model": "M", "version": "1", "state": "active"},
+        follow_redirects=False,
+    )
+    assert response.status_code == 303
+    page, after_rename = render()
+    assert "DEV-001R" in page
+    assert after_rename == misses + 1
+
+    before = device_count(page, 2)
+    assigned = client.post("/api/configs/2/assign", json={"asset_type": "device", "asset_id": 9, "source_config_id": None})
+    assert assigned.status_code == 200
+    page, after_assign = render()
+    assert device_count(page, 2) == before + 1
+    assert after_assign == after_rename + 1
+    assert render()[1] == after_assign
+
+
+def test_views_answer_matching_etag_with_304(tmp_path: Path) -> None:
+    client = _build_client(tmp_path)
+    for path in ("/api/summary", "/configurations", "/configurations/1", "/assets/devices", "/assets/licenses"):
+        response = client.get(path)
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        cached = client.get(path, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+
+    summary_etag = client.get("/api/summary").headers["etag"]
+    devices_etag = client.get("/assets/devices").headers["etag"]
+    licenses_etag = client.get("/assets/licenses").headers["etag"]
+    assert client.get("/assets/devices", params={"device_page": 2}).headers["etag"] != devices_etag
+
+    client.post("/api/configs/1/assign", json={"asset_type": "device", "asset_id": 9, "source_config_id": None})
+    assert client.get("/api/summary", headers={"If-None-Match": summary_etag}).status_code == 200
+    assert client.get("/assets/devices", headers={"If-None-Match": devices_etag}).status_code == 304
+    assert client.get("/assets/licenses", headers={"If-None-Match": f'W/{licenses_etag}, "x"'}).status_code == 304
+
+
 def test_config_create_audit(tmp_path: Path) -> None:
     client, db_path = _build_client_with_db(tmp_path)
     response = client.post(
@@ -575,3 +935,134 @@ def test_move_device_audit(tmp_path: Path) -> None:
         "SELECT action FROM audit_logs WHERE config_id = 2 AND action = 'config.device.move' ORDER BY audit_id DESC",
     )
     assert audit_row is not None
+
+
+def test_device_list_pagination(tmp_path: Path) -> None:
+    client = _build_client(tmp_path)
+    response = client.get("/assets/devices?device_sort=asset_no&device_dir=asc&device_page=1")
+    assert response.status_code == 200
+    assert "DEV-001" in response.text
+    assert "次へ" not in response.text
+    response = client.get("/assets/devices?device_sort=asset_no&device_dir=asc&device_page=2")
+    assert response.status_code == 200
+    assert "DEV-001" not in response.text
+    response = client.get("/assets/devices?device_page=0")
+    assert response.status_code == 422
+
+
+def test_search_api(tmp_path: Path) -> None:
+    client = _build_client(tmp_path)
+    response = client.get("/api/search", params={"q": "ワークステ"})
+    assert response.status_code == 200
+    payload = response.json()
+    assert [item["asset_no"] for item in payload["devices"]] == ["DEV-001"]
+    assert payload["licenses"] == []
+
+
+def test_concurrent_assign_and_move_keep_invariants(tmp_path: Path) -> None:
+    db_path = tmp_path / "stress.sqlite3"
+    client = TestClient(create_app(str(db_path), pool_size=4, seed_sample=True))
+    rng = random.Random(4)
+    operations = [
+        (rng.randint(1, 8), rng.randint(1, 20), rng.choice([None, rng.randint(1, 8)]))
+        for _ in range(120)
+    ]
+
+    def run(operation: tuple[int, int, int | None]) -> int:
+        config_id, device_id, source_config_id = operation
+        response = client.post(
+            f"/api/configs/{config_id}/assign",
+            json={"asset_type": "device", "asset_id": device_id, "source_config_id": source_config_id},
+        )
+        if response.status_code == 200:
+            client.get("/configurations")
+        return response.status_code
+
+    with ThreadPoolExecutor(max_workers=12) as executor:
+        statuses = list(executor.map(run, operations))
+
+    assert set(statuses) <= {200, 409}
+    conn = sqlite3.connect(db_path)
+    duplicated = conn.execute(
+        "SELECT device_id FROM config_devices GROUP BY device_id HAVING COUNT(*) > 1"
+    ).fetchall()
+    assert duplicated == []
+    audit_count = conn.execute(
+        "SELECT COUNT(*) FROM audit_logs WHERE action IN ('config.device.assign', 'config.device.move')"
+    ).fetchone()[0]
+    assert audit_count == statuses.count(200)
+    previous: dict[int, str] = {}
+    for config_id, action, actor, details_json, created_at, prev_hash, entry_hash in conn.execute(
+        "SELECT config_id, action, actor, details_json, created_at, prev_hash, entry_hash FROM audit_logs ORDER BY audit_id"
+    ):
+        assert prev_hash == previous.get(config_id)
+        payload = "|".join([created_at, str(config_id), action, actor, details_json, prev_hash or ""])
+        assert entry_hash == hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        previous[config_id] = entry_hash
+    conn.close()
+
+
+def test_async_routes_serve_concurrent_clients_on_both_executors(tmp_path: Path) -> None:
+    async def scenario(executor: str) -> list[int]:
+        app = create_app(str(tmp_path / f"{executor}.sqlite3"), pool_size=2, seed_sample=True, db_executor=executor)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            reads = [client.get("/api/summary") for _ in range(100)]
+            writes = [
+                client.post("/api/configs/positions", json={"positions": [{"config_id": 1, "x": 40, "y": 24 + index}]})
+                for index in range(20)
+            ]
+            responses = await asyncio.gather(*reads, *writes)
+        app.state.db.close()
+        return [response.status_code for response in responses]
+
+    for executor in ("thread", "threadpool"):
+        assert set(asyncio.run(scenario(executor))) == {200}
+    saved = _fetch_one(tmp_path / "thread.sqlite3", "SELECT COUNT(*) FROM audit_logs WHERE action = 'config.position'")
+    assert saved is not None and saved[0] == 20
+
+
+def test_import_devices_api(tmp_path: Path) -> None:
+    client, db_path = _build_client_with_db(tmp_path)
+    content = "asset_no,display_name,device_type,model,version,state,note\nAPI-001,取込デバイス,PC,M1,2026,active,\n"
+    response = client.post(
+        "/api/import/devices",
+        files={"file": ("devices.csv", content.encode("utf-8"), "text/csv")},
+    )
+    assert response.status_code == 200
+    assert response.json()["imported"] == 1
+    row = _fetch_one(db_path, "SELECT display_name FROM devices WHERE asset_no = ?", ("API-001",))
+    assert row is not None
+    assert row["display_name"] == "取込デバイス"
+    response = client.post(
+        "/api/import/widgets",
+        files={"file": ("widgets.csv", b"", "text/csv")},
+    )
+    assert response.status_code == 404
+
+
+def test_export_streams_csv_and_ndjson(tmp_path: Path) -> None:
+    client = _build_client(tmp_path)
+    response = client.get("/api/export/devices")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 20
+    assert rows[0]["asset_no"] == "DEV-001"
+    assert rows[0]["display_name"] == "解析ワークステーション"
+
+    response = client.get("/api/export/configurations", params={"format": "ndjson"})
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert len(records) == 8
+    assert records[0]["config_no"] == "CNFG-001"
+    assert [item["asset_no"] for item in records[0]["devices"]] == ["DEV-001"]
+    assert [item["license_no"] for item in records[0]["licenses"]] == ["LIC-001"]
+
+    client.post("/api/configs/1/position", json={"x": 10, "y": 20})
+    response = client.get("/api/export/audit", params={"format": "ndjson", "config_id": 1})
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [record["action"] for record in records] == ["config.position"]
+
+    assert client.get("/api/export/secrets").status_code == 404
+    assert client.get("/api/export/devices", params={"format": "xml"}).status_code == 400
@@ -1,15 +1,45 @@
 from __future__ import annotations
 
+import asyncio
+import io
+import threading
+import json
+import os
+import random
+import sqlite3
 from pathlib import Path
 
-from wam.repositories import AuditRepository
+import pytest
 
-from wam.db import init_db
+from wam.cache import IdentityCache
+from wam.cli import main as cli_main
+from wam.executor import AsyncRepository
+from wam.pool import AsyncConnectionPool, ConnectionPool
+from wam.repositories import (
+    AuditRepository,
+    AuditTailCache,
+    AuditWriter,
+    ConfigRepository,
+    DeviceRepository,
+    ListQuery,
+    SummaryRepository,
+    TableVersionRepository,
+    unit_of_work,
+)
+
+from wam.db import connect, init_db
+from wam.exporter import export_chunks
+from wam.fragments import FragmentCache
+from wam.importer import import_records
+from wam.layout import GRID_COLS, CanvasLayout, slot_coordinates, slot_for
+from wam.migrations import MIGRATIONS, migrate, schema_version
+from wam.models import Device, RowSet
+from wam.verifier import AuditCheckpoint, load_checkpoints, save_checkpoints, verify_audit_chain
 
 
 def test_seed_data(tmp_path: Path) -> None:
     db_path = tmp_path / "seed.sqlite3"
-    conn = init_db(str(db_path))
+    conn = init_db(str(db_path), seed=True)
     device_count = conn.execute("SELECT COUNT(*) FROM devices").fetchone()[0]
     license_count = conn.execute("SELECT COUNT(*) FROM licenses").fetchone()[0]
     config_count = conn.execute("SELECT COUNT(*) FROM configurations").fetchone()[0]
@@ -21,7 +51,7 @@ def test_seed_data(tmp_path: Path) -> None:
 
 def test_audit_hash_chain(tmp_path: Path) -> None:
     db_path = tmp_path / "audit.sqlite3"
-    conn = init_db(str(db_path))
+    conn = init_db(str(db_path), seed=True)
     repo = AuditRepository(conn)
 
     repo.append(
@@ -44,3 +74,660 @@ def test_audit_hash_chain(tmp_path: Path) -> None:
     ).fetchall()
     assert rows[0][0] is None
     assert rows[1][0] == rows[0][1]
+
+
+def test_audit_writer_flushes_queued_entries_from_cached_tails(tmp_path: Path) -> None:
+    conn = init_db(str(tmp_path / "audit.sqlite3"), seed=True)
+    cache = AuditTailCache()
+    writer = AuditWriter(AuditRepository(conn), cache)
+    for index in range(3):
+        writer.append(config_id=1, action="config.update", actor="tester", details={"n": index}, created_at="t")
+    assert writer.pending == 3
+    assert conn.execute("SELECT COUNT(*) FROM audit_logs WHERE config_id = 1").fetchone()[0] == 0
+    with unit_of_work(conn):
+        cache.store(writer.flush())
+
+    writer.append(config_id=1, action="config.update", actor="tester", details={"n": 3}, created_at="t")
+    statements: list[str] = []
+    conn.set_trace_callback(statements.append)
+    with unit_of_work(conn):
+        cache.store(writer.flush())
+    conn.set_trace_callback(None)
+
+    assert not [sql for sql in statements if "SELECT" in sql]
+    rows = conn.execute(
+        "SELECT prev_hash, entry_hash FROM audit_logs WHERE config_id = 1 ORDER BY audit_id"
+    ).fetchall()
+    assert len(rows) == 4
+    assert rows[0][0] is None
+    assert all(rows[index][0] == rows[index - 1][1] for index in range(1, 4))
+    assert cache.lookup([1]) == {1: rows[-1][1]}
+
+
+def test_audit_tail_cache_evicts_least_recently_used() -> None:
+    cache = AuditTailCache(capacity=2)
+    cache.sync(1)
+    cache.store({1: "a", 2: "b"})
+    assert cache.lookup([1]) == {1: "a"}
+    cache.store({3: "c"})
+    assert cache.lookup([1, 2, 3]) == {1: "a", 3: "c"}
+    cache.sync(2)
+    assert len(cache) == 0
+
+
+def test_audit_writer_resyncs_after_another_connection_writes(tmp_path: Path) -> None:
+    db_path = tmp_path / "audit.sqlite3"
+    conn = init_db(str(db_path), seed=True)
+    cache = AuditTailCache()
+    writer = AuditWriter(AuditRepository(conn), cache)
+    writer.append(config_id=1, action="config.update", actor="app", details={}, created_at="t1")
+    with unit_of_work(conn):
+        cache.store(writer.flush())
+
+    other = connect(str(db_path))
+    with unit_of_work(other):
+        AuditRepository(other).append(config_id=1, action="config.update", actor="cli", details={}, created_at="t2")
+    other.close()
+
+    writer.append(config_id=1, action="config.update", actor="app", details={}, created_at="t3")
+    with unit_of_work(conn):
+        cache.store(writer.flush())
+    rows = conn.execute("SELECT prev_hash, entry_hash FROM audit_logs WHERE config_id = 1 ORDER BY audit_id").fetchall()
+    assert [row[0] for row in rows] == [None, rows[0][1], rows[1][1]]
+
+
+def test_list_members_query_count_is_constant(tmp_path: Path) -> None:
+    db_path = tmp_path / "members.sqlite3"
+    conn = init_db(str(db_path), seed=True)
+    repo = ConfigRepository(conn)
+    statements: list[str] = []
+
+    def load_members() -> int:
+        config_ids = [config.config_id for config in repo.list_all()]
+        statements.clear()
+        conn.set_trace_callback(statements.append)
+        devices, licenses = repo.list_members(config_ids)
+        conn.set_trace_callback(None)
+        for config_id in config_ids:
+            assert devices.get(config_id, []) == repo.list_devices(config_id)
+            assert licenses.get(config_id, []) == repo.list_licenses(config_id)
+        return len(statements)
+
+    baseline = load_members()
+    for index in range(50):
+        config = repo.create(name=f"bulk-{index}", note="")
+        if index < 12:
+            repo.assign_device(config.config_id, index + 9)
+    assert load_members() == baseline == 2
+
+
+def test_device_query_matches_python_filter(tmp_path: Path) -> None:
+    db_path = tmp_path / "query.sqlite3"
+    conn = init_db(str(db_path), seed=True)
+    repo = DeviceRepository(conn)
+    repo.create("DEV-ÄBC", None, "PC", "Ｍodel-Ｘ", "2025", "active", "")
+    repo.create("dev-äbc", "Ｘ端末", "PC", "Model-Y", "2025", "retired", "")
+    devices = repo.list_all()
+
+    def python_filter(q: str, sort: str | None, direction: str) -> list:
+        items = [
+            item
+            for item in devices
+            if not q
+            or q.lower() in item.asset_no.lower()
+            or q.lower() in (item.display_name or "").lower()
+            or q.lower() in item.device_type.lower()
+            or q.lower() in item.model.lower()
+            or q.lower() in item.version.lower()
+            or q.lower() in item.state.lower()
+        ]
+        if sort in DeviceRepository.SORT_COLUMNS:
+            items = sorted(items, key=lambda item: getattr(item, sort) or "", reverse=direction == "desc")
+        return items
+
+    for q in ("", "äbc", "ＸＸ", "ｘ", "interface", "RETIRED", "解析", "ｍODEL-ｘ", "x端末", "dev-0", 'a"b', "C 00"):
+        for sort in (None, "asset_no", "display_name", "state", "bogus"):
+            for direction in ("asc", "desc"):
+                expected = python_filter(q, sort, direction)
+                page = repo.query(ListQuery(q=q, sort=sort, direction=direction))
+                assert page.items == expected
+                assert page.total == len(expected)
+
+    page = repo.query(ListQuery(sort="asset_no", limit=5, offset=5))
+    assert page.items == python_filter("", "asset_no", "asc")[5:10]
+    assert page.has_prev and page.has_next
+
+    page = repo.query(ListQuery(q="dev-0", sort="asset_no", limit=5, offset=15))
+    assert (page.items, page.total) == (python_filter("dev-0", "asset_no", "asc")[15:20], 20)
+    assert repo.query(ListQuery(q="dev-0", limit=5, offset=40)).total == 20
+
+
+def test_device_fulltext_search(tmp_path: Path) -> None:
+    db_path = tmp_path / "fts.sqlite3"
+    conn = init_db(str(db_path), seed=True)
+    repo = DeviceRepository(conn)
+
+    results = repo.search("ワークステ")
+    assert [item.asset_no for item in results] == ["DEV-001"]
+    assert {item.asset_no for item in repo.search("インターフェース")} >= {"DEV-003", "DEV-005", "DEV-012"}
+    assert [item.asset_no for item in repo.search("vector vn1630")] == ["DEV-005"]
+
+    device = repo.create("DEV-900", "解析サーバー", "Server", "R750", "2026", "active", "")
+    assert device.device_id in {item.device_id for item in repo.search("解析サ")}
+    repo.update(device.device_id, "DEV-900", "計測サーバー", "Server", "R750", "2026", "active", "")
+    assert device.device_id not in {item.device_id for item in repo.search("解析サ")}
+    repo.delete(device.device_id)
+    assert repo.search("計測サーバー") == []
+    assert {item.asset_no for item in repo.search("PC")} == {"DEV-001", "DEV-011"}
+
+
+def test_rebuild_search_command(tmp_path: Path) -> None:
+    db_path = tmp_path / "rebuild.sqlite3"
+    conn = init_db(str(db_path), seed=True)
+    conn.execute("INSERT INTO configurations_fts (configurations_fts) VALUES ('delete-all')")
+    conn.commit()
+    repo = ConfigRepository(conn)
+    assert repo.search("トランスミッション") == []
+    conn.close()
+
+    assert cli_main(["--db", str(db_path), "rebuild-search"]) == 0
+    conn = init_db(str(db_path), seed=True)
+    assert [item.config_no for item in ConfigRepository(conn).search("トランスミッション")] == ["CNFG-002"]
+
+
+def test_pragma_profiles(tmp_path: Path) -> None:
+    db_path = str(tmp_path / "profile.sqlite3")
+    conn = init_db(db_path, "wal", seed=True)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+    assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+    conn.close()
+
+    conn = connect(db_path, "rollback")
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 2
+    conn.close()
+
+    with pytest.raises(ValueError):
+        connect(db_path, "turbo")
+
+
+def test_pool_checkpoint_keeps_wal_bounded(tmp_path: Path) -> None:
+    def wal_size_after_writes(name: str, checkpoint_interval: float) -> int:
+        db_path = str(tmp_path / f"{name}.sqlite3")
+        init_db(db_path, "wal", seed=True).close()
+        pool = ConnectionPool(db_path, readers=1, profile="wal", checkpoint_interval=checkpoint_interval)
+        for index in range(200):
+            with pool.writer() as conn:
+                conn.execute("UPDATE devices SET note = ? WHERE device_id = ?", (f"note-{index}", index % 20 + 1))
+        size = os.path.getsize(db_path + "-wal")
+        pool.close()
+        return size
+
+    assert wal_size_after_writes("checkpointed", 0.0) * 10 < wal_size_after_writes("unbounded", 3600.0)
+
+
+def test_async_pool_runs_units_on_dedicated_threads(tmp_path: Path) -> None:
+    db_path = str(tmp_path / "async.sqlite3")
+    init_db(db_path, seed=True).close()
+    pool = ConnectionPool(db_path, readers=1)
+    db = AsyncConnectionPool(pool)
+
+    async def thread_name() -> str:
+        async with db.reader() as (_, runner):
+            return await runner.run(lambda: threading.current_thread().name)
+
+    async def scenario() -> None:
+        async with db.reader() as (conn, runner):
+            devices = AsyncRepository(DeviceRepository(conn), runner)
+            assert (await devices.get_by_id(1)).asset_no == "DEV-001"
+            waiting = asyncio.create_task(thread_name())
+            await asyncio.sleep(0.05)
+            assert db.waiting == 1
+        assert (await asyncio.wait_for(waiting, timeout=1)).startswith("wam-db-reader-0")
+        assert db.waiting == 0
+
+        async with db.export_reader() as (_, runner):
+            assert (await runner.run(lambda: threading.current_thread().name)).startswith("wam-db-export-0")
+            assert (await asyncio.wait_for(thread_name(), timeout=1)).startswith("wam-db-reader-0")
+        assert isinstance(await db.data_version(), int)
+
+        with pytest.raises(RuntimeError):
+            async with db.writer() as (conn, runner):
+                await runner.run(conn.execute, "UPDATE devices SET note = 'rolled back' WHERE device_id = 1")
+                raise RuntimeError("abort")
+        async with db.writer() as (conn, runner):
+            note = await runner.run(lambda: conn.execute("SELECT note FROM devices WHERE device_id = 1").fetchone()[0])
+        assert note != "rolled back"
+
+    asyncio.run(scenario())
+    db.close()
+    pool.close()
+    with pytest.raises(ValueError):
+        AsyncConnectionPool(pool, "fibers")
+
+
+def test_lookup_indexes_are_used(tmp_path: Path) -> None:
+    db_path = tmp_path / "indexes.sqlite3"
+    conn = init_db(str(db_path), seed=True)
+    assert schema_version(conn) == MIGRATIONS[-1].version
+
+    def plan(sql: str) -> str:
+        return " | ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", (1,)))
+
+    owner_plan = plan("SELECT config_id FROM config_devices WHERE device_id = ?")
+    assert "idx_config_devices_device_id" in owner_plan
+    assert "idx_config_devices_device_id" in plan("SELECT DISTINCT device_id FROM config_devices WHERE ? = 1")
+    last_hash_plan = plan(
+        "SELECT entry_hash FROM audit_logs WHERE config_id = ? ORDER BY audit_id DESC LIMIT 1"
+    )
+    assert "idx_audit_logs_config_id" in last_hash_plan
+    assert "TEMP B-TREE" not in last_hash_plan
+    list_plan = plan(
+        "SELECT audit_id, entry_hash FROM audit_logs WHERE config_id = ? ORDER BY audit_id DESC LIMIT 200"
+    )
+    assert "idx_audit_logs_config_id" in list_plan
+    assert "TEMP B-TREE" not in list_plan
+
+
+def test_startup_on_migrated_db_does_no_work(tmp_path: Path) -> None:
+    db_path = str(tmp_path / "migrated.sqlite3")
+    init_db(db_path, seed=True).close()
+
+    conn = init_db(db_path)
+    assert conn.total_changes == 0
+    conn.close()
+
+    conn = connect(db_path)
+    statements: list[str] = []
+    conn.set_trace_callback(statements.append)
+    assert migrate(conn) == []
+    assert statements == ["PRAGMA user_version"]
+
+
+def test_init_db_does_not_seed_unless_requested(tmp_path: Path) -> None:
+    conn = init_db(str(tmp_path / "empty.sqlite3"))
+    assert conn.execute("SELECT COUNT(*) FROM devices").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM configurations").fetchone()[0] == 0
+
+
+def test_migrate_legacy_database(tmp_path: Path) -> None:
+    db_path = str(tmp_path / "legacy.sqlite3")
+    legacy = sqlite3.connect(db_path)
+    legacy.execute(
+        """
+        CREATE TABLE configurations (
+            config_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            note TEXT NOT NULL DEFAULT '',
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    legacy.execute("INSERT INTO configurations (name) VALUES ('レガシー構成')")
+    legacy.commit()
+    legacy.close()
+
+    assert cli_main(["--db", db_path, "migrate"]) == 0
+    conn = connect(db_path)
+    assert schema_version(conn) == MIGRATIONS[-1].version
+    assert conn.execute("SELECT config_no FROM configurations").fetchone()[0] == "CNFG-001"
+    assert [item.name for item in ConfigRepository(conn).search("レガシー")] == ["レガシー構成"]
+
+
+def test_import_devices_csv_in_chunks(tmp_path: Path) -> None:
+    conn = init_db(str(tmp_path / "import.sqlite3"), seed=True)
+    lines = ["asset_no,display_name,device_type,model,version,state,note"]
+    lines += [f"IMP-{index:04d},,PC,Model-{index},2026,active," for index in range(25)]
+    lines.append("IMP-BAD,Broken,PC,,2026,active,")
+    lines.append("DEV-001,更新済みワークステーション,PC,Precision 3680,2026,active,imported")
+    report = import_records(conn, "devices", io.StringIO("\n".join(lines)), "csv", chunk_size=10)
+
+    assert (report.processed, report.imported, report.failed) == (27, 26, 1)
+    assert report.errors[0].line == 27
+    assert "model" in report.errors[0].message
+    repo = DeviceRepository(conn)
+    assert conn.execute("SELECT COUNT(*) FROM devices WHERE asset_no LIKE 'IMP-%'").fetchone()[0] == 25
+    assert repo.get_by_id(1).display_name == "更新済みワークステーション"
+    assert [item.asset_no for item in repo.search("更新済み")] == ["DEV-001"]
+
+
+def test_import_joins_callers_transaction_without_committing(tmp_path: Path) -> None:
+    conn = init_db(str(tmp_path / "import.sqlite3"), seed=True)
+    lines = ["asset_no,device_type,model,version,state"]
+    lines += [f"{asset_no},PC,M,1,active" for asset_no in ("IMP-0001", "IMP-0002", "DEV-001")]
+    payload = "\n".join(lines)
+    conn.execute(
+        "CREATE TEMP TRIGGER reject_import BEFORE INSERT ON devices WHEN new.asset_no = 'IMP-0002' "
+        "BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+    )
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute("UPDATE devices SET note = 'pending' WHERE device_id = 1")
+    report = import_records(conn, "devices", io.StringIO(payload), "csv", chunk_size=2)
+    assert (report.imported, report.failed) == (2, 1)
+    assert report.errors[0].line == 3
+    assert conn.execute("SELECT COUNT(*) FROM devices WHERE asset_no = 'IMP-0001'").fetchone()[0] == 1
+    assert conn.in_transaction
+    conn.rollback()
+    assert conn.execute("SELECT COUNT(*) FROM devices WHERE asset_no = 'IMP-0001'").fetchone()[0] == 0
+    assert conn.execute("SELECT note FROM devices WHERE device_id = 1").fetchone()[0] != "pending"
+
+
+def test_import_licenses_jsonl_upserts_by_license_no(tmp_path: Path) -> None:
+    conn = init_db(str(tmp_path / "import.sqlite3"), seed=True)
+    before = conn.execute("SELECT COUNT(*) FROM licenses").fetchone()[0]
+    payload = "\n".join(
+        [
+            '{"license_no": "LIC-001", "name": "CANape Pro", "license_key": "NEW-KEY", "state": "active"}',
+            '{"license_no": "LIC-900", "name": "New Tool", "license_key": "KEY-900", "state": "active"}',
+            '{"license_no": "LIC-901", "name": "Broken"',
+            "",
+        ]
+    )
+    report = import_records(conn, "licenses", io.StringIO(payload), "jsonl")
+
+    assert (report.processed, report.imported, report.failed) == (3, 2, 1)
+    assert report.errors[0].line == 3
+    assert conn.execute("SELECT COUNT(*) FROM licenses").fetchone()[0] == before + 1
+    assert conn.execute("SELECT name FROM licenses WHERE license_no = 'LIC-001'").fetchone()[0] == "CANape Pro"
+
+
+def test_export_configurations_across_batches(tmp_path: Path) -> None:
+    conn = init_db(str(tmp_path / "export.sqlite3"), seed=True)
+    chunks = list(export_chunks(conn, "configurations", "ndjson", batch_size=3))
+    assert len(chunks) == 3
+    records = [json.loads(line) for line in "".join(chunks).splitlines()]
+    repo = ConfigRepository(conn)
+    for record in records:
+        assert [item["device_id"] for item in record["devices"]] == [
+            item.device_id for item in repo.list_devices(record["config_id"])
+        ]
+    assert not conn.in_transaction
+
+
+def test_move_runs_in_a_single_commit(tmp_path: Path) -> None:
+    conn = init_db(str(tmp_path / "uow.sqlite3"), seed=True)
+    repo = ConfigRepository(conn)
+    statements: list[str] = []
+    conn.set_trace_callback(statements.append)
+    with unit_of_work(conn):
+        repo.move_device(1, 2, 1)
+        repo.move_license(1, 2, 1)
+    conn.set_trace_callback(None)
+
+    assert statements[0] == "BEGIN IMMEDIATE"
+    assert statements.count("COMMIT") == 1
+    assert repo.get_device_owner(1) == 2
+    assert repo.get_license_owner(1) == 2
+
+
+def test_move_rolls_back_when_transaction_dies_midway(tmp_path: Path) -> None:
+    db_path = tmp_path / "uow.sqlite3"
+    conn = init_db(str(db_path), seed=True)
+    repo = ConfigRepository(conn)
+    observer = connect(str(db_path))
+    seen_during_move: list[tuple] = []
+
+    def crash(config_id: int, device_id: int) -> None:
+        seen_during_move.extend(observer.execute("SELECT config_id FROM config_devices WHERE device_id = 1"))
+        raise sqlite3.OperationalError("injected failure")
+
+    repo.assign_device = crash  # type: ignore[method-assign]
+    with pytest.raises(sqlite3.OperationalError):
+        with unit_of_work(conn):
+            repo.move_device(1, 2, 1)
+
+    assert seen_during_move == [(1,)]
+    assert not conn.in_transaction
+    assert observer.execute("SELECT config_id FROM config_devices WHERE device_id = 1").fetchall() == [(1,)]
+    observer.close()
+
+
+def _append_audit_entries(conn: sqlite3.Connection, count: int) -> None:
+    repo = AuditRepository(conn)
+    with unit_of_work(conn):
+        for index in range(count):
+            repo.append(
+                config_id=index % 3 + 1,
+                action="config.update",
+                actor="tester",
+                details={"n": index},
+                created_at=f"2026-03-01T00:00:{index:02d}+00:00",
+            )
+
+
+def test_verify_audit_chain_reports_first_break_per_config(tmp_path: Path) -> None:
+    db_path = tmp_path / "verify.sqlite3"
+    conn = init_db(str(db_path), seed=True)
+    _append_audit_entries(conn, 12)
+    conn.execute("UPDATE audit_logs SET details_json = '{\"n\": 99}' WHERE audit_id IN (5, 7, 11)")
+    conn.commit()
+
+    report = verify_audit_chain(str(db_path), workers=2, batch_size=2)
+
+    assert report.configs == 3
+    assert [(item.config_id, item.audit_id) for item in report.breaks] == [(1, 7), (2, 5)]
+    assert report.entries == 3 + 2 + 4
+    assert {item.config_id: item.last_audit_id for item in report.checkpoints} == {3: 12}
+
+    with unit_of_work(conn):
+        save_checkpoints(conn, [AuditCheckpoint(1, 4, "stale"), AuditCheckpoint(2, 2, "stale")])
+        save_checkpoints(conn, report.checkpoints, report.breaks)
+    assert sorted(load_checkpoints(conn)) == [3]
+
+
+def test_verify_audit_chain_resumes_from_checkpoints(tmp_path: Path) -> None:
+    db_path = tmp_path / "verify.sqlite3"
+    conn = init_db(str(db_path), seed=True)
+    _append_audit_entries(conn, 6)
+    first = verify_audit_chain(str(db_path))
+    with unit_of_work(conn):
+        save_checkpoints(conn, first.checkpoints)
+    _append_audit_entries(conn, 3)
+
+    second = verify_audit_chain(str(db_path), load_checkpoints(conn))
+
+    assert (first.entries, second.entries) == (6, 3)
+    assert second.breaks == []
+    assert cli_main(["--db", str(db_path), "verify-audit", "--workers", "1"]) == 0
+
+
+def test_canvas_layout_places_into_first_free_slot(tmp_path: Path) -> None:
+    conn = init_db(str(tmp_path / "layout.sqlite3"), seed=True)
+    layout = CanvasLayout(conn)
+    assert [layout.load()[config_id].slot for config_id in range(1, 9)] == list(range(8))
+
+    x, y = slot_coordinates(1)
+    moved = layout.place(8, x + 30, y - 20)
+    assert moved.slot == 7
+    swapped = layout.place_many([(1, *slot_coordinates(1)), (2, *slot_coordinates(0))])
+    assert [item.slot for item in swapped] == [1, 0]
+    created = ConfigRepository(conn).create(name="新規", note="")
+    assert layout.load()[created.config_id].slot == 8
+
+
+def test_layout_migration_resolves_legacy_collisions(tmp_path: Path) -> None:
+    db_path = tmp_path / "legacy-layout.sqlite3"
+    conn = init_db(str(db_path), seed=True)
+    conn.execute("DROP INDEX idx_config_positions_slot")
+    conn.execute("DROP TABLE layout_free_slots")
+    conn.execute("UPDATE config_positions SET slot = NULL")
+    conn.execute("DELETE FROM config_positions WHERE config_id > 3")
+    conn.execute("UPDATE config_positions SET x = 24, y = 24")
+    conn.execute("PRAGMA user_version = 3")
+    conn.commit()
+
+    assert migrate(conn)[0] == 4
+    slots = {config_id: card.slot for config_id, card in CanvasLayout(conn).load().items()}
+    assert slots == {1: 0, 2: 1, 3: 2, 4: 3, 5: 4, 6: 5, 7: 6, 8: 7}
+
+
+def test_search_index_ignores_updates_to_unindexed_columns(tmp_path: Path) -> None:
+    conn = init_db(str(tmp_path / "fts.sqlite3"), seed=True)
+    conn.execute("DROP TRIGGER configurations_fts_au")
+    conn.execute(
+        """
+        CREATE TRIGGER configurations_fts_au AFTER UPDATE ON configurations BEGIN
+            INSERT INTO configurations_fts (configurations_fts, rowid, config_no, name, note)
+            VALUES ('delete', old.config_id, old.config_no, old.name, old.note);
+            INSERT INTO configurations_fts (rowid, config_no, name, note)
+            VALUES (new.config_id, new.config_no, new.name, new.note);
+        END
+        """
+    )
+    conn.execute("PRAGMA user_version = 7")
+    conn.commit()
+    assert migrate(conn) == [8]
+
+    def index_pages() -> list:
+        return conn.execute("SELECT * FROM configurations_fts_data ORDER BY id").fetchall()
+
+    before = index_pages()
+    with unit_of_work(conn):
+        conn.execute("UPDATE configurations SET updated_at = '2030-01-01 00:00:00' WHERE config_id = 1")
+    assert index_pages() == before
+    with unit_of_work(conn):
+        conn.execute("UPDATE configurations SET name = 'Renamed trigram' WHERE config_id = 1")
+    assert index_pages() != before
+    matches = conn.execute("SELECT rowid FROM configurations_fts WHERE configurations_fts MATCH 'trigram'").fetchall()
+    assert matches == [(1,)]
+
+
+def test_canvas_layout_matches_linear_probe_under_random_moves(tmp_path: Path) -> None:
+    conn = init_db(str(tmp_path / "layout.sqlite3"), seed=True)
+    layout = CanvasLayout(conn)
+    rng = random.Random(3)
+    expected = {config_id: card.slot for config_id, card in layout.load().items()}
+    for _ in range(300):
+        config_id = rng.randint(1, 8)
+        if rng.random() < 0.1:
+            layout.remove(config_id)
+            expected.pop(config_id, None)
+            continue
+        x, y = rng.uniform(0, 1100), rng.uniform(0, 2500)
+        expected.pop(config_id, None)
+        slot = min(slot_for(x, y), max(expected.values(), default=-1) + 1 + GRID_COLS)
+        while slot in expected.values():
+            slot += 1
+        expected[config_id] = slot
+        assert layout.place(config_id, x, y).slot == slot
+    free = {row[0] for row in conn.execute("SELECT slot FROM layout_free_slots")}
+    assert free == set(range(max(expected.values()))) - set(expected.values())
+
+
+def test_summary_counters_follow_every_write_path(tmp_path: Path) -> None:
+    conn = init_db(str(tmp_path / "summary.sqlite3"), seed=True)
+    devices = DeviceRepository(conn)
+    configs = ConfigRepository(conn)
+    with unit_of_work(conn):
+        configs.assign_device(1, 9)
+        configs.move_device(1, 2, 9)
+        configs.unassign_license(1, 1)
+        device = devices.get_by_id(3)
+        devices.update(3, device.asset_no, device.display_name, "Router", device.model, device.version, "retired", "")
+        devices.delete(1)
+        configs.delete(4)
+    import_records(conn, "devices", io.StringIO("asset_no,device_type,model,version,state\nDEV-002,PC,X,1,spare\n"))
+
+    summary = SummaryRepository(conn).load()
+    assert summary.devices == conn.execute("SELECT COUNT(*) FROM devices").fetchone()[0]
+    assert summary.configs == conn.execute("SELECT COUNT(*) FROM configurations").fetchone()[0]
+    assert summary.devices_assigned == conn.execute("SELECT COUNT(DISTINCT device_id) FROM config_devices").fetchone()[0]
+    assert summary.licenses_assigned == conn.execute("SELECT COUNT(*) FROM config_licenses").fetchone()[0]
+    assert summary.devices_by_state == dict(conn.execute("SELECT state, COUNT(*) FROM devices GROUP BY state"))
+    assert summary.devices_by_type == dict(conn.execute("SELECT device_type, COUNT(*) FROM devices GROUP BY device_type"))
+    assert summary.devices_by_state["retired"] == 1
+    assert summary.devices_by_state["spare"] == 1
+
+
+def test_identity_cache_rejects_stale_loads_and_detects_external_commits(tmp_path: Path) -> None:
+    db_path = str(tmp_path / "cache.sqlite3")
+    conn = init_db(db_path, seed=True)
+    now = [0.0]
+    cache = IdentityCache(capacity=2, ttl=10.0, clock=lambda: now[0])
+
+    reader = DeviceRepository(conn, cache.session())
+    assert reader.get_by_id(1).asset_no == "DEV-001"
+    assert reader.get_by_id(1).asset_no == "DEV-001"
+    assert (cache.stats().hits, cache.stats().misses) == (1, 1)
+
+    session = cache.session()
+    writer = DeviceRepository(conn, session)
+    with unit_of_work(conn):
+        device = writer.get_by_id(1)
+        updated = writer.update(1, "DEV-001A", device.display_name, device.device_type, device.model, "v2", "active", "")
+        assert writer.get_by_id(1) == updated
+        epoch = cache.epoch
+    assert reader.get_by_id(1).asset_no == "DEV-001"
+    cache.committed(session)
+    cache.store(("device", 1), device, epoch)
+    assert cache.stats().stale_stores == 1
+    assert reader.get_by_id(1).version == "v2"
+
+    now[0] = 11.0
+    assert reader.get_by_id(1).version == "v2"
+    assert cache.stats().misses == 3
+
+    audit = AuditRepository(conn)
+    cache.sync(audit.data_version())
+    other = connect(db_path)
+    other.execute("UPDATE devices SET version = 'external' WHERE device_id = 1")
+    other.commit()
+    other.close()
+    cache.sync(audit.data_version())
+    assert cache.stats().size == 0
+    assert reader.get_by_id(1).version == "external"
+
+
+def test_fragment_cache_evicts_least_recently_used() -> None:
+    cache = FragmentCache(capacity=2)
+    cache.store(("row", 1), "<tr>1</tr>")
+    cache.store(("row", 2), "<tr>2</tr>")
+    assert cache.lookup(("row", 1)) == "<tr>1</tr>"
+    cache.store(("row", 3), "<tr>3</tr>")
+    assert cache.lookup(("row", 2)) is None
+    assert cache.lookup(("row", 3)) == "<tr>3</tr>"
+    stats = cache.stats()
+    assert (stats.size, stats.hits, stats.misses, stats.evictions) == (2, 2, 1, 1)
+    with pytest.raises(ValueError):
+        FragmentCache(capacity=-1)
+
+
+def test_row_set_matches_dataclass_lists(tmp_path: Path) -> None:
+    conn = init_db(str(tmp_path / "rows.sqlite3"), seed=True)
+    devices = DeviceRepository(conn)
+    rows = devices.list_rows()
+    assert len(rows) == 20
+    assert list(rows) == devices.list_all()
+    assert rows[0] == devices.list_all()[0]
+    assert not hasattr(rows[0], "__dict__")
+    assert rows.column("asset_no")[:2] == ["DEV-020", "DEV-019"]
+
+    spare = rows.where("device_id", lambda device_id: device_id % 5 == 0)
+    assert [item.device_id for item in spare] == [20, 15, 10, 5]
+    assert [item.asset_no for item in spare[1:3]] == ["DEV-015", "DEV-010"]
+    assert len(ConfigRepository(conn).list_rows().where("config_id", lambda config_id: False)) == 0
+
+    states = rows.column("state")
+    assert all(state is states[0] for state in states)
+    cur = conn.execute(
+        "SELECT device_id, asset_no, display_name, device_type, model, version, state, 'memo-' || (device_id % 2) "
+        "FROM devices ORDER BY device_id"
+    )
+    notes = RowSet.from_cursor(Device, cur, shared=("state",)).column("note")
+    assert notes[0] == notes[2] and notes[0] is not notes[2]
+    with pytest.raises(ValueError):
+        RowSet.from_cursor(Device, conn.execute("SELECT 1"), shared=("status",))
+
+
+def test_table_versions_count_writes_per_table(tmp_path: Path) -> None:
+    conn = init_db(str(tmp_path / "versions.sqlite3"), seed=True)
+    versions = TableVersionRepository(conn)
+    generation, devices, config_devices, audit_logs = versions.load(("devices", "config_devices", "audit_logs"))
+    with unit_of_work(conn):
+        DeviceRepository(conn).delete(1)
+    after = versions.load(("devices", "config_devices", "audit_logs"))
+    assert after == (generation, devices + 1, config_devices + 1, audit_logs)
+    assert versions.load(("unknown",))[1] == 0
@@ -12,23 +12,120 @@ document.addEventListener("DOMContentLoaded", () => {
     });
   });
 
-  const dragItems = document.querySelectorAll(".draggable-asset");
-  dragItems.forEach((item) => {
+  const assetKey = (item) => `${item.dataset.assetType}:${item.dataset.assetId}`;
+  const describeAsset = (item) => ({
+    asset_type: item.dataset.assetType,
+    asset_id: Number(item.dataset.assetId),
+    source_config_id: item.dataset.sourceConfigId
+      ? Number(item.dataset.sourceConfigId)
+      : null,
+  });
+
+  const bindDraggable = (item) => {
+    item.addEventListener("click", (event) => {
+      if (!event.ctrlKey && !event.metaKey) return;
+      event.preventDefault();
+      item.classList.toggle("selected");
+    });
     item.addEventListener("dragstart", (event) => {
-      const payload = {
-        asset_type: item.dataset.assetType,
-        asset_id: Number(item.dataset.assetId),
-        source_config_id: item.dataset.sourceConfigId
-          ? Number(item.dataset.sourceConfigId)
-          : null,
-      };
-      event.dataTransfer.setData("application/json", JSON.stringify(payload));
+      if (!item.classList.contains("selected")) {
+        document.querySelectorAll(".draggable-asset.selected").forEach((other) => {
+          other.classList.remove("selected");
+        });
+      }
+      const items = new Map([[assetKey(item), describeAsset(item)]]);
+      document.querySelectorAll(".draggable-asset.selected").forEach((selected) => {
+        items.set(assetKey(selected), describeAsset(selected));
+      });
+      event.dataTransfer.setData("application/json", JSON.stringify(Array.from(items.values())));
       event.dataTransfer.effectAllowed = "move";
     });
-  });
+  };
 
-  const dropZones = document.querySelectorAll(".drop-zone");
-  dropZones.forEach((zone) => {
+  const buildOperations = (assets, zone) => {
+    if (zone.dataset.unassign !== undefined) {
+      return assets
+        .filter((asset) => asset.source_config_id !== null)
+        .map((asset) => ({
+          op: "unassign",
+          asset_type: asset.asset_type,
+          asset_id: asset.asset_id,
+          config_id: asset.source_config_id,
+        }));
+    }
+    const configId = Number(zone.dataset.configId);
+    return assets
+      .filter((asset) => asset.source_config_id !== configId)
+      .map((asset) => ({
+        op: asset.source_config_id === null ? "assign" : "move",
+        asset_type: asset.asset_type,
+        asset_id: asset.asset_id,
+        config_id: configId,
+        source_config_id: asset.source_config_id,
+      }));
+  };
+
+  const syncPlaceholder = (list, text) => {
+    const placeholder = list.querySelector("li.muted");
+    const hasAssets = list.querySelector(".draggable-asset") !== null;
+    if (hasAssets && placeholder) placeholder.remove();
+    if (!hasAssets && !placeholder) {
+      const li = document.createElement("li");
+      li.className = "muted";
+      li.textContent = text;
+      list.append(li);
+    }
+  };
+
+  const patchAssignments = (data) => {
+    const touched = new Set();
+    data.changes.forEach((change) => {
+      const chip = document.querySelector(
+        `.draggable-asset[data-asset-type="${change.asset_type}"][data-asset-id="${change.asset_id}"]`,
+      );
+      if (!chip) return;
+      touched.add(chip.parentElement);
+      chip.classList.remove("selected");
+      const target = change.op === "unassign"
+        ? document.querySelector(`[data-asset-pool="${change.asset_type}"]`)
+        : document.querySelector(
+          `.drop-zone[data-config-id="${change.config_id}"] [data-asset-list="${change.asset_type}"]`,
+        );
+      if (!target) {
+        chip.remove();
+        return;
+      }
+      if (change.op === "unassign") {
+        delete chip.dataset.sourceConfigId;
+      } else {
+        chip.dataset.sourceConfigId = change.config_id;
+      }
+      target.append(chip);
+      touched.add(target);
+    });
+    touched.forEach((list) => {
+      if (!list) return;
+      syncPlaceholder(list, list.dataset.assetPool ? "未割当はありません" : "未割当");
+      const card = list.closest(".config-card");
+      const pill = card && card.querySelector('[data-count="devices"]');
+      if (pill) {
+        const count = card.querySelectorAll('[data-asset-list="device"] .draggable-asset').length;
+        pill.textContent = `${count} Devices`;
+      }
+    });
+    (data.configs || []).forEach((summary) => {
+      const card = document.querySelector(`.config-card[data-config-id="${summary.config_id}"]`);
+      if (card) card.dataset.updatedAt = summary.updated_at;
+      const row = document.querySelector(`[data-config-row="${summary.config_id}"]`);
+      if (row) {
+        row.querySelector('[data-count="devices"]').textContent = summary.device_count;
+        row.querySelector('[data-count="licenses"]').textContent = summary.license_count;
+        row.querySelector("[data-updated-at]").textContent = summary.updated_at;
+      }
+    });
+  };
+
+  const bindDropZone = (zone) => {
     zone.addEventListener("dragover", (event) => {
       event.preventDefault();
       zone.classList.add("drag-over");
@@ -40,21 +137,51 @@ document.addEventListener("DOMContentLoaded", () => {
       zone.classList.remove("drag-over");
       const raw = event.dataTransfer.getData("application/json");
       if (!raw) return;
-      const payload = JSON.parse(raw);
-      const configId = Number(zone.dataset.configId);
-      const response = await fetch(`/api/configs/${configId}/assign`, {
+      const operations = buildOperations(JSON.parse(raw), zone);
+      if (!operations.length) return;
+      const response = await fetch("/api/assignments/batch", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify(payload),
+        body: JSON.stringify({ operations }),
       });
+      const data = await response.json();
       if (response.ok) {
-        window.location.reload();
+        patchAssignments(data);
         return;
       }
-      const data = await response.json();
-      alert(data.detail || "Assign failed");
+      const detail = data.detail || {};
+      const conflicts = (detail.conflicts || []).map((item) => `#${item.index + 1}: ${item.reason}`);
+      alert([detail.message || detail || "Assign failed", ...conflicts].join("\n"));
     });
-  });
+  };
+
+  document.querySelectorAll(".draggable-asset").forEach(bindDraggable);
+  document.querySelectorAll(".drop-zone").forEach(bindDropZone);
+
+  const changeFeed = document.querySelector(".drop-zone") && window.EventSource
+    ? new EventSource("/api/events")
+    : null;
+  if (changeFeed) {
+    changeFeed.addEventListener("assignments", (event) => patchAssignments(JSON.parse(event.data)));
+    changeFeed.addEventListener("config", (event) => {
+      const data = JSON.parse(event.data);
+      const card = document.querySelector(`.config-card[data-config-id="${data.config_id}"]`);
+      const row = document.querySelector(`[data-config-row="${data.config_id}"]`);
+      if (data.action === "delete") {
+        if (card) card.remove();
+        if (row) row.remove();
+        return;
+      }
+      if (card && data.action === "update") {
+        card.dataset.configName = data.name;
+        card.dataset.updatedAt = data.updated_at;
+        const name = card.querySelector(".card-header p");
+        if (name) name.textContent = data.name;
+      }
+    });
+    changeFeed.addEventListener("resync", () => window.location.reload());
+    window.addEventListener("pagehide", () => changeFeed.close());
+  }
 
   const canvas = document.getElementById("config-canvas");
   if (canvas) {
@@ -62,7 +189,37 @@ document.addEventListener("DOMContentLoaded", () => {
     let offsetX = 0;
     let offsetY = 0;
 
-    const applyCanvasSort = (sortKey) => {
+    const pendingPositions = new Map();
+    let flushTimer = null;
+
+    const flushPositions = (keepalive = false) => {
+      if (flushTimer) {
+        clearTimeout(flushTimer);
+        flushTimer = null;
+      }
+      if (!pendingPositions.size) return;
+      const positions = Array.from(pendingPositions.values());
+      pendingPositions.clear();
+      fetch("/api/configs/positions", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ positions }),
+        keepalive,
+      });
+    };
+
+    const queuePosition = (card) => {
+      pendingPositions.set(card.dataset.configId, {
+        config_id: Number(card.dataset.configId),
+        x: parseFloat(card.style.left || "0"),
+        y: parseFloat(card.style.top || "0"),
+      });
+      if (flushTimer) clearTimeout(flushTimer);
+      flushTimer = setTimeout(() => flushPositions(), 800);
+    };
+
+    const applyCanvasSort = (sortKey, persist) => {
+      if (!sortKey) return;
       const cards = Array.from(canvas.querySelectorAll(".config-card"))
         .filter((card) => card.style.display !== "none");
       const getValue = (card) => {
@@ -81,6 +238,7 @@ document.addEventListener("DOMContentLoaded", () => {
         const row = Math.floor(index / cols);
         card.style.left = `${originX + col * cellWidth}px`;
         card.style.top = `${originY + row * cellHeight}px`;
+        if (persist) queuePosition(card);
       });
     };
 
@@ -106,25 +264,138 @@ document.addEventListener("DOMContentLoaded", () => {
       activeCard.style.top = `${Math.max(0, y)}px`;
     });
 
-    canvas.addEventListener("pointerup", async (event) => {
+    canvas.addEventListener("pointerup", () => {
       if (!activeCard) return;
       const card = activeCard;
       activeCard = null;
       card.style.cursor = "grab";
-      const configId = card.dataset.configId;
-      const x = parseFloat(card.style.left || "0");
-      const y = parseFloat(card.style.top || "0");
-      await fetch(`/api/configs/${configId}/position`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ x, y }),
-      });
+      queuePosition(card);
     });
 
+    window.addEventListener("pagehide", () => flushPositions(true));
+
+    if (changeFeed) {
+      changeFeed.addEventListener("positions", (event) => {
+        JSON.parse(event.data).positions.forEach((position) => {
+          const card = canvas.querySelector(`.config-card[data-config-id="${position.config_id}"]`);
+          if (!card || card === activeCard || pendingPositions.has(card.dataset.configId)) return;
+          card.style.left = `${position.x}px`;
+          card.style.top = `${position.y}px`;
+        });
+      });
+    }
+
+    if (canvas.dataset.windowed !== undefined) {
+      const tileRows = 8;
+      const loadedTiles = new Set();
+      const extent = document.createElement("div");
+      extent.className = "canvas-extent";
+      canvas.appendChild(extent);
+
+      const element = (tag, className, text) => {
+        const node = document.createElement(tag);
+        if (className) node.className = className;
+        if (text !== undefined) node.textContent = text;
+        return node;
+      };
+
+      const renderAsset = (assetType, item, configId) => {
+        const li = element("li", "draggable-asset asset-inline");
+        li.draggable = true;
+        li.dataset.assetType = assetType;
+        li.dataset.sourceConfigId = configId;
+        if (assetType === "device") {
+          li.classList.add("device-tag");
+          li.dataset.assetId = item.device_id;
+          li.dataset.deviceType = item.device_type;
+          li.append(element("strong", "", item.asset_no), element("span", "", item.display_name || item.model));
+        } else {
+          li.dataset.assetId = item.license_id;
+          li.append(element("strong", "", item.license_no), element("span", "", item.name));
+        }
+        bindDraggable(li);
+        return li;
+      };
+
+      const renderList = (title, assetType, items, configId) => {
+        const list = element("ul", "asset-list");
+        list.dataset.assetList = assetType;
+        items.forEach((item) => list.append(renderAsset(assetType, item, configId)));
+        if (!items.length) list.append(element("li", "muted", "未割当"));
+        return [element("h4", "", title), list];
+      };
+
+      const renderCard = (card) => {
+        const config = card.config;
+        const article = element("article", "config-card");
+        article.dataset.configId = config.config_id;
+        article.dataset.configName = config.name;
+        article.dataset.createdAt = config.created_at;
+        article.dataset.updatedAt = config.updated_at;
+        article.style.left = `${card.x}px`;
+        article.style.top = `${card.y}px`;
+        const header = element("header", "card-header drag-handle");
+        const title = element("div");
+        const heading = element("h2");
+        const link = element("a", "", config.config_no);
+        link.href = `/configurations/${config.config_id}`;
+        heading.append(link);
+        title.append(heading, element("p", "", config.name));
+        const pill = element("span", "pill", `${card.devices.length} Devices`);
+        pill.dataset.count = "devices";
+        header.append(title, pill);
+        const zone = element("div", "drop-zone");
+        zone.dataset.configId = config.config_id;
+        zone.append(
+          ...renderList("Devices", "device", card.devices, config.config_id),
+          ...renderList("Licenses", "license", card.licenses, config.config_id),
+        );
+        bindDropZone(zone);
+        article.append(header, zone);
+        return article;
+      };
+
+      const loadTile = async (tile) => {
+        if (loadedTiles.has(tile)) return;
+        loadedTiles.add(tile);
+        const params = new URLSearchParams({
+          x: 0,
+          y: tile * tileRows * 220,
+          width: 4000,
+          height: tileRows * 220 - 1,
+        });
+        const response = await fetch(`/api/canvas/cards?${params}`);
+        if (!response.ok) {
+          loadedTiles.delete(tile);
+          return;
+        }
+        const data = await response.json();
+        const grid = data.grid;
+        extent.style.height = `${grid.origin_y + grid.rows * grid.cell_height}px`;
+        data.cards.forEach((card) => {
+          if (canvas.querySelector(`.config-card[data-config-id="${card.config.config_id}"]`)) return;
+          canvas.append(renderCard(card));
+        });
+      };
+
+      let refreshQueued = false;
+      const refresh = () => {
+        refreshQueued = false;
+        const first = Math.floor(canvas.scrollTop / (tileRows * 220));
+        const last = Math.floor((canvas.scrollTop + canvas.clientHeight) / (tileRows * 220));
+        for (let tile = first; tile <= last; tile += 1) loadTile(tile);
+      };
+      canvas.addEventListener("scroll", () => {
+        if (refreshQueued) return;
+        refreshQueued = true;
+        requestAnimationFrame(refresh);
+      });
+      refresh();
+    }
+
     const canvasSort = document.getElementById("canvas-sort");
     if (canvasSort) {
-      canvasSort.addEventListener("change", () => applyCanvasSort(canvasSort.value));
-      applyCanvasSort("name");
+      canvasSort.addEventListener("change", (event) => applyCanvasSort(canvasSort.value, event.isTrusted));
     }
   }
 